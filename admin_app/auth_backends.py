@@ -2,12 +2,22 @@ from django.contrib.auth.backends import ModelBackend
 from .models import CustomUser
 
 class EmailBackend(ModelBackend):
-    def authenticate(self, request, email=None, password=None, **kwargs):
+    """
+    Satu-satunya backend autentikasi: satu query user berdasarkan email dan satu kali hash password.
+    Login Django admin mengirim `username`, yang untuk CustomUser juga berisi email.
+    """
+    def authenticate(self, request, email=None, password=None, username=None, **kwargs):
+        email = email or username
+        if email is None or password is None:
+            return None
         try:
             user = CustomUser.objects.get(email=email)
         except CustomUser.DoesNotExist:
+            # Tetap hash sekali agar waktu respons tidak membedakan email yang terdaftar
+            CustomUser().set_password(password)
             return None
         else:
+            # check_password juga menyimpan ulang hash lama dengan hasher yang sedang dipakai
             if user.check_password(password):
                 return user
         return None
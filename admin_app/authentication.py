@@ -0,0 +1,102 @@
+"""
+Autentikasi JWT tanpa query user per request.
+
+Token dari LoginView (lihat CustomTokenObtainPairSerializer) membawa klaim role, is_admin_aplikasi,
+is_staff, is_active, email dan full_name. StatelessJWTAuthentication membangun `request.user` dari
+klaim yang sudah ditandatangani itu, jadi tidak ada SELECT ke CustomUser di setiap API call. Instance
+yang dihasilkan adalah CustomUser dengan pk asli, sehingga tetap bisa dipakai sebagai nilai FK dan filter.
+
+Karena klaim berlaku sampai token kedaluwarsa, pengguna yang dinonaktifkan atau dihapus lewat
+UserToggleActiveView / UserDeleteView dicatat di cache pencabutan (`cabut_token`): token yang diterbitkan
+sebelum waktu pencabutan ditolak. Entri cukup disimpan selama umur access token. Perubahan lain (mis. role
+lewat Django admin) baru terlihat setelah access token diperbarui. Untuk lebih dari satu worker, arahkan
+JWT_STATELESS['CACHE'] ke cache bersama (Redis/Memcached/database); LocMemCache hanya berlaku di satu proses.
+
+Selama cache pencabutan hanya berlaku per proses (LocMemCache/DummyCache), pencabutan dari worker lain tidak
+terlihat; karena itu request tulis (selain GET/HEAD/OPTIONS) tetap memuat user dari database sampai
+JWT_STATELESS['CACHE'] menunjuk cache bersama. `manage.py check --deploy` memperingatkan konfigurasi ini.
+
+Token lama tanpa klaim tersebut tetap diterima lewat jalur JWTAuthentication biasa (query user).
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.permissions import SAFE_METHODS
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import CustomUser
+
+DEFAULTS = {
+    'CACHE': 'default',   # Alias CACHES untuk daftar pencabutan
+}
+
+KLAIM_USER = ('email', 'full_name', 'role', 'is_admin_aplikasi', 'is_staff', 'is_active')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'JWT_STATELESS', {})}
+
+
+def cache_bersama():
+    """False bila cache pencabutan hanya hidup di proses ini, sehingga pencabutan tidak sampai ke worker lain."""
+    return not isinstance(caches[get_config()['CACHE']], (LocMemCache, DummyCache))
+
+
+def kunci_pencabutan(user_id):
+    return f'jwt-dicabut:{user_id}'
+
+
+def cabut_token(user_id):
+    """Menolak semua token `user_id` yang diterbitkan sebelum saat ini."""
+    caches[get_config()['CACHE']].set(
+        kunci_pencabutan(user_id),
+        int(timezone.now().timestamp()),
+        timeout=int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()),
+    )
+
+
+def batalkan_pencabutan(user_id):
+    """Dipanggil saat pengguna diaktifkan kembali; token lama berisi klaim yang kembali benar."""
+    caches[get_config()['CACHE']].delete(kunci_pencabutan(user_id))
+
+
+def token_dicabut(user_id, diterbitkan):
+    dicabut_pada = caches[get_config()['CACHE']].get(kunci_pencabutan(user_id))
+    return dicabut_pada is not None and diterbitkan <= dicabut_pada
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication yang memercayai klaim user di token dan hanya mengecek cache pencabutan."""
+
+    cek_database = False  # Diisi per request oleh authenticate()
+
+    def authenticate(self, request):
+        self.cek_database = request.method not in SAFE_METHODS and not cache_bersama()
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.cek_database or any(klaim not in validated_token for klaim in KLAIM_USER):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed("Token tidak memuat identitas pengguna.", code='token_not_valid')
+
+        if not validated_token['is_active']:
+            raise AuthenticationFailed("Akun ini tidak aktif.", code='user_inactive')
+        if token_dicabut(user_id, validated_token.get('iat', 0)):
+            raise AuthenticationFailed("Token sudah dicabut. Silakan login kembali.", code='token_revoked')
+
+        user = CustomUser(
+            id=user_id,
+            **{klaim: validated_token[klaim] for klaim in KLAIM_USER},
+        )
+        # Perlakukan sebagai baris yang sudah ada di database, bukan objek baru
+        user._state.adding = False
+        user._state.db = CustomUser.objects.db
+        return user
@@ -0,0 +1,17 @@
+from django.core.checks import Tags, Warning, register
+
+from .authentication import cache_bersama, get_config
+
+
+@register(Tags.security, deploy=True)
+def cek_cache_pencabutan_jwt(app_configs, **kwargs):
+    if cache_bersama():
+        return []
+    return [
+        Warning(
+            f"JWT_STATELESS['CACHE'] ({get_config()['CACHE']!r}) hanya berlaku per proses; token pengguna yang "
+            "dinonaktifkan/dihapus masih diterima worker lain untuk request baca.",
+            hint="Arahkan JWT_STATELESS['CACHE'] ke cache bersama (Redis, Memcached, database).",
+            id='admin_app.W001',
+        )
+    ]
@@ -0,0 +1,42 @@
+"""
+Hasher password dengan parameter dari settings.PASSWORD_HASHING.
+
+Hasher pertama di settings.PASSWORD_HASHERS dipakai untuk password baru; hasher lain hanya untuk
+memverifikasi hash lama. Saat login berhasil, check_password menyimpan ulang hash bila algoritma atau
+parameternya (must_update) berbeda dari konfigurasi sekarang, jadi perubahan konfigurasi berlaku bertahap
+tanpa reset password.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+DEFAULTS = {
+    # Minimum rekomendasi OWASP untuk Argon2id: 19 MiB, 2 iterasi, 1 thread (~50 ms per hash)
+    'ARGON2_TIME_COST': 2,
+    'ARGON2_MEMORY_COST': 19456,    # KiB
+    'ARGON2_PARALLELISM': 1,
+    'BCRYPT_ROUNDS': 12,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return get_config()['ARGON2_TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return get_config()['ARGON2_MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return get_config()['ARGON2_PARALLELISM']
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return get_config()['BCRYPT_ROUNDS']
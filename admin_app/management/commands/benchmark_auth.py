@@ -0,0 +1,74 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from admin_app.authentication import StatelessJWTAuthentication
+from admin_app.models import CustomUser
+from admin_app.serializers import CustomTokenObtainPairSerializer
+from petugas_app.views import UserDetailView
+
+PREFIX = 'benchmark-auth'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark latensi per request UserDetailView dengan JWTAuthentication (query user tiap request) "
+        "dibandingkan StatelessJWTAuthentication (klaim token + cache pencabutan). "
+        "User benchmark dibuat di database aktif dan dihapus setelah selesai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help="Jumlah request per autentikasi (default 5000).")
+
+    def handle(self, *args, **options):
+        if CustomUser.objects.filter(email__startswith=PREFIX).exists():
+            raise CommandError(f"Data benchmark sebelumnya masih ada (email {PREFIX}*); hapus dulu.")
+
+        user = CustomUser.objects.create_user(
+            email=f'{PREFIX}@example.com', password=None, full_name='Kasir benchmark', role='petugas', is_staff=True
+        )
+        try:
+            skenario = [
+                ('jwt', JWTAuthentication, RefreshToken.for_user(user).access_token),
+                ('stateless', StatelessJWTAuthentication, CustomTokenObtainPairSerializer.get_token(user).access_token),
+            ]
+            self.stdout.write(f"{options['requests']} request GET user-detail per autentikasi")
+            self.stdout.write(f"{'autentikasi':<12}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'request/detik':>15}{'query/request':>15}")
+            for nama, kelas, token in skenario:
+                hasil = self.ukur(kelas, str(token), options['requests'])
+                latensi = sorted(hasil['latensi'])
+                self.stdout.write(
+                    f"{nama:<12}{self.persentil(latensi, 50):>10.3f}{self.persentil(latensi, 95):>10.3f}"
+                    f"{self.persentil(latensi, 99):>10.3f}{len(latensi) / hasil['durasi']:>15.0f}"
+                    f"{hasil['query'] / len(latensi):>15.2f}"
+                )
+        finally:
+            CustomUser.objects.filter(email__startswith=PREFIX).delete()
+
+    def ukur(self, kelas, token, jumlah):
+        view = UserDetailView.as_view(authentication_classes=[kelas])
+        factory = RequestFactory()
+        latensi = []
+        with CaptureQueriesContext(connection) as queries:
+            mulai = time.perf_counter()
+            for _ in range(jumlah):
+                request = factory.get('/api/user-detail/', HTTP_AUTHORIZATION=f'Bearer {token}')
+                awal = time.perf_counter()
+                response = view(request)
+                response.render()
+                latensi.append((time.perf_counter() - awal) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"Request gagal dengan status {response.status_code}: {response.data}")
+            durasi = time.perf_counter() - mulai
+        return {'latensi': latensi, 'durasi': durasi, 'query': len(queries)}
+
+    def persentil(self, data, p):
+        if len(data) < 2:
+            return data[0] if data else 0
+        return statistics.quantiles(data, n=100, method='inclusive')[p - 1]
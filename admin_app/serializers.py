@@ -6,41 +6,35 @@ from .models import CustomUser
 from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
 from django.contrib.auth.tokens import default_token_generator 
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 
 User = get_user_model()
 class LoginSerializer(serializers.Serializer):
+    """
+    Hanya memvalidasi input login. Autentikasi dan pengecekan status/role dilakukan sekali di LoginView,
+    agar setiap percobaan login cukup satu query user dan satu kali hashing password.
+    """
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
-    def validate(self, data):
-        email = data.get('email')
-        password = data.get('password')
 
-        # Memastikan email dan password diisi
-        if not email or not password:
-            raise serializers.ValidationError(_('Must include "email" and "password"'), code='authorization')
-
-        # Autentikasi pengguna
-        user = authenticate(request=self.context.get('request'), username=email, password=password)
-        if user is None:
-            raise serializers.ValidationError(_('Invalid login credentials'), code='authorization')
-
-        # Memastikan pengguna aktif
-        if not user.is_active:
-            raise serializers.ValidationError(_('User is not active.'), code='authorization')
-
-        # Memastikan hanya admin aplikasi yang dapat login
-        if user.role == 'admin' and not user.is_admin_aplikasi:
-            raise serializers.ValidationError(_('Only application admins can login here.'), code='authorization')
-
-        # Memastikan hanya petugas kasir yang dapat login
-        if user.role == 'petugas' and not user.is_staff:
-            raise serializers.ValidationError(_('Only kasir staff can login here.'), code='authorization')
-
-        # Menyimpan pengguna ke dalam data
-        data['user'] = user
-        return data
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token JWT dengan klaim user yang dibaca StatelessJWTAuthentication, agar request berikutnya tidak
+    perlu memuat CustomUser dari database.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['email'] = user.email
+        token['full_name'] = user.full_name
+        token['role'] = user.role
+        token['is_admin_aplikasi'] = user.is_admin_aplikasi
+        token['is_staff'] = user.is_staff
+        token['is_active'] = user.is_active
+        return token
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
@@ -1,3 +1,166 @@
-from django.test import TestCase
+import tempfile
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.checks import Tags, run_checks
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import CustomUser
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com', password='rahasia123', full_name='Admin', role='admin', is_admin_aplikasi=True
+        )
+        self.kasir = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas', is_staff=True
+        )
+        self.client = APIClient()
+
+    def login(self, url_name, email):
+        response = self.client.post(reverse(url_name), {'email': email, 'password': 'rahasia123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['access']
+
+    def get(self, url, token):
+        return self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_token_login_memuat_klaim_user(self):
+        token = AccessToken(self.login('login_admin', 'admin@example.com'))
+        self.assertEqual(token['role'], 'admin')
+        self.assertTrue(token['is_admin_aplikasi'])
+        self.assertTrue(token['is_active'])
+
+    def test_request_tanpa_query_user(self):
+        token = self.login('login_petugas', 'kasir@example.com')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(reverse('user-detail'), token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], 'kasir@example.com')
+        self.assertEqual(response.data['role'], 'petugas')
+        self.assertEqual(len(queries), 0)
+
+    def test_izin_admin_dari_klaim(self):
+        self.assertEqual(self.get(reverse('user_list'), self.login('login_admin', 'admin@example.com')).status_code, 200)
+        self.assertEqual(self.get(reverse('user_list'), self.login('login_petugas', 'kasir@example.com')).status_code, 403)
+
+    def test_token_ditolak_setelah_user_dinonaktifkan(self):
+        token_admin = self.login('login_admin', 'admin@example.com')
+        token_kasir = self.login('login_petugas', 'kasir@example.com')
+
+        self.client.post(reverse('user_toggle_active', args=[self.kasir.pk]), HTTP_AUTHORIZATION=f'Bearer {token_admin}')
+        self.assertEqual(self.get(reverse('user-detail'), token_kasir).status_code, 401)
+
+        # Diaktifkan kembali: token lama berlaku lagi
+        self.client.post(reverse('user_toggle_active', args=[self.kasir.pk]), HTTP_AUTHORIZATION=f'Bearer {token_admin}')
+        self.assertEqual(self.get(reverse('user-detail'), token_kasir).status_code, 200)
+
+    def test_token_ditolak_setelah_user_dihapus(self):
+        token_admin = self.login('login_admin', 'admin@example.com')
+        token_kasir = self.login('login_petugas', 'kasir@example.com')
+
+        self.client.delete(reverse('user_delete', args=[self.kasir.pk]), HTTP_AUTHORIZATION=f'Bearer {token_admin}')
+        self.assertEqual(self.get(reverse('user-detail'), token_kasir).status_code, 401)
+
+    def test_token_tanpa_klaim_memuat_user_dari_database(self):
+        token = str(AccessToken.for_user(self.kasir))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(reverse('user-detail'), token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        CustomUser.objects.filter(pk=self.kasir.pk).update(is_active=False)
+        self.assertEqual(self.get(reverse('user-detail'), token).status_code, 401)
+
+    def test_request_tulis_memuat_user_selama_cache_per_proses(self):
+        token = self.login('login_petugas', 'kasir@example.com')
+        # Dihapus lewat worker lain: cache pencabutan di proses ini tidak tahu
+        CustomUser.objects.filter(pk=self.kasir.pk).delete()
+        self.assertEqual(self.get(reverse('user-detail'), token).status_code, 200)
+        response = self.client.delete(reverse('clear-cart'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_request_tulis_tanpa_query_user_dengan_cache_bersama(self):
+        token = self.login('login_petugas', 'kasir@example.com')
+        with tempfile.TemporaryDirectory() as lokasi, override_settings(
+            CACHES={**settings.CACHES, 'bersama': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': lokasi}},
+            JWT_STATELESS={'CACHE': 'bersama'},
+        ):
+            self.assertNotIn('admin_app.W001', [pesan.id for pesan in run_checks(include_deployment_checks=True, tags=[Tags.security])])
+            CustomUser.objects.filter(pk=self.kasir.pk).delete()
+            response = self.client.delete(reverse('clear-cart'), HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(response.status_code, 200)
+
+    def test_check_deploy_memperingatkan_cache_per_proses(self):
+        ids = [pesan.id for pesan in run_checks(include_deployment_checks=True, tags=[Tags.security])]
+        self.assertIn('admin_app.W001', ids)
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.kasir = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas', is_staff=True
+        )
+        self.client = APIClient()
+
+    def login(self, password, email='kasir@example.com', **extra):
+        return self.client.post(reverse('login_petugas'), {'email': email, 'password': password}, format='json', **extra)
+
+    def test_password_baru_memakai_argon2(self):
+        self.assertTrue(self.kasir.password.startswith('argon2$'))
+
+    def test_login_satu_query_user(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.login('rahasia123').status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.login('salah').status_code, 401)
+        self.assertEqual(len(queries), 1)
+
+    def test_hash_lama_diperbarui_saat_login(self):
+        CustomUser.objects.filter(pk=self.kasir.pk).update(password=make_password('rahasia123', hasher='pbkdf2_sha256'))
+        self.assertEqual(self.login('rahasia123').status_code, 200)
+        self.kasir.refresh_from_db()
+        self.assertTrue(self.kasir.password.startswith('argon2$'))
+
+    def test_authenticate_dengan_username(self):
+        # Form login Django admin mengirim username
+        self.assertEqual(authenticate(username='kasir@example.com', password='rahasia123'), self.kasir)
+        self.assertIsNone(authenticate(username='kasir@example.com', password='salah'))
+
+    def test_email_diblokir_setelah_terlalu_banyak_gagal(self):
+        for _ in range(5):
+            self.assertEqual(self.login('salah').status_code, 401)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login('rahasia123')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(len(queries), 0)
+
+        # Email lain dari IP yang sama belum terkena batas email
+        self.assertEqual(self.login('salah', email='lain@example.com').status_code, 401)
+
+    def test_login_berhasil_mereset_hitungan_email(self):
+        for _ in range(4):
+            self.login('salah')
+        self.assertEqual(self.login('rahasia123').status_code, 200)
+        for _ in range(4):
+            self.assertEqual(self.login('salah').status_code, 401)
+
+    def test_ip_diblokir_setelah_terlalu_banyak_gagal(self):
+        for i in range(30):
+            self.login('salah', email=f'tamu{i}@example.com')
+        self.assertEqual(self.login('rahasia123').status_code, 429)
+        self.assertEqual(self.login('rahasia123', REMOTE_ADDR='10.0.0.2').status_code, 200)
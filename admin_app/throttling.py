@@ -0,0 +1,62 @@
+"""
+Pembatasan percobaan login gagal untuk LoginView.
+
+Throttle DRF dijalankan di APIView.initial, sebelum handler post, sehingga IP atau email yang sudah melewati
+batas langsung ditolak dengan 429 tanpa query user dan tanpa hashing password. Berbeda dengan throttle DRF
+biasa, hanya login gagal yang dihitung (`catat_gagal`), jadi banyak kasir yang login bersamaan dari satu
+jaringan toko tidak ikut tertahan. Login berhasil menghapus hitungan per email.
+
+Riwayat disimpan di cache default (LocMemCache, per proses); batas per worker. Tarif diatur di
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] dengan scope 'login_ip' dan 'login_email'.
+"""
+import hashlib
+
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginThrottled(Throttled):
+    default_detail = 'Terlalu banyak percobaan login gagal.'
+    extra_detail_singular = extra_detail_plural = 'Silakan coba lagi dalam {wait} detik.'
+
+
+class LoginGagalThrottle(SimpleRateThrottle):
+    def throttle_success(self):
+        # Request yang lolos tidak dicatat; hanya login gagal yang menambah riwayat
+        return True
+
+    def catat_gagal(self, request, view):
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return
+        now = self.timer()
+        history = [waktu for waktu in self.cache.get(key, []) if waktu > now - self.duration]
+        history.insert(0, now)
+        self.cache.set(key, history, self.duration)
+
+    def reset(self, request, view):
+        key = self.get_cache_key(request, view)
+        if key is not None:
+            self.cache.delete(key)
+
+
+class LoginIPThrottle(LoginGagalThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+    def reset(self, request, view):
+        # Satu login berhasil tidak menghapus percobaan gagal lain dari IP yang sama
+        pass
+
+
+class LoginEmailThrottle(LoginGagalThrottle):
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
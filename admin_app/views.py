@@ -1,11 +1,12 @@
 from rest_framework import status, generics  # Import generics here
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
 from django.contrib.auth import authenticate
 from django.shortcuts import get_object_or_404
 from django.utils.crypto import get_random_string
-from .serializers import LoginSerializer, CustomUserSerializer, UserCreateSerializer, ResetPasswordSerializer,SetNewPasswordSerializer
+from .authentication import batalkan_pencabutan, cabut_token
+from .throttling import LoginEmailThrottle, LoginIPThrottle, LoginThrottled
+from .serializers import CustomTokenObtainPairSerializer, LoginSerializer, CustomUserSerializer, UserCreateSerializer, ResetPasswordSerializer,SetNewPasswordSerializer
 from .models import CustomUser
 from rest_framework.permissions import IsAdminUser 
 from django.contrib.auth.tokens import default_token_generator
@@ -22,6 +23,12 @@ from rest_framework.permissions import IsAuthenticated
 
 
 class LoginView(APIView):
+    # Dicek sebelum post: IP/email yang terlalu sering gagal ditolak tanpa query user dan hashing
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
+    def throttled(self, request, wait):
+        raise LoginThrottled(wait)
+
     def post(self, request, *args, **kwargs):
         serializer = LoginSerializer(data=request.data)
         
@@ -35,8 +42,14 @@ class LoginView(APIView):
         user = authenticate(request=request, email=email, password=password)
 
         if user is None:
+            for throttle in self.get_throttles():
+                throttle.catat_gagal(request, self)
             return Response({'detail': 'Kredensial tidak valid.'}, status=status.HTTP_401_UNAUTHORIZED)
 
+        # Password benar: hitungan gagal untuk email ini dimulai dari nol lagi
+        for throttle in self.get_throttles():
+            throttle.reset(request, self)
+
         # Pastikan pengguna aktif
         if not user.is_active:
             return Response({'detail': 'Akun ini tidak aktif.'}, status=status.HTTP_403_FORBIDDEN)
@@ -50,8 +63,8 @@ class LoginView(APIView):
             if user.role.lower() != 'petugas' or not user.is_staff:
                 return Response({'detail': 'Hanya Petugas yang dapat login di sini.'}, status=status.HTTP_403_FORBIDDEN)
 
-        # Jika login berhasil, buat token JWT
-        refresh = RefreshToken.for_user(user)
+        # Jika login berhasil, buat token JWT berisi klaim role dan status pengguna
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
         return Response({
             'refresh': str(refresh),
             'access': str(refresh.access_token),
@@ -82,6 +95,11 @@ class UserToggleActiveView(APIView):
         user = get_object_or_404(CustomUser, pk=pk)
         user.is_active = not user.is_active
         user.save()
+        # Token yang sudah beredar membawa klaim is_active lama
+        if user.is_active:
+            batalkan_pencabutan(user.pk)
+        else:
+            cabut_token(user.pk)
         serializer = CustomUserSerializer(user)
         return Response({'detail': 'Status pengguna diperbarui.', 'user': serializer.data}, status=status.HTTP_200_OK)
 
@@ -90,6 +108,7 @@ class UserDeleteView(APIView):
 
     def delete(self, request, pk):
         user = get_object_or_404(CustomUser, pk=pk)
+        cabut_token(user.pk)
         user.delete()
         return Response({'detail': 'Pengguna berhasil dihapus.'}, status=status.HTTP_204_NO_CONTENT)
 
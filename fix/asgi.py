@@ -3,6 +3,10 @@ ASGI config for fix project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Stream notifikasi (api/notifications/stream/) adalah view async yang menahan koneksi per klien;
+jalankan lewat server ASGI, mis. `uvicorn fix.asgi:application`, agar setiap koneksi idle hanya
+memakan satu coroutine.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -56,11 +58,26 @@ INSTALLED_APPS = [
 ]
 
 
+# Satu backend saja: setiap login cukup satu query user dan satu kali hashing password
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
     "admin_app.auth_backends.EmailBackend",
 ]
 
+# Hasher pertama dipakai untuk password baru; sisanya memverifikasi hash lama, yang disimpan ulang
+# dengan hasher pertama saat login berhasil. Parameter Argon2/bcrypt diatur di PASSWORD_HASHING.
+PASSWORD_HASHERS = [
+    'admin_app.hashers.Argon2PasswordHasher',
+    'admin_app.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+PASSWORD_HASHING = {
+    'ARGON2_TIME_COST': 2,
+    'ARGON2_MEMORY_COST': 19456,    # KiB
+    'ARGON2_PARALLELISM': 1,
+    'BCRYPT_ROUNDS': 12,
+}
+
 
 AUTH_USER_MODEL = 'admin_app.CustomUser'
 
@@ -131,8 +148,6 @@ AUTH_PASSWORD_VALIDATORS = [
 
 LANGUAGE_CODE = 'en-us'
 
-TIME_ZONE = 'UTC'
-
 USE_I18N = True
 
 USE_TZ = True
@@ -143,6 +158,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# File hasil upload/generate (mis. artefak laporan PDF/PNG)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -153,17 +172,26 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3001", 
     "http://localhost:3000",  
 ]
+# ETag keranjang dibaca front end dan dikirim balik lewat If-None-Match saat polling
+CORS_EXPOSE_HEADERS = ['ETag']
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match')
 
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'admin_app.authentication.StatelessJWTAuthentication',
     ),
 
 
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Pastikan ini mengizinkan akses tanpa otentikasi
     ],
+
+    # Batas login gagal (admin_app.throttling), dicek sebelum query user dan hashing password
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_email': '5/min',
+    },
 }
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),  # Token akses kadaluarsa setelah 5 menit
@@ -175,6 +203,79 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),                # Tipe header otentikasi yang digunakan
 }
 
+# Cache lokal per proses: throttle login, daftar pencabutan token JWT, dsb.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Autentikasi JWT dari klaim token tanpa query user (admin_app.authentication).
+# CACHE = alias CACHES untuk daftar pencabutan token; harus cache bersama bila ada lebih dari satu worker.
+# Selama masih LocMemCache, request tulis tetap memuat user dari database (lihat check --deploy).
+JWT_STATELESS = {
+    'CACHE': 'default',
+}
+
+# Cache lookup produk untuk scan kasir (SearchProdukView / AddToCartView).
+# SHARED_CACHE diisi alias dari CACHES (mis. Redis) untuk berbagi entri antar worker.
+PRODUK_LOOKUP_CACHE = {
+    'MAX_ENTRIES': 4096,
+    'TTL': 300,
+    'SHARED_CACHE': None,
+}
+
+# Sinkronisasi delta katalog kasir (produk_app.sync, endpoint produk/sync/).
+# JEDA = detik tunggu sebelum perubahan dikirim (transaksi yang belum commit tidak terlewat);
+# RETENSI_TOMBSTONE = hari tombstone produk dihapus disimpan (prune_produk_tombstones).
+KATALOG_SYNC = {
+    'BATAS': 1000,
+    'MAKS_BATAS': 5000,
+    'JEDA': 2,
+    'RETENSI_TOMBSTONE': 30,
+}
+
+# Backend keranjang kasir (transaksi_app.cart).
+# BACKEND 'orm' = tabel CartItem; 'kv' = hash per petugas di store kompatibel Redis (KV_URL,
+# 'memory://' = store in-process, hanya untuk satu proses). TTL = umur keranjang kv yang tidak disentuh.
+KERANJANG = {
+    'BACKEND': 'orm',
+    'KV_URL': 'memory://',
+    'TTL': 12 * 3600,
+}
+
+# Penomoran invoice harian (transaksi_app.penomoran): PREFIX-YYYYMMDD-000001.
+# BLOK = 1: nomor tanpa lubang, satu lock counter per invoice. BLOK > 1: setiap worker memesan
+# BLOK nomor sekaligus (tanpa lock per invoice), dengan kemungkinan lubang bila worker berhenti.
+INVOICE_NUMBERING = {
+    'PREFIX': 'INV',
+    'BLOK': 1,
+}
+
+# Notifikasi penjualan (petugas_app.notifikasi), diproses thread worker setelah checkout commit.
+# BATAS_STOK = threshold Produk.is_low_stock; JENDELA_STOK_RENDAH = detik notifikasi stok rendah
+# produk yang sama tidak diulang. ASYNC = False memproses langsung tanpa thread (untuk testing).
+# STREAM_HEARTBEAT = detik antar ping di stream SSE notifications/stream/; STREAM_SINKRON = detik antar
+# pengecekan database oleh stream untuk notifikasi yang dibuat proses lain (0 = mati); STREAM_TUMPANG =
+# detik ke belakang yang dibaca ulang setiap susulan, untuk notifikasi ber-id lebih kecil yang commit belakangan.
+NOTIFIKASI = {
+    'ASYNC': True,
+    'BATAS_STOK': 10,
+    'JENDELA_STOK_RENDAH': 3600,
+    'STREAM_HEARTBEAT': 15,
+    'STREAM_SINKRON': 60,
+    'STREAM_TUMPANG': 120,
+}
+
+# Job render laporan PDF/PNG (laporan_app.reports).
+# WORKERS = jumlah proses render per worker web (0 = render langsung di request, untuk testing).
+# FRESHNESS = detik laporan yang sama dipakai ulang dari cache.
+LAPORAN_REPORT_JOBS = {
+    'WORKERS': 2,
+    'FRESHNESS': 600,
+    'TIMEOUT': 300,
+}
+
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -1,3 +1,14 @@
 from django.contrib import admin
+from .models import DailySalesRollup, ReportJob
 
-# Register your models here.
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ('tanggal', 'kasir', 'produk', 'kategori', 'jumlah_transaksi', 'jumlah_terjual', 'total_penjualan')
+    list_filter = ('tanggal', 'kategori')
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'jenis', 'status', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('jenis', 'status')
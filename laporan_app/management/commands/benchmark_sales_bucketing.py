@@ -0,0 +1,120 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from admin_app.models import CustomUser
+from laporan_app.services import bucket_per_periode
+from transaksi_app.models import Transaksi
+
+BATCH_SIZE = 5000
+
+# Versi SQL mentah per database sebagai pembanding (padanan .extra() lama yang khusus MySQL)
+RAW_SQL = {
+    'sqlite': {
+        'daily': "date(tanggal, '+7 hours')",
+        'weekly': "date(tanggal, '+7 hours', 'weekday 0', '-6 days')",
+        'monthly': "strftime('%%Y-%%m', tanggal, '+7 hours')",
+        'yearly': "strftime('%%Y', tanggal, '+7 hours')",
+    },
+    'postgresql': {
+        'daily': "date_trunc('day', tanggal AT TIME ZONE 'Asia/Jakarta')",
+        'weekly': "date_trunc('week', tanggal AT TIME ZONE 'Asia/Jakarta')",
+        'monthly': "date_trunc('month', tanggal AT TIME ZONE 'Asia/Jakarta')",
+        'yearly': "date_trunc('year', tanggal AT TIME ZONE 'Asia/Jakarta')",
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark engine bucketing periode (Trunc*) dibandingkan SQL mentah pada dataset Transaksi sintetis. "
+        "Data dibuat di dalam transaksi database dan di-rollback setelah selesai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Jumlah Transaksi sintetis (default 1.000.000).")
+        parser.add_argument('--days', type=int, default=365, help="Rentang hari data sintetis (default 365).")
+        parser.add_argument('--repeat', type=int, default=3, help="Jumlah pengulangan per pengukuran (default 3).")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in RAW_SQL:
+            raise CommandError(f"SQL pembanding belum tersedia untuk database {connection.vendor}.")
+
+        with transaction.atomic():
+            end = timezone.localdate()
+            start = end - timedelta(days=options['days'] - 1)
+            self.seed(options['rows'], start, options['days'])
+
+            self.stdout.write(f"{'periode':<10}{'engine (ms)':>14}{'sql mentah (ms)':>18}{'bucket':>10}{'cocok':>8}")
+            for period in ('daily', 'weekly', 'monthly', 'yearly'):
+                engine_ms, engine = self.measure(options['repeat'], lambda: bucket_per_periode(
+                    Transaksi.objects.all(), 'tanggal', period, start, end,
+                    {'total_penjualan': Sum('total_harga'), 'total_transaksi': Count('id')},
+                ))
+                raw_ms, raw = self.measure(options['repeat'], lambda: self.raw_sql(period, start, end))
+                # Bucket terisi dan jumlah transaksinya harus sama persis
+                cocok = (
+                    [b['total_transaksi'] for b in engine if b['total_transaksi']] == [row[2] for row in raw]
+                )
+                self.stdout.write(
+                    f"{period:<10}{engine_ms:>14.1f}{raw_ms:>18.1f}{len(engine):>10}{'ya' if cocok else 'TIDAK':>8}"
+                )
+
+            transaction.set_rollback(True)
+
+    def seed(self, rows, start, days):
+        self.stdout.write(f"Membuat {rows} transaksi sintetis selama {days} hari...")
+        kasir = CustomUser.objects.create_user(
+            email='benchmark-bucketing@example.com', password=None, full_name='Benchmark', role='petugas'
+        )
+        awal = datetime.combine(start, datetime.min.time(), tzinfo=timezone.get_current_timezone())
+        rentang_detik = days * 24 * 3600
+        rng = random.Random(42)
+
+        # auto_now_add akan menimpa tanggal sintetis; matikan sementara selama seeding
+        field = Transaksi._meta.get_field('tanggal')
+        field.auto_now_add = False
+        try:
+            dibuat = 0
+            while dibuat < rows:
+                jumlah = min(BATCH_SIZE, rows - dibuat)
+                Transaksi.objects.bulk_create([
+                    Transaksi(
+                        user=kasir,
+                        tanggal=awal + timedelta(seconds=rng.randrange(rentang_detik)),
+                        total_harga=rng.randint(1, 500) * 1000,
+                        metode_pembayaran='tunai',
+                    )
+                    for _ in range(jumlah)
+                ])
+                dibuat += jumlah
+        finally:
+            field.auto_now_add = True
+
+    def raw_sql(self, period, start, end):
+        ekspresi = RAW_SQL[connection.vendor][period]
+        tz = timezone.get_current_timezone()
+        batas_awal = datetime.combine(start, datetime.min.time(), tzinfo=tz)
+        batas_akhir = datetime.combine(end + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {ekspresi} AS periode, SUM(total_harga), COUNT(id) FROM transaksi_app_transaksi "
+                f"WHERE tanggal >= %s AND tanggal < %s GROUP BY periode ORDER BY periode",
+                [connection.ops.adapt_datetimefield_value(batas_awal), connection.ops.adapt_datetimefield_value(batas_akhir)],
+            )
+            return cursor.fetchall()
+
+    def measure(self, repeat, func):
+        terbaik = None
+        hasil = None
+        for _ in range(repeat):
+            mulai = time.perf_counter()
+            hasil = func()
+            durasi = (time.perf_counter() - mulai) * 1000
+            terbaik = durasi if terbaik is None else min(terbaik, durasi)
+        return terbaik, hasil
@@ -0,0 +1,93 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Dijalankan di interpreter baru agar setiap pengukuran mulai dari kondisi dingin seperti worker gunicorn
+SCRIPT = r"""
+import importlib, json, os, sys, time
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except OSError:
+        import resource
+        # Fallback non-Linux: puncak RSS (ru_maxrss dalam KB di Linux, byte di macOS)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 1024 / 1024 if sys.platform == 'darwin' else maxrss / 1024
+
+mulai = time.perf_counter()
+import django
+django.setup()
+hasil = {'setup_ms': (time.perf_counter() - mulai) * 1000, 'setup_rss': rss_mb(), 'modules': {}}
+for nama in sys.argv[1:]:
+    rss = rss_mb()
+    mulai = time.perf_counter()
+    try:
+        importlib.import_module(nama)
+    except ImportError:
+        continue
+    hasil['modules'][nama] = {'ms': (time.perf_counter() - mulai) * 1000, 'rss': rss_mb() - rss}
+hasil['total_rss'] = rss_mb()
+print(json.dumps(hasil))
+"""
+
+SUBMODULES = ('views', 'urls', 'serializers')
+
+
+class Command(BaseCommand):
+    help = (
+        "Mengukur waktu import dan RSS saat startup worker: django.setup(), modul views/urls/serializers "
+        "per app lokal, dan total URLconf. Setiap pengukuran memakai interpreter baru."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help="Jumlah pengulangan, diambil median (default 3).")
+        parser.add_argument('--json', action='store_true', help="Cetak hasil mentah dalam format JSON.")
+
+    def handle(self, *args, **options):
+        lokal = [
+            config for config in apps.get_app_configs()
+            if not config.name.startswith('django.') and os.path.dirname(config.path) == str(settings.BASE_DIR)
+        ]
+        hasil = {}
+        for config in lokal:
+            hasil[config.label] = self.ukur([f"{config.name}.{sub}" for sub in SUBMODULES], options['repeat'])
+        hasil['URLconf'] = self.ukur([settings.ROOT_URLCONF], options['repeat'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(hasil, indent=2))
+            return
+
+        setup = hasil['URLconf']
+        self.stdout.write(f"django.setup(): {setup['setup_ms']:.1f} ms, RSS {setup['setup_rss']:.1f} MB")
+        self.stdout.write(f"{'app':<16}{'import (ms)':>14}{'RSS (MB)':>12}")
+        for label, data in hasil.items():
+            self.stdout.write(f"{label:<16}{data['ms']:>14.1f}{data['rss']:>12.1f}")
+        self.stdout.write(f"RSS worker setelah URLconf dimuat: {setup['total_rss']:.1f} MB")
+
+    def ukur(self, modules, repeat):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+        runs = []
+        for _ in range(repeat):
+            proses = subprocess.run(
+                [sys.executable, '-c', SCRIPT, *modules],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if proses.returncode != 0:
+                raise CommandError(f"Gagal mengukur {', '.join(modules)}:\n{proses.stderr}")
+            data = json.loads(proses.stdout.strip().splitlines()[-1])
+            runs.append({
+                'setup_ms': data['setup_ms'],
+                'setup_rss': data['setup_rss'],
+                'total_rss': data['total_rss'],
+                'ms': sum(m['ms'] for m in data['modules'].values()),
+                'rss': sum(m['rss'] for m in data['modules'].values()),
+            })
+        runs.sort(key=lambda run: run['ms'])
+        return runs[len(runs) // 2]
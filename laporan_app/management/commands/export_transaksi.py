@@ -0,0 +1,40 @@
+import sys
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from laporan_app.exports import FORMAT_EXPORT, stream_export
+
+
+class Command(BaseCommand):
+    help = "Export Transaksi dan TransaksiItem (satu baris per item) ke CSV atau NDJSON secara streaming."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="Tanggal awal (YYYY-MM-DD), inklusif.")
+        parser.add_argument('--end', help="Tanggal akhir (YYYY-MM-DD), inklusif.")
+        parser.add_argument('--format', dest='fmt', choices=sorted(FORMAT_EXPORT), default='csv')
+        parser.add_argument('--output', '-o', help="File tujuan. Kosong = stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f"Format tanggal tidak valid: {e}")
+
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        mulai = time.perf_counter()
+        baris = 0
+        try:
+            for potongan in stream_export(options['fmt'], start=start, end=end):
+                output.write(potongan)
+                baris += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        durasi = time.perf_counter() - mulai
+        if options['fmt'] == 'csv':
+            baris -= 1  # Header
+        self.stderr.write(f"{baris} baris diekspor dalam {durasi:.1f} detik ({baris / durasi if durasi else 0:,.0f} baris/detik).")
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from laporan_app.services import bangun_ulang_rollup
+
+
+class Command(BaseCommand):
+    help = "Backfill atau bangun ulang DailySalesRollup dari data Transaksi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="Tanggal awal (YYYY-MM-DD), inklusif. Kosong = sejak awal.")
+        parser.add_argument('--end', help="Tanggal akhir (YYYY-MM-DD), inklusif. Kosong = sampai hari ini.")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f"Format tanggal tidak valid: {e}")
+        if start and end and start > end:
+            raise CommandError("--start tidak boleh setelah --end.")
+
+        dibuat = bangun_ulang_rollup(start=start, end=end)
+        self.stdout.write(self.style.SUCCESS(f"{dibuat} baris rekap penjualan harian dibangun ulang."))
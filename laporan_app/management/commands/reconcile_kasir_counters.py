@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from laporan_app.services import rekonsiliasi_ringkasan_kasir
+
+
+class Command(BaseCommand):
+    help = (
+        "Rekonsiliasi counter harian kasir (baris ringkasan DailySalesRollup) terhadap data Transaksi. "
+        "Selisih dilaporkan dan diperbaiki, kecuali dengan --dry-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="Tanggal awal (YYYY-MM-DD), inklusif. Default = --days hari terakhir.")
+        parser.add_argument('--end', help="Tanggal akhir (YYYY-MM-DD), inklusif. Default = hari ini.")
+        parser.add_argument('--days', type=int, default=2, help="Jumlah hari terakhir bila --start kosong (default 2).")
+        parser.add_argument('--dry-run', action='store_true', help="Hanya laporkan selisih tanpa memperbaiki.")
+
+    def handle(self, *args, **options):
+        try:
+            end = date.fromisoformat(options['end']) if options['end'] else timezone.localdate()
+            start = date.fromisoformat(options['start']) if options['start'] else end - timedelta(days=options['days'] - 1)
+        except ValueError as e:
+            raise CommandError(f"Format tanggal tidak valid: {e}")
+        if start > end:
+            raise CommandError("--start tidak boleh setelah --end.")
+
+        selisih = rekonsiliasi_ringkasan_kasir(start, end, perbaiki=not options['dry_run'])
+        for baris in selisih:
+            self.stdout.write(
+                f"{baris['tanggal']} kasir #{baris['kasir_id']}: tercatat {self.format(baris['tercatat'])}, "
+                f"seharusnya {self.format(baris['seharusnya'])}"
+            )
+
+        if not selisih:
+            self.stdout.write(self.style.SUCCESS(f"Counter kasir {start} s/d {end} sesuai dengan data transaksi."))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{len(selisih)} counter kasir selisih (dry run, tidak diperbaiki)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(selisih)} counter kasir diperbaiki."))
+
+    def format(self, nilai):
+        return f"{nilai['jumlah_transaksi']} transaksi / {nilai['jumlah_terjual']} item / Rp {nilai['total_penjualan']}"
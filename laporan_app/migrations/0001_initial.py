@@ -0,0 +1,38 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('produk_app', '0008_alter_kategori_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tanggal', models.DateField()),
+                ('jumlah_transaksi', models.PositiveIntegerField(default=0)),
+                ('jumlah_terjual', models.PositiveIntegerField(default=0)),
+                ('total_penjualan', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('kasir', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollup', to=settings.AUTH_USER_MODEL)),
+                ('kategori', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='produk_app.kategori')),
+                ('produk', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='produk_app.produk')),
+            ],
+            options={
+                'verbose_name': 'Rekap Penjualan Harian',
+                'verbose_name_plural': 'Rekap Penjualan Harian',
+                'ordering': ['-tanggal'],
+                'indexes': [models.Index(fields=['tanggal', 'produk'], name='rollup_tanggal_produk_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('produk__isnull', False)), fields=('tanggal', 'kasir', 'produk'), name='unique_rollup_produk'), models.UniqueConstraint(condition=models.Q(('produk__isnull', True)), fields=('tanggal', 'kasir'), name='unique_rollup_kasir')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laporan_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jenis', models.CharField(choices=[('pdf', 'PDF'), ('png', 'PNG')], max_length=10)),
+                ('parameter', models.JSONField(default=dict)),
+                ('cache_key', models.CharField(db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('PENDING', 'Menunggu'), ('RUNNING', 'Diproses'), ('DONE', 'Selesai'), ('FAILED', 'Gagal')], default='PENDING', max_length=10)),
+                ('file', models.FileField(blank=True, upload_to='laporan/')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Job Laporan',
+                'verbose_name_plural': 'Job Laporan',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
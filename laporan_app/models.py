@@ -0,0 +1,78 @@
+from django.db import models
+from django.db.models import Q
+from admin_app.models import CustomUser
+from produk_app.models import Produk, Kategori
+
+
+class DailySalesRollup(models.Model):
+    """
+    Ringkasan penjualan harian yang dipelihara secara inkremental saat checkout.
+
+    Setiap (tanggal, kasir) punya satu baris ringkasan dengan `produk` kosong yang menyimpan
+    jumlah transaksi dan total pendapatan kasir hari itu. Baris dengan `produk` terisi menyimpan
+    penjualan per produk (kategori ikut disimpan agar laporan per kategori tidak perlu join).
+    """
+    tanggal = models.DateField()  # Tanggal lokal transaksi
+    kasir = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='sales_rollup')
+    produk = models.ForeignKey(Produk, on_delete=models.CASCADE, null=True, blank=True)  # Kosong = baris ringkasan kasir
+    kategori = models.ForeignKey(Kategori, on_delete=models.SET_NULL, null=True, blank=True)
+    jumlah_transaksi = models.PositiveIntegerField(default=0)  # Jumlah transaksi (yang memuat produk ini)
+    jumlah_terjual = models.PositiveIntegerField(default=0)  # Jumlah unit terjual
+    total_penjualan = models.DecimalField(max_digits=15, decimal_places=2, default=0)  # Total pendapatan
+
+    class Meta:
+        verbose_name = "Rekap Penjualan Harian"
+        verbose_name_plural = "Rekap Penjualan Harian"
+        ordering = ['-tanggal']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tanggal', 'kasir', 'produk'],
+                name='unique_rollup_produk',
+                condition=Q(produk__isnull=False),
+            ),
+            models.UniqueConstraint(
+                fields=['tanggal', 'kasir'],
+                name='unique_rollup_kasir',
+                condition=Q(produk__isnull=True),
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tanggal', 'produk'], name='rollup_tanggal_produk_idx'),
+        ]
+
+    def __str__(self):
+        if self.produk_id is None:
+            return f"Rekap {self.tanggal} - {self.kasir}"
+        return f"Rekap {self.tanggal} - {self.kasir} - {self.produk}"
+
+
+class ReportJob(models.Model):
+    """Job render laporan penjualan (PDF/PNG) yang dijalankan di process pool di luar thread request."""
+    JENIS_CHOICES = [
+        ('pdf', 'PDF'),
+        ('png', 'PNG'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Menunggu'),
+        ('RUNNING', 'Diproses'),
+        ('DONE', 'Selesai'),
+        ('FAILED', 'Gagal'),
+    ]
+
+    jenis = models.CharField(max_length=10, choices=JENIS_CHOICES)
+    parameter = models.JSONField(default=dict)  # period, start, end
+    cache_key = models.CharField(max_length=64, db_index=True)  # Hash parameter + versi data
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    file = models.FileField(upload_to='laporan/', blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Job Laporan"
+        verbose_name_plural = "Job Laporan"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Laporan {self.jenis.upper()} #{self.id} ({self.status})"
@@ -0,0 +1,83 @@
+"""
+Render grafik dan PDF laporan penjualan.
+
+Modul ini sengaja tidak bergantung pada Django agar bisa dijalankan di proses worker
+(ProcessPoolExecutor). Input hanya berupa tipe primitif dan output berupa bytes.
+
+matplotlib dan reportlab baru di-import di dalam fungsi render: modul ini ikut termuat saat
+URLconf dimuat, dan import keduanya di level modul menambah sekitar 0,6 detik dan 47 MB RSS
+pada setiap worker web (lihat `manage.py benchmark_startup`).
+"""
+import io
+
+
+def render_chart_png(judul, rows):
+    """Grafik batang total penjualan per periode. `rows` berisi dict label, total_penjualan, total_transaksi."""
+    import matplotlib
+    matplotlib.use('Agg')  # Backend tanpa GUI, aman untuk proses server
+    import matplotlib.pyplot as plt
+
+    labels = [row['label'] for row in rows]
+    totals = [row['total_penjualan'] for row in rows]
+
+    fig, ax = plt.subplots(figsize=(10, 4.5), dpi=100)
+    try:
+        ax.bar(range(len(labels)), totals, color='#2f6db5')
+        ax.set_title(judul)
+        ax.set_ylabel('Total penjualan (Rp)')
+        langkah = max(1, len(labels) // 15)  # Batasi jumlah label sumbu X agar tetap terbaca
+        ax.set_xticks(range(0, len(labels), langkah))
+        ax.set_xticklabels(labels[::langkah], rotation=45, ha='right', fontsize=8)
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def render_pdf(judul, rows):
+    """PDF berisi grafik penjualan dan tabel ringkasan per periode."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    lebar, tinggi = letter
+
+    pdf.setFont('Helvetica-Bold', 14)
+    pdf.drawString(40, tinggi - 50, judul)
+
+    chart = ImageReader(io.BytesIO(render_chart_png(judul, rows)))
+    pdf.drawImage(chart, 40, tinggi - 330, width=lebar - 80, height=260, preserveAspectRatio=True)
+
+    y = tinggi - 360
+    pdf.setFont('Helvetica-Bold', 10)
+    pdf.drawString(40, y, 'Periode')
+    pdf.drawRightString(380, y, 'Total Penjualan')
+    pdf.drawRightString(520, y, 'Jumlah Transaksi')
+    pdf.setFont('Helvetica', 10)
+    for row in rows:
+        y -= 16
+        if y < 50:
+            pdf.showPage()
+            pdf.setFont('Helvetica', 10)
+            y = tinggi - 50
+        pdf.drawString(40, y, row['label'])
+        pdf.drawRightString(380, y, f"Rp {row['total_penjualan']:,.0f}".replace(',', '.'))
+        pdf.drawRightString(520, y, str(row['total_transaksi']))
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    'png': render_chart_png,
+    'pdf': render_pdf,
+}
+
+
+def render(jenis, judul, rows):
+    return RENDERERS[jenis](judul, rows)
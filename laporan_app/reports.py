@@ -0,0 +1,165 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from .models import DailySalesRollup, ReportJob
+from .rendering import render
+from .services import penjualan_per_periode
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WORKERS': 2,        # Jumlah proses render; 0 = render langsung di proses pemanggil
+    'FRESHNESS': 600,    # Detik; laporan dengan parameter dan data yang sama dipakai ulang selama ini
+    'TIMEOUT': 300,      # Detik; job PENDING/RUNNING yang lebih tua dari ini dianggap mati dan ditandai FAILED
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'LAPORAN_REPORT_JOBS', {})}
+
+
+def get_executor():
+    """Process pool per proses web, dibuat saat job pertama (spawn agar tidak mewarisi koneksi DB)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=get_config()['WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+    return _executor
+
+
+def versi_data(start, end):
+    """Sidik jari data rollup pada rentang laporan; berubah setiap ada checkout atau rebuild."""
+    ringkasan = (
+        DailySalesRollup.objects
+        .filter(produk__isnull=True, tanggal__gte=start, tanggal__lte=end)
+        .aggregate(baris=Count('id'), transaksi=Sum('jumlah_transaksi'), total=Sum('total_penjualan'), terakhir=Max('id'))
+    )
+    return json.dumps(ringkasan, sort_keys=True, default=str)
+
+
+def buat_cache_key(jenis, parameter, versi):
+    isi = json.dumps({'jenis': jenis, 'parameter': parameter, 'versi': versi}, sort_keys=True)
+    return hashlib.sha256(isi.encode()).hexdigest()
+
+
+def data_laporan(period, start, end):
+    """Baris laporan dalam tipe primitif agar bisa dikirim ke proses worker."""
+    return [
+        {
+            'label': format_label(baris),
+            'total_penjualan': float(baris['total_penjualan']),
+            'total_transaksi': int(baris['total_transaksi']),
+        }
+        for baris in penjualan_per_periode(period, start, end)
+    ]
+
+
+def format_label(baris):
+    if 'minggu' in baris:
+        return f"{baris['tahun']}-W{baris['minggu']:02d}"
+    if 'tanggal' in baris:
+        return baris['tanggal'].isoformat()
+    if 'bulan' in baris:
+        return baris['bulan']
+    return str(baris['tahun'])
+
+
+def minta_laporan(user, jenis, period, start, end):
+    """
+    Mengembalikan (job, dari_cache). Job selesai dengan parameter dan versi data yang sama dalam
+    jendela FRESHNESS dipakai ulang dengan dari_cache True; job yang masih antre/diproses untuk kunci
+    yang sama juga dipakai ulang selama belum melewati TIMEOUT, tetapi dengan dari_cache False karena
+    hasilnya belum ada. Selain itu job baru dibuat dan dikirim ke process pool.
+    """
+    parameter = {'period': period, 'start': start.isoformat(), 'end': end.isoformat()}
+    cache_key = buat_cache_key(jenis, parameter, versi_data(start, end))
+    config = get_config()
+
+    tandai_kedaluwarsa(ReportJob.objects.filter(cache_key=cache_key))
+    batas_segar = timezone.now() - timedelta(seconds=config['FRESHNESS'])
+    job = (
+        ReportJob.objects
+        .filter(cache_key=cache_key)
+        .exclude(status='FAILED')
+        .exclude(status='DONE', finished_at__lt=batas_segar)
+        .order_by('-created_at')
+        .first()
+    )
+    if job is not None:
+        return job, job.status == 'DONE'
+
+    job = ReportJob.objects.create(jenis=jenis, parameter=parameter, cache_key=cache_key, created_by=user)
+    judul = f"Laporan Penjualan {period} {parameter['start']} s/d {parameter['end']}"
+    rows = data_laporan(period, start, end)
+
+    if config['WORKERS'] == 0:
+        try:
+            simpan_hasil(job.id, render(jenis, judul, rows))
+        except Exception as e:
+            tandai_gagal(job.id, e)
+    else:
+        ReportJob.objects.filter(id=job.id).update(status='RUNNING')
+        try:
+            future = get_executor().submit(render, jenis, judul, rows)
+        except Exception as e:
+            tandai_gagal(job.id, e)
+        else:
+            future.add_done_callback(lambda f, job_id=job.id: selesaikan_job(job_id, f))
+    job.refresh_from_db()
+    return job, False
+
+
+def selesaikan_job(job_id, future):
+    """Callback di thread pool parent: simpan artefak atau catat error, lalu lepas koneksi DB."""
+    close_old_connections()
+    try:
+        error = future.exception()
+        if error is None:
+            simpan_hasil(job_id, future.result())
+        else:
+            tandai_gagal(job_id, error)
+    finally:
+        connection.close()
+
+
+def simpan_hasil(job_id, konten):
+    job = ReportJob.objects.get(id=job_id)
+    job.file.save(f"laporan_{job.id}_{job.cache_key[:12]}.{job.jenis}", ContentFile(konten), save=False)
+    job.status = 'DONE'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'status', 'finished_at'])
+
+
+def tandai_kedaluwarsa(jobs):
+    """
+    Menandai FAILED job PENDING/RUNNING di `jobs` yang dibuat lebih dari TIMEOUT detik lalu. Pool render
+    hidup di dalam proses web, jadi job yang sedang dirender saat worker restart/crash tidak pernah selesai;
+    tanpa ini job tersebut terus dipakai ulang untuk cache_key yang sama.
+    """
+    batas = timezone.now() - timedelta(seconds=get_config()['TIMEOUT'])
+    return jobs.filter(status__in=['PENDING', 'RUNNING'], created_at__lt=batas).update(
+        status='FAILED', error="Render tidak selesai dalam batas waktu.", finished_at=timezone.now()
+    )
+
+
+def tandai_gagal(job_id, error):
+    logger.error(f"Render laporan #{job_id} gagal: {error}")
+    ReportJob.objects.filter(id=job_id).update(status='FAILED', error=str(error), finished_at=timezone.now())
@@ -1,9 +1,10 @@
-from django.db import models
 from rest_framework import serializers
+from django.urls import reverse
+from .models import ReportJob
 from datetime import datetime
 
 class RevenueSummarySerializer(serializers.Serializer):
-    tanggal = serializers.DateField(source='tanggal__date')
+    tanggal = serializers.DateField()
     total_harga = serializers.DecimalField(max_digits=15, decimal_places=2)
 
     def validate_total_harga(self, value):
@@ -12,7 +13,7 @@ class RevenueSummarySerializer(serializers.Serializer):
             raise serializers.ValidationError("Total harga cannot be negative.")
         return value
 
-    def validate_tanggal__date(self, value):
+    def validate_tanggal(self, value):
         """Validate that the date is not in the future."""
         if value > datetime.today().date():
             raise serializers.ValidationError("Date cannot be in the future.")
@@ -37,9 +38,27 @@ class DailySalesChartSerializer(serializers.Serializer):
         
         return representation
 
-class Produk(models.Model):
-    nama_produk = models.CharField(max_length=255)
-    jumlah_terjual = models.IntegerField()
-    total_pendapatan = models.DecimalField(max_digits=15, decimal_places=2)
 
+class ReportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
 
+    class Meta:
+        model = ReportJob
+        fields = ['id', 'jenis', 'parameter', 'status', 'error', 'created_at', 'finished_at', 'download_url']
+
+    def get_download_url(self, obj):
+        if obj.status != 'DONE':
+            return None
+        return reverse('report-job-download', kwargs={'pk': obj.pk})
+
+
+class ReportJobRequestSerializer(serializers.Serializer):
+    jenis = serializers.ChoiceField(choices=ReportJob.JENIS_CHOICES)
+    period = serializers.ChoiceField(choices=['daily', 'weekly', 'monthly', 'yearly'], default='daily')
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, data):
+        if data['start'] > data['end']:
+            raise serializers.ValidationError("start tidak boleh setelah end.")
+        return data
@@ -0,0 +1,334 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncDay, TruncMonth, TruncWeek, TruncYear
+from django.utils import timezone
+
+from transaksi_app.models import Transaksi, TransaksiItem
+from .models import DailySalesRollup
+
+BATCH_SIZE = 1000
+
+
+def catat_penjualan(transaksi, transaksi_items):
+    """
+    Menambahkan satu transaksi ke DailySalesRollup dengan jumlah query tetap.
+
+    Dipanggil di dalam blok atomic checkout, sehingga rollup ikut di-rollback bila checkout gagal.
+    `transaksi_items` adalah item yang baru dibuat dengan `produk` sudah termuat di memori.
+    """
+    tanggal = timezone.localdate(transaksi.tanggal)
+
+    # Ringkas item per produk di memori
+    per_produk = {}
+    for item in transaksi_items:
+        baris = per_produk.setdefault(item.produk_id, {
+            'kategori_id': item.produk.kategori_id,
+            'jumlah_terjual': 0,
+            'total_penjualan': 0,
+        })
+        baris['jumlah_terjual'] += item.jumlah
+        baris['total_penjualan'] += item.harga * item.jumlah
+
+    tambahan = {None: {
+        'kategori_id': None,
+        'jumlah_terjual': sum(baris['jumlah_terjual'] for baris in per_produk.values()),
+        'total_penjualan': transaksi.total_harga,
+    }}
+    tambahan.update(per_produk)
+
+    try:
+        with transaction.atomic():
+            _tambah_ke_rollup(tanggal, transaksi.user_id, dict(tambahan))
+    except IntegrityError:
+        # Checkout paralel untuk kasir yang sama baru saja membuat baris yang sama; ulangi sebagai update
+        with transaction.atomic():
+            _tambah_ke_rollup(tanggal, transaksi.user_id, dict(tambahan))
+
+
+def _tambah_ke_rollup(tanggal, kasir_id, tambahan):
+    produk_ids = [produk_id for produk_id in tambahan if produk_id is not None]
+    existing = (
+        DailySalesRollup.objects
+        .select_for_update()
+        .filter(tanggal=tanggal, kasir_id=kasir_id)
+        .filter(Q(produk__isnull=True) | Q(produk_id__in=produk_ids))
+    )
+
+    diperbarui = []
+    for rollup in existing:
+        baris = tambahan.pop(rollup.produk_id)
+        rollup.jumlah_transaksi = F('jumlah_transaksi') + 1
+        rollup.jumlah_terjual = F('jumlah_terjual') + baris['jumlah_terjual']
+        rollup.total_penjualan = F('total_penjualan') + baris['total_penjualan']
+        diperbarui.append(rollup)
+
+    if diperbarui:
+        DailySalesRollup.objects.bulk_update(diperbarui, ['jumlah_transaksi', 'jumlah_terjual', 'total_penjualan'])
+
+    if tambahan:
+        DailySalesRollup.objects.bulk_create([
+            DailySalesRollup(
+                tanggal=tanggal,
+                kasir_id=kasir_id,
+                produk_id=produk_id,
+                kategori_id=baris['kategori_id'],
+                jumlah_transaksi=1,
+                jumlah_terjual=baris['jumlah_terjual'],
+                total_penjualan=baris['total_penjualan'],
+            )
+            for produk_id, baris in tambahan.items()
+        ])
+
+
+@transaction.atomic
+def bangun_ulang_rollup(start=None, end=None):
+    """
+    Menghitung ulang DailySalesRollup dari Transaksi dan TransaksiItem untuk rentang tanggal
+    (inklusif, tanggal lokal). Tanpa rentang, seluruh rollup dibangun ulang.
+    Mengembalikan jumlah baris rollup yang dibuat.
+    """
+    rollup = DailySalesRollup.objects.all()
+    transaksi = Transaksi.objects.all()
+    items = TransaksiItem.objects.all()
+    if start:
+        rollup = rollup.filter(tanggal__gte=start)
+        transaksi = transaksi.filter(tanggal__date__gte=start)
+        items = items.filter(transaksi__tanggal__date__gte=start)
+    if end:
+        rollup = rollup.filter(tanggal__lte=end)
+        transaksi = transaksi.filter(tanggal__date__lte=end)
+        items = items.filter(transaksi__tanggal__date__lte=end)
+
+    rollup.delete()
+
+    ringkasan_kasir = _hitung_ringkasan_kasir(transaksi, items)
+    ringkasan_produk = (
+        items
+        .annotate(hari=TruncDate('transaksi__tanggal'))
+        .values('hari', 'transaksi__user', 'produk', 'produk__kategori')
+        .annotate(
+            jumlah_transaksi=Count('transaksi', distinct=True),
+            jumlah_terjual=Sum('jumlah'),
+            total=Sum(F('harga') * F('jumlah')),
+        )
+        .order_by()
+    )
+
+    def baris_rollup():
+        for (hari, kasir_id), nilai in ringkasan_kasir.items():
+            yield DailySalesRollup(tanggal=hari, kasir_id=kasir_id, **nilai)
+        for baris in ringkasan_produk.iterator(chunk_size=BATCH_SIZE):
+            yield DailySalesRollup(
+                tanggal=baris['hari'],
+                kasir_id=baris['transaksi__user'],
+                produk_id=baris['produk'],
+                kategori_id=baris['produk__kategori'],
+                jumlah_transaksi=baris['jumlah_transaksi'],
+                jumlah_terjual=baris['jumlah_terjual'],
+                total_penjualan=baris['total'] or 0,
+            )
+
+    dibuat = 0
+    batch = []
+    for obj in baris_rollup():
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            DailySalesRollup.objects.bulk_create(batch)
+            dibuat += len(batch)
+            batch = []
+    if batch:
+        DailySalesRollup.objects.bulk_create(batch)
+        dibuat += len(batch)
+    return dibuat
+
+
+
+# Nilai counter ringkasan kasir untuk hari tanpa transaksi
+NOL_RINGKASAN = {'jumlah_transaksi': 0, 'jumlah_terjual': 0, 'total_penjualan': 0}
+
+
+def _hitung_ringkasan_kasir(transaksi, items):
+    """Nilai baris ringkasan kasir (produk kosong) per (tanggal lokal, kasir) dihitung dari data transaksi."""
+    ringkasan = {
+        (baris['hari'], baris['user']): {
+            'jumlah_transaksi': baris['jumlah_transaksi'],
+            'jumlah_terjual': 0,
+            'total_penjualan': baris['total'] or 0,
+        }
+        for baris in (
+            transaksi
+            .annotate(hari=TruncDate('tanggal'))
+            .values('hari', 'user')
+            .annotate(jumlah_transaksi=Count('id'), total=Sum('total_harga'))
+            .order_by()
+        )
+    }
+    for baris in (
+        items
+        .annotate(hari=TruncDate('transaksi__tanggal'))
+        .values('hari', 'transaksi__user')
+        .annotate(jumlah=Sum('jumlah'))
+        .order_by()
+    ):
+        nilai = ringkasan.get((baris['hari'], baris['transaksi__user']))
+        if nilai is not None:
+            nilai['jumlah_terjual'] = baris['jumlah']
+    return ringkasan
+
+
+def ringkasan_kasir(kasir, tanggal_list):
+    """
+    Counter harian kasir (jumlah transaksi, jumlah terjual, total penjualan) per tanggal dengan satu query.
+    Dibaca dari baris ringkasan DailySalesRollup yang diperbarui checkout secara atomik.
+    """
+    ringkasan = {tanggal: dict(NOL_RINGKASAN) for tanggal in tanggal_list}
+    for baris in DailySalesRollup.objects.filter(kasir=kasir, produk__isnull=True, tanggal__in=tanggal_list).values(
+        'tanggal', *NOL_RINGKASAN
+    ):
+        ringkasan[baris.pop('tanggal')] = baris
+    return ringkasan
+
+
+@transaction.atomic
+def rekonsiliasi_ringkasan_kasir(start, end, perbaiki=True):
+    """
+    Membandingkan baris ringkasan kasir di DailySalesRollup dengan hasil hitung ulang dari Transaksi
+    untuk rentang tanggal lokal (inklusif). Baris yang selisih diperbaiki bila `perbaiki` True.
+    Mengembalikan daftar selisih berisi tanggal, kasir_id, nilai tercatat, dan nilai seharusnya.
+    """
+    transaksi = Transaksi.objects.filter(tanggal__date__gte=start, tanggal__date__lte=end)
+    items = TransaksiItem.objects.filter(transaksi__tanggal__date__gte=start, transaksi__tanggal__date__lte=end)
+    seharusnya = _hitung_ringkasan_kasir(transaksi, items)
+    tercatat = {
+        (rollup.tanggal, rollup.kasir_id): rollup
+        for rollup in DailySalesRollup.objects.select_for_update().filter(
+            produk__isnull=True, tanggal__gte=start, tanggal__lte=end
+        )
+    }
+
+    selisih = []
+    for kunci in sorted(seharusnya.keys() | tercatat.keys()):
+        rollup = tercatat.get(kunci)
+        lama = {field: getattr(rollup, field) for field in NOL_RINGKASAN} if rollup else NOL_RINGKASAN
+        baru = seharusnya.get(kunci, NOL_RINGKASAN)
+        if lama != baru:
+            selisih.append({'tanggal': kunci[0], 'kasir_id': kunci[1], 'tercatat': lama, 'seharusnya': baru})
+
+    if perbaiki and selisih:
+        diperbarui, dibuat, dihapus = [], [], []
+        for baris in selisih:
+            rollup = tercatat.get((baris['tanggal'], baris['kasir_id']))
+            if (baris['tanggal'], baris['kasir_id']) not in seharusnya:
+                dihapus.append(rollup.id)
+            elif rollup is None:
+                dibuat.append(DailySalesRollup(tanggal=baris['tanggal'], kasir_id=baris['kasir_id'], **baris['seharusnya']))
+            else:
+                for field, nilai in baris['seharusnya'].items():
+                    setattr(rollup, field, nilai)
+                diperbarui.append(rollup)
+        DailySalesRollup.objects.filter(id__in=dihapus).delete()
+        DailySalesRollup.objects.bulk_create(dibuat)
+        DailySalesRollup.objects.bulk_update(diperbarui, list(NOL_RINGKASAN))
+    return selisih
+
+# Fungsi Trunc per periode laporan
+PERIODE_TRUNC = {
+    'daily': TruncDay,
+    'weekly': TruncWeek,
+    'monthly': TruncMonth,
+    'yearly': TruncYear,
+}
+
+
+def awal_periode(tanggal, period):
+    """Tanggal awal bucket yang memuat `tanggal` (minggu dimulai hari Senin)."""
+    if period == 'daily':
+        return tanggal
+    if period == 'weekly':
+        return tanggal - timedelta(days=tanggal.weekday())
+    if period == 'monthly':
+        return tanggal.replace(day=1)
+    if period == 'yearly':
+        return tanggal.replace(month=1, day=1)
+    raise ValueError(f"Periode tidak valid: {period}")
+
+
+def periode_berikutnya(tanggal, period):
+    if period == 'daily':
+        return tanggal + timedelta(days=1)
+    if period == 'weekly':
+        return tanggal + timedelta(days=7)
+    if period == 'monthly':
+        return date(tanggal.year + tanggal.month // 12, tanggal.month % 12 + 1, 1)
+    if period == 'yearly':
+        return date(tanggal.year + 1, 1, 1)
+    raise ValueError(f"Periode tidak valid: {period}")
+
+
+def label_periode(tanggal, period):
+    """Field label yang dipakai DailySalesChartSerializer untuk setiap periode."""
+    if period == 'daily':
+        return {'tanggal': tanggal}
+    if period == 'weekly':
+        tahun, minggu, _ = tanggal.isocalendar()
+        return {'tanggal': tanggal, 'tahun': tahun, 'minggu': minggu}
+    if period == 'monthly':
+        return {'bulan': tanggal.strftime('%Y-%m')}
+    return {'tahun': tanggal.year}
+
+
+def bucket_per_periode(queryset, field, period, start, end, aggregates, tzinfo=None):
+    """
+    Mengelompokkan `queryset` per periode pada `field` memakai fungsi Trunc bawaan Django,
+    sehingga berjalan di SQLite maupun PostgreSQL tanpa SQL khusus database.
+
+    `start` dan `end` adalah tanggal lokal (inklusif). Untuk DateTimeField, batas hari dan
+    pemotongan periode dihitung di zona waktu `tzinfo` (default: zona waktu aktif). Bucket
+    yang tidak memiliki data tetap dikembalikan dengan nilai 0, berurutan dari yang terlama.
+    """
+    trunc = PERIODE_TRUNC.get(period)
+    if trunc is None:
+        raise ValueError(f"Periode tidak valid: {period}")
+
+    is_datetime = isinstance(queryset.model._meta.get_field(field), models.DateTimeField)
+    if is_datetime:
+        tzinfo = tzinfo or timezone.get_current_timezone()
+        batas_awal = datetime.combine(start, time.min, tzinfo=tzinfo)
+        batas_akhir = datetime.combine(end + timedelta(days=1), time.min, tzinfo=tzinfo)
+        queryset = queryset.filter(**{f'{field}__gte': batas_awal, f'{field}__lt': batas_akhir})
+        periode = trunc(field, tzinfo=tzinfo)
+    else:
+        queryset = queryset.filter(**{f'{field}__gte': start, f'{field}__lte': end})
+        periode = trunc(field, output_field=models.DateField())
+
+    hasil = {}
+    for baris in queryset.annotate(periode=periode).values('periode').annotate(**aggregates).order_by('periode'):
+        kunci = baris.pop('periode')
+        if isinstance(kunci, datetime):
+            kunci = timezone.localtime(kunci, tzinfo).date() if timezone.is_aware(kunci) else kunci.date()
+        hasil[kunci] = baris
+
+    kosong = {nama: 0 for nama in aggregates}
+    data = []
+    tanggal = awal_periode(start, period)
+    while tanggal <= end:
+        data.append({**label_periode(tanggal, period), **hasil.get(tanggal, kosong)})
+        tanggal = periode_berikutnya(tanggal, period)
+    return data
+
+
+def penjualan_per_periode(period, start, end):
+    """Total penjualan dan jumlah transaksi per periode dari baris ringkasan kasir DailySalesRollup."""
+    return bucket_per_periode(
+        DailySalesRollup.objects.filter(produk__isnull=True),
+        'tanggal',
+        period,
+        start,
+        end,
+        {
+            'total_penjualan': Sum('total_penjualan'),
+            'total_transaksi': Sum('jumlah_transaksi'),
+        },
+    )
@@ -1,3 +1,372 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+from zoneinfo import ZoneInfo
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from admin_app.models import CustomUser
+from produk_app.models import Kategori, Produk
+from transaksi_app.models import CartItem, Transaksi, TransaksiItem
+from .exports import stream_export_async
+from .models import DailySalesRollup, ReportJob
+from .services import bucket_per_periode, penjualan_per_periode
+
+
+class DailySalesRollupTests(TestCase):
+    def setUp(self):
+        self.kategori = Kategori.objects.create(nama='Makanan')
+        self.petugas = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas', is_staff=True
+        )
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com', password='rahasia123', full_name='Admin', role='admin', is_admin_aplikasi=True
+        )
+        self.produk = [
+            Produk.objects.create(
+                kode=f'P{i}', nama=f'Produk {i}', harga_khusus=Decimal('900'), harga_umum=Decimal('1000'),
+                stok=100, kategori=self.kategori,
+            )
+            for i in range(3)
+        ]
+        self.client = APIClient()
+
+    def checkout(self, jumlah_per_produk):
+        self.client.force_authenticate(user=self.petugas)
+        for produk, jumlah in zip(self.produk, jumlah_per_produk):
+            CartItem.objects.create(petugas=self.petugas, produk=produk, jumlah=jumlah, tipe_harga='harga_umum')
+        response = self.client.post(reverse('checkout'), {'pelanggan': 'Budi'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def snapshot(self):
+        return sorted(
+            DailySalesRollup.objects.values_list(
+                'tanggal', 'kasir_id', 'produk_id', 'kategori_id', 'jumlah_transaksi', 'jumlah_terjual', 'total_penjualan'
+            ),
+            key=lambda row: (row[2] or 0),
+        )
+
+    def test_checkout_memperbarui_rollup(self):
+        self.checkout([1, 2, 3])
+        self.checkout([4])
+
+        ringkasan = DailySalesRollup.objects.get(produk__isnull=True)
+        self.assertEqual(ringkasan.jumlah_transaksi, 2)
+        self.assertEqual(ringkasan.jumlah_terjual, 10)
+        self.assertEqual(ringkasan.total_penjualan, Decimal('10000'))
+        self.assertEqual(ringkasan.total_penjualan, sum(t.total_harga for t in Transaksi.objects.all()))
+
+        per_produk = DailySalesRollup.objects.get(produk=self.produk[0])
+        self.assertEqual((per_produk.jumlah_transaksi, per_produk.jumlah_terjual), (2, 5))
+        self.assertEqual(per_produk.kategori, self.kategori)
+
+    def test_transaksi_lewat_api_memperbarui_rollup(self):
+        self.client.force_authenticate(user=self.petugas)
+        response = self.client.post(reverse('transaksi-list-create'), {'items': [
+            {'kode_produk': 'P0', 'jumlah': 2, 'tipe_harga': 'harga_umum'},
+            {'kode_produk': 'P1', 'jumlah': 1, 'tipe_harga': 'harga_khusus'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        ringkasan = DailySalesRollup.objects.get(produk__isnull=True)
+        self.assertEqual(
+            (ringkasan.kasir, ringkasan.jumlah_transaksi, ringkasan.jumlah_terjual, ringkasan.total_penjualan),
+            (self.petugas, 1, 3, Decimal('2900')),
+        )
+        self.assertEqual(DailySalesRollup.objects.get(produk=self.produk[1]).total_penjualan, Decimal('900'))
+
+    def test_rebuild_sama_dengan_rollup_inkremental(self):
+        self.checkout([1, 2, 3])
+        self.checkout([4])
+        inkremental = self.snapshot()
+
+        DailySalesRollup.objects.update(jumlah_terjual=0)
+        call_command('rebuild_sales_rollup', stdout=StringIO())
+        self.assertEqual(self.snapshot(), inkremental)
+
+    def test_rekonsiliasi_counter_kasir(self):
+        self.checkout([1, 2, 3])
+        self.checkout([4])
+        ringkasan = DailySalesRollup.objects.get(produk__isnull=True)
+        DailySalesRollup.objects.filter(id=ringkasan.id).update(jumlah_transaksi=7, total_penjualan=Decimal('1'))
+        # Baris yatim untuk hari tanpa transaksi juga harus dihapus
+        DailySalesRollup.objects.create(
+            tanggal=timezone.localdate() - timedelta(days=1), kasir=self.petugas, jumlah_transaksi=1, total_penjualan=Decimal('500')
+        )
+
+        out = StringIO()
+        call_command('reconcile_kasir_counters', '--dry-run', stdout=out)
+        self.assertIn('2 counter kasir selisih', out.getvalue())
+        self.assertEqual(DailySalesRollup.objects.get(id=ringkasan.id).jumlah_transaksi, 7)
+
+        call_command('reconcile_kasir_counters', stdout=StringIO())
+        ringkasan.refresh_from_db()
+        self.assertEqual(
+            (ringkasan.jumlah_transaksi, ringkasan.jumlah_terjual, ringkasan.total_penjualan), (2, 10, Decimal('10000'))
+        )
+        self.assertEqual(DailySalesRollup.objects.filter(produk__isnull=True).count(), 1)
+
+        out = StringIO()
+        call_command('reconcile_kasir_counters', stdout=out)
+        self.assertIn('sesuai', out.getvalue())
+
+    def test_laporan_membaca_rollup(self):
+        self.checkout([1, 1, 1])
+        DailySalesRollup.objects.create(
+            tanggal=timezone.localdate() - timedelta(days=1), kasir=self.petugas,
+            jumlah_transaksi=5, jumlah_terjual=9, total_penjualan=Decimal('7000'),
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(reverse('revenue-summary'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['total_harga'] for row in response.data], ['7000.00', '3000.00'])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('daily-sales'), {'period': 'daily', 'days': 2})
+        self.assertEqual([row['total_transaksi'] for row in response.data], [0, 5, 1])
+
+
+class PeriodeBucketingTests(TestCase):
+    def setUp(self):
+        self.kasir = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas'
+        )
+
+    def rollup(self, tanggal, total):
+        DailySalesRollup.objects.create(
+            tanggal=tanggal, kasir=self.kasir, jumlah_transaksi=1, total_penjualan=Decimal(total)
+        )
+
+    def test_bucket_kosong_diisi_nol(self):
+        self.rollup(date(2024, 1, 30), 100)
+        self.rollup(date(2024, 3, 2), 50)
+        data = penjualan_per_periode('monthly', date(2024, 1, 15), date(2024, 3, 31))
+        self.assertEqual([row['bulan'] for row in data], ['2024-01', '2024-02', '2024-03'])
+        self.assertEqual([row['total_penjualan'] for row in data], [Decimal(100), 0, Decimal(50)])
+
+    def test_minggu_dimulai_senin(self):
+        self.rollup(date(2024, 12, 29), 10)  # Minggu, masuk minggu ISO 52 tahun 2024
+        self.rollup(date(2024, 12, 30), 20)  # Senin, minggu ISO 1 tahun 2025
+        data = penjualan_per_periode('weekly', date(2024, 12, 23), date(2025, 1, 5))
+        self.assertEqual([(row['tahun'], row['minggu']) for row in data], [(2024, 52), (2025, 1)])
+        self.assertEqual([row['total_transaksi'] for row in data], [1, 1])
+
+    def test_batas_hari_mengikuti_zona_waktu_jakarta(self):
+        jakarta = ZoneInfo('Asia/Jakarta')
+        # 23:30 UTC tanggal 1 adalah 06:30 WIB tanggal 2
+        transaksi = Transaksi.objects.create(user=self.kasir, total_harga=Decimal(10), metode_pembayaran='tunai')
+        Transaksi.objects.filter(id=transaksi.id).update(tanggal=datetime(2024, 5, 1, 23, 30, tzinfo=dt_timezone.utc))
+        data = bucket_per_periode(
+            Transaksi.objects.all(), 'tanggal', 'daily', date(2024, 5, 1), date(2024, 5, 2),
+            {'total_transaksi': Count('id')}, tzinfo=jakarta,
+        )
+        self.assertEqual([row['total_transaksi'] for row in data], [0, 1])
+
+    def test_periode_tidak_valid(self):
+        with self.assertRaises(ValueError):
+            penjualan_per_periode('hourly', date(2024, 1, 1), date(2024, 1, 2))
+
+
+class TransaksiExportTests(TestCase):
+    def setUp(self):
+        kategori = Kategori.objects.create(nama='Makanan')
+        self.produk = Produk.objects.create(
+            kode='P1', nama='Produk, "Satu"', harga_khusus=Decimal('900'), harga_umum=Decimal('1000'), stok=0, kategori=kategori
+        )
+        self.kasir = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas'
+        )
+        admin = CustomUser.objects.create_user(
+            email='admin@example.com', password='rahasia123', full_name='Admin', role='admin', is_admin_aplikasi=True
+        )
+        for _ in range(2):
+            transaksi = Transaksi.objects.create(user=self.kasir, total_harga=Decimal('3000'), metode_pembayaran='tunai')
+            TransaksiItem.objects.create(transaksi=transaksi, produk=self.produk, jumlah=3)
+        self.client = APIClient()
+        self.client.force_authenticate(user=admin)
+
+    def test_export_csv(self):
+        response = self.client.get(reverse('export-transaksi'), {'tipe': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['nama_produk'], 'Produk, "Satu"')
+        self.assertEqual(rows[0]['kasir'], 'kasir@example.com')
+        self.assertEqual(Decimal(rows[0]['subtotal']), Decimal('3000'))
+
+    def test_export_ndjson_dengan_rentang_tanggal(self):
+        besok = (timezone.localdate() + timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('export-transaksi'), {'tipe': 'ndjson', 'start': besok})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+        response = self.client.get(reverse('export-transaksi'), {'tipe': 'ndjson', 'end': besok})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['jumlah'] for row in rows], [3, 3])
+
+    async def test_export_di_asgi_memakai_iterator_async(self):
+        admin = await CustomUser.objects.aget(email='admin@example.com')
+        response = await self.async_client.get(
+            reverse('export-transaksi'), {'tipe': 'csv'}, headers={'Authorization': f'Bearer {AccessToken.for_user(admin)}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        # Iterator sync akan dibaca habis oleh handler ASGI sebelum dikirim
+        self.assertTrue(response.is_async)
+        konten = ''.join([bagian.decode() async for bagian in response.streaming_content])
+        self.assertEqual(len(list(csv.DictReader(StringIO(konten)))), 2)
+
+        potongan = [bagian async for bagian in stream_export_async('ndjson', batch=1)]
+        self.assertEqual([json.loads(bagian)['jumlah'] for bagian in potongan], [3, 3])
+
+    def test_export_di_wsgi_memakai_iterator_sync(self):
+        response = self.client.get(reverse('export-transaksi'), {'tipe': 'csv'})
+        self.assertFalse(response.is_async)
+
+    def test_tipe_tidak_valid(self):
+        response = self.client.get(reverse('export-transaksi'), {'tipe': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(LAPORAN_REPORT_JOBS={'WORKERS': 0, 'FRESHNESS': 600})
+class ReportJobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.kasir = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas'
+        )
+        admin = CustomUser.objects.create_user(
+            email='admin@example.com', password='rahasia123', full_name='Admin', role='admin', is_admin_aplikasi=True
+        )
+        self.hari_ini = timezone.localdate()
+        DailySalesRollup.objects.create(
+            tanggal=self.hari_ini, kasir=self.kasir, jumlah_transaksi=2, total_penjualan=Decimal('5000')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=admin)
+        self.payload = {'period': 'daily', 'start': (self.hari_ini - timedelta(days=6)).isoformat(), 'end': self.hari_ini.isoformat()}
+
+    def test_render_pdf_dan_png(self):
+        for jenis, magic in (('pdf', b'%PDF'), ('png', b'\x89PNG')):
+            response = self.client.post(reverse('report-job-create'), {**self.payload, 'jenis': jenis}, format='json')
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.data['status'], 'DONE')
+            self.assertFalse(response.data['cached'])
+
+            download = self.client.get(response.data['download_url'])
+            self.assertEqual(download.status_code, 200)
+            self.assertTrue(b''.join(download.streaming_content).startswith(magic))
+
+    def test_permintaan_sama_dilayani_dari_cache(self):
+        pertama = self.client.post(reverse('report-job-create'), {**self.payload, 'jenis': 'png'}, format='json')
+        kedua = self.client.post(reverse('report-job-create'), {**self.payload, 'jenis': 'png'}, format='json')
+        self.assertEqual(kedua.status_code, 200)
+        self.assertTrue(kedua.data['cached'])
+        self.assertEqual(kedua.data['id'], pertama.data['id'])
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+    def test_cache_tidak_dipakai_setelah_data_berubah(self):
+        pertama = self.client.post(reverse('report-job-create'), {**self.payload, 'jenis': 'png'}, format='json')
+        DailySalesRollup.objects.filter(produk__isnull=True).update(jumlah_transaksi=3, total_penjualan=Decimal('7000'))
+
+        kedua = self.client.post(reverse('report-job-create'), {**self.payload, 'jenis': 'png'}, format='json')
+        self.assertEqual(kedua.status_code, 202)
+        self.assertNotEqual(kedua.data['id'], pertama.data['id'])
+
+    def test_cache_kedaluwarsa(self):
+        pertama = self.client.post(reverse('report-job-create'), {**self.payload, 'jenis': 'png'}, format='json')
+        ReportJob.objects.filter(id=pertama.data['id']).update(finished_at=timezone.now() - timedelta(hours=1))
+
+        kedua = self.client.post(reverse('report-job-create'), {**self.payload, 'jenis': 'png'}, format='json')
+        self.assertEqual(kedua.status_code, 202)
+
+    def test_download_job_belum_selesai(self):
+        job = ReportJob.objects.create(jenis='pdf', parameter={}, cache_key='x', status='RUNNING')
+        response = self.client.get(reverse('report-job-download', args=[job.id]))
+        self.assertEqual(response.status_code, 409)
+
+
+class ReportJobTimeoutTests(TestCase):
+    """Pool render aktif (WORKERS > 0), tetapi render tidak pernah selesai seperti saat worker web mati."""
+
+    def setUp(self):
+        admin = CustomUser.objects.create_user(
+            email='admin@example.com', password='rahasia123', full_name='Admin', role='admin', is_admin_aplikasi=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=admin)
+        hari_ini = timezone.localdate()
+        self.payload = {'jenis': 'png', 'period': 'daily', 'start': (hari_ini - timedelta(days=6)).isoformat(), 'end': hari_ini.isoformat()}
+
+        executor = mock.patch('laporan_app.reports.get_executor')
+        executor.start().return_value.submit.return_value = Future()
+        self.addCleanup(executor.stop)
+
+    @override_settings(LAPORAN_REPORT_JOBS={'WORKERS': 2, 'FRESHNESS': 600, 'TIMEOUT': 300})
+    def test_job_yang_masih_diproses_bukan_hasil_cache(self):
+        pertama = self.client.post(reverse('report-job-create'), self.payload, format='json')
+        for status in ('RUNNING', 'PENDING'):
+            ReportJob.objects.filter(id=pertama.data['id']).update(status=status)
+            response = self.client.post(reverse('report-job-create'), self.payload, format='json')
+            self.assertEqual(response.status_code, 202, status)
+            self.assertEqual((response.data['id'], response.data['status'], response.data['cached']), (pertama.data['id'], status, False))
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+    @override_settings(LAPORAN_REPORT_JOBS={'WORKERS': 2, 'FRESHNESS': 600, 'TIMEOUT': 300})
+    def test_job_running_macet_tidak_dipakai_ulang(self):
+        pertama = self.client.post(reverse('report-job-create'), self.payload, format='json')
+        self.assertEqual((pertama.status_code, pertama.data['status']), (202, 'RUNNING'))
+
+        # Masih dalam TIMEOUT: permintaan yang sama menunggu job yang sama
+        kedua = self.client.post(reverse('report-job-create'), self.payload, format='json')
+        self.assertEqual((kedua.status_code, kedua.data['id']), (202, pertama.data['id']))
+
+        ReportJob.objects.filter(id=pertama.data['id']).update(created_at=timezone.now() - timedelta(minutes=10))
+        ketiga = self.client.post(reverse('report-job-create'), self.payload, format='json')
+        self.assertEqual(ketiga.status_code, 202)
+        self.assertNotEqual(ketiga.data['id'], pertama.data['id'])
+        self.assertEqual(ReportJob.objects.get(id=pertama.data['id']).status, 'FAILED')
+
+    @override_settings(LAPORAN_REPORT_JOBS={'WORKERS': 2, 'FRESHNESS': 600, 'TIMEOUT': 300})
+    def test_poll_job_macet_menjadi_failed(self):
+        job = self.client.post(reverse('report-job-create'), self.payload, format='json').data
+        self.assertEqual(self.client.get(reverse('report-job-detail', args=[job['id']])).data['status'], 'RUNNING')
+
+        ReportJob.objects.filter(id=job['id']).update(created_at=timezone.now() - timedelta(minutes=10))
+        self.assertEqual(self.client.get(reverse('report-job-detail', args=[job['id']])).data['status'], 'FAILED')
+
+
+class StartupImportTests(TestCase):
+    def test_urlconf_tidak_memuat_matplotlib_dan_reportlab(self):
+        # Interpreter baru, karena test lain di proses ini mungkin sudah meng-import keduanya
+        script = (
+            "import sys, django; django.setup(); import fix.urls; "
+            "print(sorted(m for m in ('matplotlib', 'reportlab') if m in sys.modules))"
+        )
+        proses = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'fix.settings'},
+        )
+        self.assertEqual(proses.returncode, 0, proses.stderr)
+        self.assertEqual(proses.stdout.strip(), '[]')
@@ -1,7 +1,18 @@
 from django.urls import path
-from .views import RevenueSummaryView, DailySalesChartView
+from .views import (
+    RevenueSummaryView,
+    DailySalesChartView,
+    TransaksiExportView,
+    ReportJobCreateView,
+    ReportJobDetailView,
+    ReportJobDownloadView,
+)
 urlpatterns = [
     path('revenue-summary/', RevenueSummaryView.as_view(), name='revenue-summary'),
     path('daily-sales/', DailySalesChartView.as_view(), name='daily-sales'),
+    path('export/transaksi/', TransaksiExportView.as_view(), name='export-transaksi'),
+    path('reports/', ReportJobCreateView.as_view(), name='report-job-create'),
+    path('reports/<int:pk>/', ReportJobDetailView.as_view(), name='report-job-detail'),
+    path('reports/<int:pk>/download/', ReportJobDownloadView.as_view(), name='report-job-download'),
     
 ]
@@ -1,18 +1,18 @@
-from django.db.models import Sum, Count
+from django.db.models import Sum
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from datetime import timedelta
+from datetime import date, timedelta
 from django.utils import timezone
-from transaksi_app.models import Transaksi, TransaksiItem
+from .models import DailySalesRollup, ReportJob
+from .reports import minta_laporan, tandai_kedaluwarsa
+from .services import PERIODE_TRUNC, penjualan_per_periode
+from .exports import FORMAT_EXPORT, stream_export, stream_export_async
 
-from .serializers import RevenueSummarySerializer, DailySalesChartSerializer
+from .serializers import RevenueSummarySerializer, DailySalesChartSerializer, ReportJobSerializer, ReportJobRequestSerializer
 from admin_app.permissions import IsAdminAplikasi  # Import custom permission
-import matplotlib.pyplot as plt
-import io
-
-from reportlab.pdfgen import canvas
-from django.http import HttpResponse
-from reportlab.lib.pagesizes import letter
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 
 
 class RevenueSummaryView(APIView):
@@ -22,11 +22,11 @@ class RevenueSummaryView(APIView):
         start_date = timezone.now() - timedelta(days=7)
         try:
             revenue_summary = (
-                Transaksi.objects
-                .filter(tanggal__gte=start_date)
-                .values('tanggal__date')
-                .annotate(total_harga=Sum('total_harga'))
-                .order_by('tanggal__date')
+                DailySalesRollup.objects
+                .filter(produk__isnull=True, tanggal__gte=timezone.localdate(start_date))
+                .values('tanggal')
+                .annotate(total_harga=Sum('total_penjualan'))
+                .order_by('tanggal')
             )
             print(revenue_summary)  # Debugging: Lihat output di terminal
 
@@ -40,70 +40,86 @@ class DailySalesChartView(APIView):
 
     def get(self, request):
         period = request.query_params.get('period', 'daily')  # 'daily', 'weekly', 'monthly', 'yearly'
-        days = int(request.query_params.get('days', 30))  # Default 30 hari
-        start_date = timezone.now() - timedelta(days=days)
-
-        if period == 'daily':
-            daily_sales = self.get_daily_sales(start_date)
-        elif period == 'weekly':
-            daily_sales = self.get_weekly_sales(start_date)
-        elif period == 'monthly':
-            daily_sales = self.get_monthly_sales(start_date)
-        elif period == 'yearly':
-            daily_sales = self.get_yearly_sales(start_date)
-        else:
+        if period not in PERIODE_TRUNC:
             return Response({"error": "Invalid period"}, status=400)
 
+        # Rentang tanggal lokal: ?start=YYYY-MM-DD&end=YYYY-MM-DD, atau ?days=N (default 30 hari)
+        try:
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else timezone.localdate()
+            if 'start' in request.query_params:
+                start = date.fromisoformat(request.query_params['start'])
+            else:
+                start = end - timedelta(days=int(request.query_params.get('days', 30)))
+        except ValueError:
+            return Response({"error": "Format start/end (YYYY-MM-DD) atau days tidak valid"}, status=400)
+        if start > end:
+            return Response({"error": "start tidak boleh setelah end"}, status=400)
+
+        daily_sales = penjualan_per_periode(period, start, end)
         serializer = DailySalesChartSerializer(daily_sales, many=True)
         return Response(serializer.data)
 
-    def get_daily_sales(self, start_date):
-        return (
-            Transaksi.objects
-            .filter(tanggal__gte=start_date)
-            .extra(select={'tanggal': "DATE(tanggal)"})
-            .values('tanggal')
-            .annotate(
-                total_penjualan=Sum('total_harga'),
-                total_transaksi=Count('id')
-            )
-            .order_by('tanggal')
-        )
-
-    def get_weekly_sales(self, start_date):
-        return (
-            Transaksi.objects
-            .filter(tanggal__gte=start_date)
-            .extra(select={'week': "WEEK(tanggal, 1)"}).values('week')
-            .annotate(
-                total_penjualan=Sum('total_harga'),
-                total_transaksi=Count('id')
-            )
-            .order_by('week')
-        )
-
-    def get_monthly_sales(self, start_date):
-        return (
-            Transaksi.objects
-            .filter(tanggal__gte=start_date)
-            .extra(select={'bulan': "DATE_FORMAT(tanggal, '%Y-%m')"}).values('bulan')
-            .annotate(
-                total_penjualan=Sum('total_harga'),
-                total_transaksi=Count('id')
-            )
-            .order_by('bulan')
-        )
-
-    def get_yearly_sales(self, start_date):
-        return (
-            Transaksi.objects
-            .filter(tanggal__gte=start_date)
-            .extra(select={'tahun': "YEAR(tanggal)"}).values('tahun')
-            .annotate(
-                total_penjualan=Sum('total_harga'),
-                total_transaksi=Count('id')
-            )
-            .order_by('tahun')
-        )
 
+class TransaksiExportView(APIView):
+    permission_classes = [IsAdminAplikasi]  # Hanya admin yang bisa akses
+
+    def get(self, request):
+        """
+        Export transaksi per item secara streaming.
+        Query: ?start=YYYY-MM-DD&end=YYYY-MM-DD&tipe=csv|ndjson (default csv).
+        """
+        fmt = request.query_params.get('tipe', 'csv')
+        if fmt not in FORMAT_EXPORT:
+            return Response({"error": "Tipe export harus csv atau ndjson"}, status=400)
+        try:
+            start = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else None
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else None
+        except ValueError:
+            return Response({"error": "Format start/end (YYYY-MM-DD) tidak valid"}, status=400)
+
+        content_type, ekstensi = FORMAT_EXPORT[fmt]
+        # Masing-masing handler hanya men-stream iterator jenisnya sendiri; yang lain dibaca habis ke memori
+        export = stream_export_async if isinstance(request._request, ASGIRequest) else stream_export
+        response = StreamingHttpResponse(export(fmt, start=start, end=end), content_type=content_type)
+        nama_file = f"transaksi_{start or 'awal'}_{end or 'akhir'}.{ekstensi}"
+        response['Content-Disposition'] = f'attachment; filename="{nama_file}"'
+        return response
+
+
+class ReportJobCreateView(APIView):
+    permission_classes = [IsAdminAplikasi]  # Hanya admin yang bisa akses
+
+    def post(self, request):
+        """
+        Meminta render laporan penjualan (PDF/PNG) di background.
+        Laporan yang sama dalam jendela kesegaran langsung dikembalikan dari cache (200). Selain itu
+        jawabannya 202 dengan job baru, atau job yang sama yang masih diproses, dan klien mem-poll
+        detail job sampai status DONE.
+        """
+        serializer = ReportJobRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job, dari_cache = minta_laporan(request.user, **serializer.validated_data)
+        data = ReportJobSerializer(job).data
+        data['cached'] = dari_cache
+        return Response(data, status=200 if dari_cache else 202)
+
+
+class ReportJobDetailView(APIView):
+    permission_classes = [IsAdminAplikasi]
+
+    def get(self, request, pk):
+        # Klien yang mem-poll job yang workernya mati mendapat FAILED, bukan RUNNING selamanya
+        tandai_kedaluwarsa(ReportJob.objects.filter(pk=pk))
+        job = get_object_or_404(ReportJob, pk=pk)
+        return Response(ReportJobSerializer(job).data)
+
+
+class ReportJobDownloadView(APIView):
+    permission_classes = [IsAdminAplikasi]
 
+    def get(self, request, pk):
+        job = get_object_or_404(ReportJob, pk=pk)
+        if job.status != 'DONE':
+            return Response({"error": "Laporan belum selesai", "status": job.status}, status=409)
+        content_type = 'application/pdf' if job.jenis == 'pdf' else 'image/png'
+        return FileResponse(job.file.open('rb'), content_type=content_type, as_attachment=True, filename=job.file.name.rsplit('/', 1)[-1])
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from admin_app.models import CustomUser
+from fix.asgi import application
+from transaksi_app.models import Transaksi
+from petugas_app.notifikasi import get_dispatcher, hub
+
+PREFIX = 'benchmark-notifikasi'
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+
+class PenghitungQuery:
+    """Menghitung query di semua koneksi database, termasuk koneksi thread sync_to_async."""
+
+    def __init__(self):
+        self.jumlah = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.jumlah += 1
+        return execute(sql, params, many, context)
+
+    def pasang(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class KlienASGI:
+    """Satu request GET langsung ke fix.asgi.application, tanpa server dan socket."""
+
+    def __init__(self, path, query=None, headers=()):
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+            'query_string': urlencode(query or {}).encode(),
+            'headers': [(b'host', b'localhost'), *headers],
+            'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        self.status = None
+        self.chunks = []
+        self.terhubung = asyncio.Event()
+        self.putus = asyncio.Event()
+        self._body_terkirim = False
+
+    async def receive(self):
+        if not self._body_terkirim:
+            self._body_terkirim = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.putus.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message['type'] == 'http.response.body':
+            if message.get('body'):
+                self.chunks.append((time.perf_counter(), message['body']))
+                self.terhubung.set()
+            if not message.get('more_body'):
+                self.terhubung.set()
+
+    async def jalankan(self):
+        await application(self.scope, self.receive, self.send)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test stream notifikasi (SSE) dibanding polling NotificationViewSet.list: membuka banyak koneksi "
+        "idle lewat fix.asgi, mendorong notifikasi ke sebagian user, lalu membandingkan query database dengan "
+        "satu putaran polling semua klien. Data benchmark dibuat di database aktif dan dihapus setelah selesai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--klien', type=int, default=2000, help="Jumlah klien/user (default 2000).")
+        parser.add_argument('--durasi', type=float, default=30, help="Detik koneksi SSE dibiarkan idle (default 30).")
+        parser.add_argument('--interval-polling', type=float, default=5, help="Interval polling pembanding dalam detik (default 5).")
+        parser.add_argument('--push', type=int, default=100, help="Jumlah notifikasi yang didorong selama idle (default 100).")
+
+    def handle(self, *args, **options):
+        if CustomUser.objects.filter(email__startswith=PREFIX).exists():
+            raise CommandError(f"Data benchmark sebelumnya masih ada (email {PREFIX}*); hapus dulu.")
+
+        users = self.seed(options['klien'])
+        penghitung = PenghitungQuery()
+        connection_created.connect(penghitung.pasang)
+        for koneksi in connections.all(initialized_only=True):
+            penghitung.pasang(connection=koneksi)
+        try:
+            hasil = asyncio.run(self.ukur(users, penghitung, options))
+        finally:
+            connection_created.disconnect(penghitung.pasang)
+            Transaksi.objects.filter(user__email__startswith=PREFIX).delete()
+            CustomUser.objects.filter(email__startswith=PREFIX).delete()
+
+        n, durasi, interval = options['klien'], options['durasi'], options['interval_polling']
+        putaran = durasi / interval
+        self.stdout.write(f"{n} klien, idle {durasi:.0f} detik, pembanding polling setiap {interval:.0f} detik")
+        self.stdout.write(
+            f"SSE     : connect {hasil['connect_detik']:.1f} detik ({hasil['query_connect']} query), "
+            f"{hasil['query_idle']} query selama idle termasuk push, {hasil['push_diterima']}/{options['push']} push diterima "
+            f"(p50 {hasil['push_p50']:.1f} ms), RSS +{hasil['rss_mb']:.1f} MB"
+        )
+        self.stdout.write(
+            f"Polling : {hasil['query_polling']} query dan {hasil['polling_detik']:.1f} detik per putaran; "
+            f"~{hasil['query_polling'] * putaran:.0f} query untuk {durasi:.0f} detik"
+        )
+        total_sse = hasil['query_connect'] + hasil['query_idle']
+        self.stdout.write(f"Total query {durasi:.0f} detik: SSE {total_sse} vs polling ~{hasil['query_polling'] * putaran:.0f}")
+
+    def seed(self, jumlah):
+        CustomUser.objects.bulk_create([
+            CustomUser(email=f'{PREFIX}-{i}@example.com', full_name=f'Klien {i}', role='petugas', password='!')
+            for i in range(jumlah)
+        ])
+        return list(CustomUser.objects.filter(email__startswith=PREFIX))
+
+    async def ukur(self, users, penghitung, options):
+        path = reverse('notification-stream')
+        token = {user.id: str(AccessToken.for_user(user)) for user in users}
+        rss_awal = rss_mb()
+
+        # Buka semua stream dan tunggu sampai setiap klien menerima data awal
+        penghitung.jumlah = 0
+        mulai = time.perf_counter()
+        klien = {user.id: KlienASGI(path, {'token': token[user.id]}) for user in users}
+        tasks = [asyncio.create_task(k.jalankan()) for k in klien.values()]
+        await asyncio.gather(*(k.terhubung.wait() for k in klien.values()))
+        connect_detik = time.perf_counter() - mulai
+        query_connect = penghitung.jumlah
+        if hub.jumlah_pelanggan() != len(users):
+            raise CommandError(f"Hanya {hub.jumlah_pelanggan()} dari {len(users)} stream yang terhubung.")
+
+        # Idle, sambil mendorong notifikasi ke user acak lewat dispatcher (jalur yang sama dengan checkout)
+        penghitung.jumlah = 0
+        rng = random.Random(0)
+        target = [rng.choice(users) for _ in range(options['push'])]
+        dikirim = {}
+        jeda = options['durasi'] / (len(target) + 1)
+        for user in target:
+            await asyncio.sleep(jeda)
+            transaksi = await sync_to_async(Transaksi.objects.create)(user=user, total_harga=1000, metode_pembayaran='tunai')
+            dikirim[transaksi.id] = (user.id, time.perf_counter())
+            await sync_to_async(get_dispatcher().proses)([{'transaksi': transaksi, 'kasir': user, 'produk': []}])
+        await asyncio.sleep(jeda)
+        # Termasuk query membuat transaksi dan notifikasi serta hitung ulang unread di stream penerima
+        query_idle = penghitung.jumlah
+
+        latensi = []
+        for transaksi_id, (user_id, waktu) in dikirim.items():
+            for diterima, body in klien[user_id].chunks:
+                if f'ID {transaksi_id}.'.encode() in body:
+                    latensi.append((diterima - waktu) * 1000)
+                    break
+        latensi.sort()
+
+        rss_stream = rss_mb() - rss_awal
+        for k in klien.values():
+            k.putus.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Pembanding: satu putaran polling NotificationViewSet.list oleh semua klien
+        penghitung.jumlah = 0
+        mulai = time.perf_counter()
+        polling = [
+            KlienASGI(reverse('notification-list'), headers=[(b'authorization', f'Bearer {token[user.id]}'.encode())])
+            for user in users
+        ]
+        await asyncio.gather(*(k.jalankan() for k in polling))
+        gagal = sum(1 for k in polling if k.status != 200)
+        if gagal:
+            raise CommandError(f"{gagal} request polling gagal.")
+
+        return {
+            'connect_detik': connect_detik,
+            'query_connect': query_connect,
+            'query_idle': query_idle,
+            'push_diterima': len(latensi),
+            'push_p50': latensi[len(latensi) // 2] if latensi else 0,
+            'rss_mb': rss_stream,
+            'query_polling': penghitung.jumlah,
+            'polling_detik': time.perf_counter() - mulai,
+        }
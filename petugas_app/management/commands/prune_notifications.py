@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from petugas_app.notifikasi import hapus_notifikasi_lama
+
+
+class Command(BaseCommand):
+    help = (
+        "Retensi notifikasi: menghapus notifikasi yang sudah dibaca dan lebih tua dari --days hari, per batch. "
+        "Notifikasi yang belum dibaca tidak pernah dihapus."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help="Umur minimum notifikasi yang dihapus, dalam hari (default 90).")
+        parser.add_argument('--batch', type=int, default=1000, help="Jumlah baris per DELETE (default 1000).")
+        parser.add_argument('--dry-run', action='store_true', help="Hanya hitung notifikasi yang akan dihapus.")
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch'] < 1:
+            raise CommandError("--days dan --batch harus lebih besar dari nol.")
+
+        sebelum = timezone.now() - timedelta(days=options['days'])
+        jumlah = hapus_notifikasi_lama(sebelum, batch=options['batch'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{jumlah} notifikasi dibaca sebelum {sebelum:%Y-%m-%d %H:%M} akan dihapus (dry run)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{jumlah} notifikasi dibaca sebelum {sebelum:%Y-%m-%d %H:%M} dihapus."))
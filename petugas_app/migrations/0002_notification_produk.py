@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petugas_app', '0001_initial'),
+        ('produk_app', '0009_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='produk',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='produk_app.produk'),
+        ),
+    ]
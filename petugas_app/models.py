@@ -9,8 +9,9 @@ class Notification(models.Model):
         ('TRANSACTION_SUCCESS', 'Transaksi Berhasil'),
     ]
 
-    recipient = models.ForeignKey(CustomUser, on_delete=models.CASCADE)  # Penerima notifikasi
+    recipient = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)  # Penerima notifikasi (di-index lewat Meta.indexes)
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)  # Tipe notifikasi
+    produk = models.ForeignKey(Produk, on_delete=models.SET_NULL, null=True, blank=True)  # Produk terkait (notifikasi stok)
     message = models.TextField()  # Pesan notifikasi
     is_read = models.BooleanField(default=False)  # Status baca
     created_at = models.DateTimeField(auto_now_add=True)  # Tanggal dan waktu notifikasi dibuat
@@ -22,30 +23,40 @@ class Notification(models.Model):
         verbose_name = "Notifikasi"
         verbose_name_plural = "Notifikasi"
         ordering = ['-created_at']
+        indexes = [
+            # Inbox per user: WHERE recipient = ? ORDER BY created_at DESC, id DESC LIMIT n (cursor)
+            models.Index(fields=['recipient', 'created_at', 'id'], name='notif_recipient_created_idx'),
+            # Badge belum dibaca: COUNT(*) WHERE recipient = ? AND is_read = false, cukup dari index
+            models.Index(fields=['recipient', 'is_read', 'created_at'], name='notif_recipient_read_idx'),
+        ]
 
     def mark_as_read(self):
         """Menandai notifikasi sebagai sudah dibaca."""
         self.is_read = True
         self.save(update_fields=['is_read'])
 
+    @classmethod
+    def build_stock_low_notification(cls, produk, recipient):
+        """Membuat (tanpa menyimpan) notifikasi stok hampir habis, untuk bulk_create."""
+        message = f"Stok untuk produk {produk.nama} hampir habis. Sisa stok: {produk.stok}"
+        return cls(recipient=recipient, notification_type='STOCK_LOW', produk=produk, message=message)
+
+    @classmethod
+    def build_transaction_success_notification(cls, transaksi, recipient):
+        """Membuat (tanpa menyimpan) notifikasi transaksi berhasil, untuk bulk_create."""
+        message = f"Transaksi berhasil dengan ID {transaksi.id}. Total: Rp {transaksi.total_harga:,.0f}"
+        return cls(recipient=recipient, notification_type='TRANSACTION_SUCCESS', message=message)
+
     @classmethod
     def create_stock_low_notification(cls, produk, recipient):
         """Membuat notifikasi stok hampir habis."""
-        message = f"Stok untuk produk {produk.nama} hampir habis. Sisa stok: {produk.stok}"
-        notification = cls.objects.create(
-            recipient=recipient,
-            notification_type='STOCK_LOW',
-            message=message
-        )
+        notification = cls.build_stock_low_notification(produk, recipient)
+        notification.save()
         return notification
 
     @classmethod
     def create_transaction_success_notification(cls, transaksi, recipient):
         """Membuat notifikasi transaksi berhasil."""
-        message = f"Transaksi berhasil dengan ID {transaksi.id}. Total: Rp {transaksi.total_harga:,.0f}"
-        notification = cls.objects.create(
-            recipient=recipient,
-            notification_type='TRANSACTION_SUCCESS',
-            message=message
-        )
+        notification = cls.build_transaction_success_notification(transaksi, recipient)
+        notification.save()
         return notification
@@ -0,0 +1,265 @@
+"""
+Fan-out notifikasi penjualan di luar jalur kritis checkout.
+
+Checkout memanggil `terbitkan_penjualan` di dalam transaksinya; event baru dikirim ke dispatcher setelah
+commit (transaction.on_commit), jadi checkout yang batal tidak menghasilkan notifikasi dan INSERT
+notifikasi tidak menambah waktu checkout. Dispatcher per proses mengumpulkan event di antrean dan satu
+thread worker memprosesnya per batch:
+
+- satu notifikasi TRANSACTION_SUCCESS untuk kasir setiap transaksi;
+- notifikasi STOCK_LOW untuk setiap admin aktif bila sisa stok produk memenuhi Produk.is_low_stock
+  (BATAS_STOK). Produk yang sudah diberi notifikasi stok rendah dalam JENDELA_STOK_RENDAH detik
+  terakhir dilewati, dan beberapa event untuk produk yang sama dalam satu batch digabung;
+- semua baris disimpan dengan satu bulk_create per batch.
+
+Dengan settings.NOTIFIKASI['ASYNC'] = False event diproses langsung di callback on_commit (untuk test).
+
+Notifikasi yang baru disimpan juga diteruskan ke `hub`, yaitu pelanggan stream SSE di proses yang sama
+(lihat NotificationStreamView), sehingga klien tidak perlu polling.
+"""
+import asyncio
+import atexit
+import logging
+import queue
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connection, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from admin_app.models import CustomUser
+from produk_app.models import Produk
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ASYNC': True,                  # False = proses event langsung setelah commit, tanpa thread worker
+    'BATAS_STOK': 10,               # Threshold Produk.is_low_stock
+    'JENDELA_STOK_RENDAH': 3600,    # Detik; notifikasi stok rendah produk yang sama digabung dalam jendela ini
+    'BATCH': 200,                   # Maksimum event per bulk insert
+    'STREAM_HEARTBEAT': 15,         # Detik antar komentar ping di stream SSE yang sedang idle
+    'STREAM_SINKRON': 60,           # Detik antar pengecekan database oleh stream (notifikasi dari proses lain); 0 = mati
+    'STREAM_TUMPANG': 120,          # Detik; susulan stream juga membaca ulang notifikasi sejauh ini ke belakang
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'NOTIFIKASI', {})}
+
+
+def payload_notifikasi(notification):
+    return {
+        'id': notification.id,
+        'notification_type': notification.notification_type,
+        'notification_type_display': notification.get_notification_type_display(),
+        'produk': notification.produk_id,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def _masukkan(antrean, payloads):
+    try:
+        antrean.put_nowait(payloads)
+    except asyncio.QueueFull:
+        # Klien terlalu lambat membaca; notifikasinya tersusul saat sinkronisasi berkala
+        pass
+
+
+class HubNotifikasi:
+    """
+    Pelanggan stream notifikasi per user di proses ini. `terbitkan` boleh dipanggil dari thread mana pun;
+    payload diteruskan ke event loop milik setiap pelanggan.
+    """
+
+    def __init__(self, kapasitas=100):
+        self.kapasitas = kapasitas
+        self._pelanggan = {}  # user_id -> {(loop, asyncio.Queue), ...}
+        self._lock = threading.Lock()
+
+    def langganan(self, user_id):
+        pelanggan = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.kapasitas))
+        with self._lock:
+            self._pelanggan.setdefault(user_id, set()).add(pelanggan)
+        return pelanggan
+
+    def berhenti(self, user_id, pelanggan):
+        with self._lock:
+            daftar = self._pelanggan.get(user_id, set())
+            daftar.discard(pelanggan)
+            if not daftar:
+                self._pelanggan.pop(user_id, None)
+
+    def jumlah_pelanggan(self):
+        with self._lock:
+            return sum(len(daftar) for daftar in self._pelanggan.values())
+
+    def terbitkan(self, notifikasi):
+        per_user = {}
+        for notification in notifikasi:
+            per_user.setdefault(notification.recipient_id, []).append(payload_notifikasi(notification))
+        with self._lock:
+            tujuan = [
+                (pelanggan, payloads)
+                for user_id, payloads in per_user.items()
+                for pelanggan in self._pelanggan.get(user_id, ())
+            ]
+        for (loop, antrean), payloads in tujuan:
+            try:
+                loop.call_soon_threadsafe(_masukkan, antrean, payloads)
+            except RuntimeError:
+                # Event loop pelanggan sudah ditutup
+                pass
+
+
+hub = HubNotifikasi()
+
+
+class DispatcherNotifikasi:
+    def __init__(self, asinkron=True, batas_stok=10, jendela_stok_rendah=3600, batch=200):
+        self.asinkron = asinkron
+        self.batas_stok = batas_stok
+        self.jendela_stok_rendah = jendela_stok_rendah
+        self.batch = batch
+        self.antrean = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def kirim(self, event):
+        if not self.asinkron:
+            self.proses([event])
+            return
+        self._pastikan_worker()
+        self.antrean.put(event)
+
+    def tunggu(self):
+        """Menunggu sampai semua event di antrean selesai diproses."""
+        self.antrean.join()
+
+    def _pastikan_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._jalan, name='notifikasi', daemon=True)
+                    self._worker.start()
+                    # Kosongkan antrean sebelum proses berhenti agar event yang sudah commit tidak hilang
+                    atexit.register(self.tunggu)
+
+    def _jalan(self):
+        while True:
+            batch = [self.antrean.get()]
+            while len(batch) < self.batch:
+                try:
+                    batch.append(self.antrean.get_nowait())
+                except queue.Empty:
+                    break
+            close_old_connections()
+            try:
+                self.proses(batch)
+            except Exception as e:
+                logger.error(f"Gagal menyimpan {len(batch)} event notifikasi: {e}")
+            finally:
+                connection.close()
+                for _ in batch:
+                    self.antrean.task_done()
+
+    def proses(self, events):
+        """Membuat semua notifikasi untuk sekumpulan event dengan satu bulk_create."""
+        notifikasi = [
+            Notification.build_transaction_success_notification(event['transaksi'], event['kasir'])
+            for event in events
+        ]
+
+        # Event belakangan menimpa yang lebih awal, jadi yang tersisa adalah stok terbaru
+        stok_rendah = {
+            produk.id: produk
+            for event in events
+            for produk in event['produk']
+            if produk.is_low_stock(self.batas_stok)
+        }
+        if stok_rendah:
+            batas_waktu = timezone.now() - timedelta(seconds=self.jendela_stok_rendah)
+            sudah = set(
+                Notification.objects
+                .filter(notification_type='STOCK_LOW', produk_id__in=stok_rendah, created_at__gte=batas_waktu)
+                .values_list('produk_id', flat=True)
+            )
+            baru = [produk for produk_id, produk in stok_rendah.items() if produk_id not in sudah]
+            if baru:
+                admins = list(CustomUser.objects.filter(role='admin', is_active=True))
+                notifikasi += [
+                    Notification.build_stock_low_notification(produk, admin)
+                    for produk in baru
+                    for admin in admins
+                ]
+
+        Notification.objects.bulk_create(notifikasi)
+        hub.terbitkan(notifikasi)
+        return notifikasi
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Dispatcher notifikasi per proses, dibuat sekali dari settings.NOTIFIKASI."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                config = get_config()
+                _dispatcher = DispatcherNotifikasi(
+                    asinkron=config['ASYNC'],
+                    batas_stok=config['BATAS_STOK'],
+                    jendela_stok_rendah=config['JENDELA_STOK_RENDAH'],
+                    batch=config['BATCH'],
+                )
+    return _dispatcher
+
+
+@receiver(setting_changed)
+def reset_dispatcher(setting, **kwargs):
+    global _dispatcher
+    if setting == 'NOTIFIKASI':
+        _dispatcher = None
+
+
+def hapus_notifikasi_lama(sebelum, batch=1000, dry_run=False):
+    """
+    Menghapus notifikasi yang sudah dibaca dan dibuat sebelum `sebelum`, per batch id agar setiap
+    DELETE singkat dan tidak mengunci tabel lama. Mengembalikan jumlah baris yang dihapus (atau yang
+    akan dihapus bila `dry_run`).
+    """
+    lama = Notification.objects.filter(is_read=True, created_at__lt=sebelum)
+    if dry_run:
+        return lama.count()
+
+    total = 0
+    while True:
+        ids = list(lama.order_by('id').values_list('id', flat=True)[:batch])
+        if ids:
+            total += Notification.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch:
+            return total
+
+
+def terbitkan_penjualan(transaksi, kasir, produk_map, permintaan):
+    """
+    Dipanggil di dalam transaksi penjualan. `produk_map` adalah hasil reservasi_stok (stok sebelum
+    dikurangi) dan `permintaan` dict {produk_id: jumlah}; sisa stok dihitung tanpa query tambahan.
+    """
+    event = {
+        'transaksi': transaksi,
+        'kasir': kasir,
+        'produk': [
+            Produk(id=produk_id, kode=produk_map[produk_id].kode, nama=produk_map[produk_id].nama, stok=produk_map[produk_id].stok - jumlah)
+            for produk_id, jumlah in permintaan.items()
+        ],
+    }
+    transaction.on_commit(lambda: get_dispatcher().kirim(event), robust=True)
@@ -0,0 +1,7 @@
+from rest_framework.pagination import CursorPagination
+
+class NotificationCursorPagination(CursorPagination):
+    page_size = 20  # Ukuran halaman default inbox
+    page_size_query_param = 'page_size'  # Mengizinkan klien untuk mengatur ukuran halaman menggunakan parameter query
+    max_page_size = 100  # Batas maksimum ukuran halaman
+    ordering = ('-created_at', '-id')  # Keyset (created_at, id) agar urutan stabil walau created_at sama
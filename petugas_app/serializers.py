@@ -55,7 +55,7 @@ class TransaksiSerializer(serializers.ModelSerializer):
 
 class NotificationSerializer(serializers.ModelSerializer):
     notification_type_display = serializers.CharField(source='get_notification_type_display', read_only=True)
-    recipient_username = serializers.CharField(source='recipient.username', read_only=True)
+    recipient_username = serializers.CharField(source='recipient.get_username', read_only=True)  # CustomUser login dengan email
 
     class Meta:
         model = Notification
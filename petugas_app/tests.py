@@ -1,3 +1,328 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import skipUnless
+from decimal import Decimal
 
-# Create your tests here.
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from admin_app.models import CustomUser
+from laporan_app.models import DailySalesRollup
+from produk_app.models import Kategori, Produk
+from transaksi_app.models import CartItem, Transaksi
+from .models import Notification
+from .views import NotificationStreamView
+from .notifikasi import DispatcherNotifikasi, get_dispatcher, hapus_notifikasi_lama, hub, payload_notifikasi
+
+
+class DashboardSummaryViewTests(TestCase):
+    def setUp(self):
+        kategori = Kategori.objects.create(nama='Makanan')
+        self.produk = Produk.objects.create(
+            kode='P1', nama='Produk 1', harga_khusus=Decimal('900'), harga_umum=Decimal('1000'), stok=100, kategori=kategori
+        )
+        self.kasir = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.kasir)
+
+    def checkout(self, jumlah):
+        CartItem.objects.create(petugas=self.kasir, produk=self.produk, jumlah=jumlah, tipe_harga='harga_umum')
+        response = self.client.post(reverse('checkout'), {'pelanggan': 'Budi'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_counter_diperbarui_checkout_dan_dibaca_satu_query(self):
+        DailySalesRollup.objects.create(
+            tanggal=timezone.localdate() - timedelta(days=1), kasir=self.kasir,
+            jumlah_transaksi=2, jumlah_terjual=2, total_penjualan=Decimal('2000'),
+        )
+        self.checkout(2)
+        self.checkout(3)
+        self.checkout(1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('dashboard_summary'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['jumlah_transaksi'], 3)
+        self.assertEqual(response.data['total_pendapatan'], Decimal('6000'))
+        self.assertEqual(response.data['perubahan_kinerja'], 50.0)
+        self.assertEqual(Transaksi.get_today_summary(self.kasir), (3, Decimal('6000')))
+
+    def test_tanpa_transaksi(self):
+        response = self.client.get(reverse('dashboard_summary'))
+        self.assertEqual(response.data, {'jumlah_transaksi': 0, 'total_pendapatan': 0, 'perubahan_kinerja': 'N/A'})
+
+
+@override_settings(NOTIFIKASI={'ASYNC': False, 'BATAS_STOK': 10, 'JENDELA_STOK_RENDAH': 3600})
+class NotifikasiPenjualanTests(TestCase):
+    def setUp(self):
+        self.kategori = Kategori.objects.create(nama='Makanan')
+        self.produk = Produk.objects.create(
+            kode='P1', nama='Produk 1', harga_khusus=Decimal('900'), harga_umum=Decimal('1000'), stok=14, kategori=self.kategori
+        )
+        self.kasir = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas'
+        )
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com', password='rahasia123', full_name='Admin', role='admin'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.kasir)
+
+    def checkout(self, jumlah):
+        CartItem.objects.create(petugas=self.kasir, produk=self.produk, jumlah=jumlah, tipe_harga='harga_umum')
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('checkout'), {'pelanggan': 'Budi'}, format='json')
+
+    def test_checkout_mengirim_notifikasi_setelah_commit(self):
+        self.assertEqual(self.checkout(2).status_code, 201)
+        self.assertEqual(list(Notification.objects.values_list('recipient', 'notification_type')), [(self.kasir.id, 'TRANSACTION_SUCCESS')])
+
+        self.assertEqual(self.checkout(3).status_code, 201)
+        stok_rendah = Notification.objects.get(notification_type='STOCK_LOW')
+        self.assertEqual((stok_rendah.recipient, stok_rendah.produk), (self.admin, self.produk))
+        self.assertIn('Sisa stok: 9', stok_rendah.message)
+
+    def test_notifikasi_stok_rendah_digabung_dalam_jendela(self):
+        self.checkout(5)
+        self.checkout(1)
+        self.assertEqual(Notification.objects.filter(notification_type='STOCK_LOW').count(), 1)
+
+        Notification.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        self.checkout(1)
+        self.assertEqual(Notification.objects.filter(notification_type='STOCK_LOW').count(), 2)
+
+    def test_checkout_gagal_tidak_mengirim_notifikasi(self):
+        self.assertEqual(self.checkout(50).status_code, 400)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_transaksi_lewat_api_mengirim_notifikasi(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('transaksi-list-create'),
+                {'items': [{'kode_produk': 'P1', 'jumlah': 5, 'tipe_harga': 'harga_umum'}]}, format='json',
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(
+            sorted(Notification.objects.values_list('recipient', 'notification_type')),
+            [(self.kasir.id, 'TRANSACTION_SUCCESS'), (self.admin.id, 'STOCK_LOW')],
+        )
+        self.assertIn('Sisa stok: 9', Notification.objects.get(notification_type='STOCK_LOW').message)
+
+    def test_batch_event_satu_bulk_insert(self):
+        transaksi = Transaksi.objects.create(user=self.kasir, total_harga=Decimal('1000'), metode_pembayaran='tunai')
+        produk_lain = Produk.objects.create(
+            kode='P2', nama='Produk 2', harga_khusus=Decimal('900'), harga_umum=Decimal('1000'), stok=3, kategori=self.kategori
+        )
+        events = [
+            {'transaksi': transaksi, 'kasir': self.kasir, 'produk': [Produk(id=self.produk.id, nama='Produk 1', stok=stok), Produk(id=produk_lain.id, nama='Produk 2', stok=2)]}
+            for stok in (9, 8, 7)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            get_dispatcher().proses(events)
+        # Cek jendela stok rendah, daftar admin, dan satu bulk insert
+        self.assertEqual(len(ctx.captured_queries), 3)
+        self.assertEqual(Notification.objects.filter(notification_type='TRANSACTION_SUCCESS').count(), 3)
+        self.assertIn('Sisa stok: 7', Notification.objects.get(notification_type='STOCK_LOW', produk=self.produk).message)
+        self.assertEqual(Notification.objects.filter(notification_type='STOCK_LOW').count(), 2)
+
+
+class DispatcherNotifikasiWorkerTests(TransactionTestCase):
+    def test_worker_menyimpan_event_di_background(self):
+        kasir = CustomUser.objects.create_user(email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas')
+        transaksi = Transaksi.objects.create(user=kasir, total_harga=Decimal('1000'), metode_pembayaran='tunai')
+        dispatcher = DispatcherNotifikasi(asinkron=True)
+        for _ in range(5):
+            dispatcher.kirim({'transaksi': transaksi, 'kasir': kasir, 'produk': []})
+        dispatcher.tunggu()
+        self.assertEqual(Notification.objects.filter(recipient=kasir, notification_type='TRANSACTION_SUCCESS').count(), 5)
+
+
+@override_settings(NOTIFIKASI={'ASYNC': False, 'STREAM_HEARTBEAT': 0.05, 'STREAM_SINKRON': 0})
+class NotificationStreamViewTests(TestCase):
+    def setUp(self):
+        self.kasir = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas'
+        )
+        self.transaksi = Transaksi.objects.create(user=self.kasir, total_harga=Decimal('1000'), metode_pembayaran='tunai')
+        self.lama = Notification.create_transaction_success_notification(self.transaksi, self.kasir)
+        self.token = str(AccessToken.for_user(self.kasir))
+
+    async def baca_event(self, stream, jumlah):
+        """Membaca `jumlah` event SSE (tanpa komentar ping) sebagai list (event, data)."""
+        events = []
+        while len(events) < jumlah:
+            chunk = await asyncio.wait_for(anext(stream), 5)
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if chunk.startswith((':', 'retry')):
+                continue
+            baris = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+            events.append((baris['event'], json.loads(baris['data'])))
+        return events
+
+    async def baca_ping(self, stream, jumlah):
+        for _ in range(jumlah):
+            self.assertEqual(await asyncio.wait_for(anext(stream), 5), b': ping\n\n')
+
+    async def test_tanpa_token_ditolak(self):
+        self.assertEqual((await self.async_client.get(reverse('notification-stream'))).status_code, 401)
+
+    def test_wsgi_ditolak_tanpa_membuka_stream(self):
+        response = self.client.get(reverse('notification-stream'), {'token': self.token})
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(hub.jumlah_pelanggan(), 0)
+
+    async def test_stream_mendorong_notifikasi_baru_tanpa_polling(self):
+        response = await self.async_client.get(reverse('notification-stream'), {'token': self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        try:
+            # Notifikasi yang sudah ada (last_id 0) dan jumlah belum dibaca dikirim saat terhubung
+            self.assertEqual(await self.baca_event(stream, 2), [
+                ('notifikasi', payload_notifikasi(self.lama)),
+                ('unread', {'unread': 1}),
+            ])
+
+            # Koneksi idle (beberapa heartbeat) tidak menjalankan query
+            ctx = CaptureQueriesContext(connection)
+            await sync_to_async(ctx.__enter__)()
+            await self.baca_ping(stream, 3)
+            await sync_to_async(ctx.__exit__)(None, None, None)
+            self.assertEqual(len(ctx.captured_queries), 0)
+
+            await sync_to_async(get_dispatcher().proses)([{'transaksi': self.transaksi, 'kasir': self.kasir, 'produk': []}])
+            (event, data), unread = await self.baca_event(stream, 2)
+            self.assertEqual(event, 'notifikasi')
+            self.assertEqual(data['notification_type'], 'TRANSACTION_SUCCESS')
+            self.assertGreater(data['id'], self.lama.id)
+            self.assertEqual(unread, ('unread', {'unread': 2}))
+        finally:
+            await stream.aclose()
+
+    async def test_langganan_dilepas_saat_stream_ditutup(self):
+        stream = NotificationStreamView().stream(self.kasir.id, self.lama.id)
+        await self.baca_event(stream, 1)
+        self.assertEqual(hub.jumlah_pelanggan(), 1)
+        # Server ASGI menutup generator saat klien memutus koneksi
+        await stream.aclose()
+        self.assertEqual(hub.jumlah_pelanggan(), 0)
+
+    async def test_last_event_id_melewati_notifikasi_lama(self):
+        # Di luar jendela STREAM_TUMPANG, jadi hanya id yang menentukan
+        await Notification.objects.filter(id=self.lama.id).aupdate(created_at=timezone.now() - timedelta(hours=1))
+        response = await self.async_client.get(
+            reverse('notification-stream'), {'token': self.token}, headers={'Last-Event-ID': str(self.lama.id)}
+        )
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await self.baca_event(stream, 1), [('unread', {'unread': 1})])
+        finally:
+            await stream.aclose()
+
+
+    @override_settings(NOTIFIKASI={'ASYNC': False, 'STREAM_HEARTBEAT': 0.05, 'STREAM_SINKRON': 0.1, 'STREAM_TUMPANG': 120})
+    async def test_notifikasi_id_lebih_kecil_yang_muncul_belakangan_tetap_terkirim(self):
+        # Id yang dipesan notifikasi worker lain, tetapi baru commit setelah notifikasi berikutnya didorong
+        dipesan = await Notification.objects.acreate(recipient=self.kasir, notification_type='TRANSACTION_SUCCESS', message='x')
+        id_dipesan = dipesan.id
+        await dipesan.adelete()
+
+        stream = NotificationStreamView().stream(self.kasir.id, self.lama.id)
+        try:
+            # self.lama masih di jendela STREAM_TUMPANG sehingga ikut terkirim walau id-nya = last_id
+            self.assertEqual(await self.baca_event(stream, 2), [('notifikasi', payload_notifikasi(self.lama)), ('unread', {'unread': 1})])
+            dorong = await sync_to_async(get_dispatcher().proses)([{'transaksi': self.transaksi, 'kasir': self.kasir, 'produk': []}])
+            (_, data), _ = await self.baca_event(stream, 2)
+            self.assertEqual(data['id'], dorong[0].id)
+            self.assertGreater(dorong[0].id, id_dipesan)
+
+            terlambat = await Notification.objects.acreate(
+                id=id_dipesan, recipient=self.kasir, notification_type='TRANSACTION_SUCCESS', message='Dari worker lain'
+            )
+            # Susulan berkala mengirim yang terlambat sekali saja, tanpa mengulang yang sudah didorong
+            self.assertEqual(await self.baca_event(stream, 2), [
+                ('notifikasi', payload_notifikasi(terlambat)),
+                ('unread', {'unread': 3}),
+            ])
+            for _ in range(5):
+                self.assertEqual(await asyncio.wait_for(anext(stream), 5), ': ping\n\n')
+        finally:
+            await stream.aclose()
+
+        # Reconnect dengan id tertinggi tetap membaca ulang jendela STREAM_TUMPANG; klien menyaring per id
+        stream = NotificationStreamView().stream(self.kasir.id, dorong[0].id)
+        try:
+            events = await self.baca_event(stream, 4)
+            self.assertEqual(
+                sorted(data['id'] for event, data in events if event == 'notifikasi'),
+                sorted([self.lama.id, terlambat.id, dorong[0].id]),
+            )
+        finally:
+            await stream.aclose()
+
+
+class NotificationInboxTests(TestCase):
+    def setUp(self):
+        self.kasir = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas'
+        )
+        lain = CustomUser.objects.create_user(email='lain@example.com', password='rahasia123', full_name='Lain', role='petugas')
+        Notification.objects.bulk_create(
+            [Notification(recipient=self.kasir, notification_type='TRANSACTION_SUCCESS', message=f'Pesan {i}', is_read=i % 3 == 0) for i in range(25)]
+            + [Notification(recipient=lain, notification_type='TRANSACTION_SUCCESS', message='Lain')]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.kasir)
+
+    def test_inbox_per_halaman_dengan_cursor(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('notification-list'))
+        self.assertEqual(response.status_code, 200)
+        halaman_1 = response.data['results']
+        self.assertEqual(len(halaman_1), 20)
+        self.assertEqual(halaman_1[0]['recipient_username'], 'kasir@example.com')
+
+        halaman_2 = self.client.get(response.data['next']).data['results']
+        ids = [n['id'] for n in halaman_1 + halaman_2]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_jumlah_belum_dibaca(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('notification-unread-count'))
+        self.assertEqual(response.data, {'unread': 16})
+
+    @skipUnless(connection.vendor == 'sqlite', "Format EXPLAIN QUERY PLAN khusus SQLite")
+    def test_jumlah_belum_dibaca_memakai_covering_index(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('notification-unread-count'))
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {ctx.captured_queries[0]['sql']}")
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('COVERING INDEX notif_recipient_read_idx', plan)
+
+    def test_retensi_menghapus_notifikasi_dibaca_yang_lama_per_batch(self):
+        Notification.objects.filter(message__in=['Pesan 0', 'Pesan 1', 'Pesan 3', 'Pesan 6']).update(
+            created_at=timezone.now() - timedelta(days=100)
+        )
+        sebelum = timezone.now() - timedelta(days=90)
+        self.assertEqual(hapus_notifikasi_lama(sebelum, dry_run=True), 3)
+        with self.assertNumQueries(4):
+            self.assertEqual(hapus_notifikasi_lama(sebelum, batch=2), 3)
+        # Notifikasi lama yang belum dibaca tetap ada
+        self.assertTrue(Notification.objects.filter(message='Pesan 1').exists())
+        self.assertFalse(Notification.objects.filter(message__in=['Pesan 0', 'Pesan 3', 'Pesan 6']).exists())
+
+        call_command('prune_notifications', '--days', '90', stdout=open('/dev/null', 'w'))
+        self.assertEqual(Notification.objects.count(), 23)
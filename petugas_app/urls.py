@@ -5,6 +5,7 @@ from .views import (
     ServerTimeView,
     LogoutView,
     NotificationViewSet,
+    NotificationStreamView,
 )
 
 urlpatterns = [
@@ -16,5 +17,7 @@ urlpatterns = [
     # Tambahkan endpoint untuk notifikasi
     path('notifications/', NotificationViewSet.as_view({'get': 'list'}), name='notification-list'),  # Mendapatkan semua notifikasi
     path('notifications/<int:pk>/', NotificationViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='notification-detail'),  # Mendapatkan, memperbarui, atau menghapus notifikasi berdasarkan ID
+    path('notifications/unread-count/', NotificationViewSet.as_view({'get': 'unread_count'}), name='notification-unread-count'),  # Jumlah notifikasi belum dibaca
+    path('notifications/stream/', NotificationStreamView.as_view(), name='notification-stream'),  # Stream SSE notifikasi baru dan jumlah belum dibaca
     path('notifications/create/', NotificationViewSet.as_view({'post': 'create'}), name='notification-create'),  # Membuat notifikasi baru
 ]
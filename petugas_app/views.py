@@ -3,17 +3,30 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
-from django.db.models import Sum
-from transaksi_app.models import Transaksi
+from laporan_app.services import ringkasan_kasir
 from admin_app.serializers import CustomUserSerializer
 from rest_framework.permissions import IsAuthenticated 
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 from django.contrib.auth import logout
 from .models import Notification
 from .serializers import NotificationSerializer
+from .pagination import NotificationCursorPagination
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
+from admin_app.authentication import StatelessJWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+import asyncio
+import functools
+import json
+from django.db import connection
+from django.db.models import Q
+from .notifikasi import get_config, hub, payload_notifikasi
 class UserDetailView(APIView):
     permission_classes = [IsAuthenticated]  # Hanya bisa diakses jika pengguna sudah login
 
@@ -41,16 +54,14 @@ class DashboardSummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        today = timezone.now().date()
-
-        # Menghitung transaksi hari ini
-        jumlah_transaksi_hari_ini = Transaksi.objects.filter(user=user, tanggal__date=today).count()
-        total_pendapatan_hari_ini = Transaksi.objects.filter(user=user, tanggal__date=today).aggregate(Sum('total_harga'))['total_harga__sum'] or 0
-
-        # Menghitung transaksi hari sebelumnya
+        today = timezone.localdate()
         kemarin = today - timezone.timedelta(days=1)
-        jumlah_transaksi_kemarin = Transaksi.objects.filter(user=user, tanggal__date=kemarin).count()
+
+        # Counter harian kasir dibaca dari rekap penjualan (satu query untuk hari ini dan kemarin)
+        ringkasan = ringkasan_kasir(request.user, [today, kemarin])
+        jumlah_transaksi_hari_ini = ringkasan[today]['jumlah_transaksi']
+        total_pendapatan_hari_ini = ringkasan[today]['total_penjualan']
+        jumlah_transaksi_kemarin = ringkasan[kemarin]['jumlah_transaksi']
 
         # Menghitung perubahan kinerja
         if jumlah_transaksi_kemarin > 0:
@@ -73,13 +84,21 @@ class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificationCursorPagination
 
     def get_queryset(self):
         """
-        Menampilkan notifikasi milik pengguna yang sedang login.
+        Menampilkan notifikasi milik pengguna yang sedang login, per halaman dengan cursor (created_at, id).
         """
         user = self.request.user
-        return Notification.objects.filter(recipient=user).order_by('-created_at')
+        return Notification.objects.filter(recipient=user).select_related('recipient')
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """
+        Jumlah notifikasi belum dibaca untuk badge, dihitung dari index (recipient, is_read, created_at).
+        """
+        return Response({'unread': hitung_unread(request.user.id)}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
@@ -112,4 +131,143 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """
         Membuat notifikasi transaksi berhasil (fungsi yang bisa dipanggil dari luar view).
         """
-        return Notification.create_transaction_success_notification(transaksi, recipient)
\ No newline at end of file
+        return Notification.create_transaction_success_notification(transaksi, recipient)
+
+def lepas_koneksi(fungsi):
+    """
+    Untuk query dari stream yang hidup lama: koneksi database milik request ditutup setelah dipakai,
+    bukan saat response selesai, agar stream yang idle tidak menahan satu koneksi database masing-masing.
+    """
+    @functools.wraps(fungsi)
+    def wrapper(*args, **kwargs):
+        try:
+            return fungsi(*args, **kwargs)
+        finally:
+            if not connection.in_atomic_block:
+                connection.close()
+    return wrapper
+
+
+@lepas_koneksi
+def autentikasi_stream(request):
+    """
+    User dari access token JWT di header Authorization, atau di parameter ?token= karena EventSource
+    di browser tidak bisa mengirim header. Mengembalikan None bila token tidak ada atau tidak valid.
+    """
+    jwt = StatelessJWTAuthentication()
+    header = jwt.get_header(request)
+    raw_token = jwt.get_raw_token(header) if header is not None else request.GET.get('token', '').encode() or None
+    if raw_token is None:
+        return None
+    try:
+        return jwt.get_user(jwt.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+@lepas_koneksi
+def susulan_notifikasi(user_id, setelah_id, sejak, terkirim=()):
+    """
+    Notifikasi user dengan id > `setelah_id` atau dibuat sejak `sejak`, kecuali id di `terkirim`
+    (maks. 100, urut naik), dan jumlah yang belum dibaca.
+    """
+    notifikasi = (
+        Notification.objects
+        .filter(Q(id__gt=setelah_id) | Q(created_at__gte=sejak), recipient_id=user_id)
+        .exclude(id__in=list(terkirim))
+        .order_by('id')[:100]
+    )
+    return [payload_notifikasi(notification) for notification in notifikasi], hitung_unread(user_id)
+
+
+def hitung_unread(user_id):
+    return Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+
+
+def format_sse(event, data, event_id=None):
+    baris = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{baris}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class NotificationStreamView(View):
+    """
+    Stream notifikasi (Server-Sent Events) sebagai pengganti polling NotificationViewSet.list.
+
+    Saat terhubung klien menerima notifikasi setelah `Last-Event-ID` (atau ?last_id=) dan jumlah
+    belum dibaca; setelah itu koneksi idle tanpa query database. Notifikasi baru didorong dari hub
+    di proses ini begitu disimpan, diikuti jumlah belum dibaca terbaru. Komentar ping dikirim setiap
+    STREAM_HEARTBEAT detik, dan setiap STREAM_SINKRON detik stream mengecek database sekali untuk
+    notifikasi yang dibuat proses lain. Hanya berjalan lewat server ASGI (fix.asgi), sehingga setiap
+    koneksi memakan satu coroutine; request lewat WSGI langsung dijawab 501.
+
+    Urutan id tidak sama dengan urutan notifikasi terlihat: notifikasi worker lain atau yang commit
+    belakangan bisa ber-id lebih kecil dari yang sudah didorong. Karena itu susulan (saat terhubung
+    dan setiap STREAM_SINKRON) juga membaca ulang notifikasi STREAM_TUMPANG detik terakhir; dalam satu
+    stream id yang sudah dikirim disaring, tetapi setelah reconnect notifikasi yang sama bisa terkirim
+    lagi, jadi klien wajib menyaring berdasarkan `id`. Id event SSE adalah id tertinggi yang sudah dikirim.
+    """
+
+    async def get(self, request):
+        # Di bawah WSGI stream tak berujung ini dibaca habis oleh async_to_sync dan menahan satu worker selamanya
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'error': 'Stream notifikasi hanya tersedia lewat server ASGI (fix.asgi).'}, status=501)
+        user = await sync_to_async(autentikasi_stream)(request)
+        if user is None:
+            return JsonResponse({'error': 'Token tidak valid atau tidak ada.'}, status=401)
+        try:
+            setelah_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_id') or 0)
+        except ValueError:
+            return JsonResponse({'error': 'last_id harus berupa angka.'}, status=400)
+
+        response = StreamingHttpResponse(self.stream(user.id, setelah_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Jangan di-buffer oleh nginx
+        return response
+
+    async def stream(self, user_id, setelah_id):
+        config = get_config()
+        loop = asyncio.get_running_loop()
+        pelanggan = hub.langganan(user_id)
+        terkirim = {}  # id -> created_at notifikasi yang sudah dikirim dan masih di jendela STREAM_TUMPANG
+
+        async def susulan():
+            sejak = timezone.now() - timedelta(seconds=config['STREAM_TUMPANG'])
+            # Yang dibuat sebelum `sejak` dan id-nya <= setelah_id tidak akan terbaca lagi
+            for notifikasi_id in [i for i, dibuat in terkirim.items() if dibuat < sejak]:
+                del terkirim[notifikasi_id]
+            return await sync_to_async(susulan_notifikasi)(user_id, setelah_id, sejak, terkirim)
+
+        try:
+            yield "retry: 5000\n\n"
+            payloads, unread = await susulan()
+            while True:
+                for payload in payloads:
+                    if payload['id'] in terkirim:
+                        continue
+                    terkirim[payload['id']] = datetime.fromisoformat(payload['created_at']) if payload['created_at'] else timezone.now()
+                    setelah_id = max(setelah_id, payload['id'])
+                    yield format_sse('notifikasi', payload, setelah_id)
+                if unread is not None:
+                    yield format_sse('unread', {'unread': unread})
+                payloads, unread = [], None
+
+                sinkron_berikutnya = loop.time() + config['STREAM_SINKRON'] if config['STREAM_SINKRON'] else None
+                while not payloads and unread is None:
+                    timeout = config['STREAM_HEARTBEAT']
+                    if sinkron_berikutnya is not None:
+                        timeout = max(0, min(timeout, sinkron_berikutnya - loop.time()))
+                    try:
+                        payloads = await asyncio.wait_for(pelanggan[1].get(), timeout)
+                    except asyncio.TimeoutError:
+                        if sinkron_berikutnya is not None and loop.time() >= sinkron_berikutnya:
+                            payloads, unread = await susulan()
+                            if not payloads:
+                                # Jumlah belum dibaca hanya dikirim ulang bila ada notifikasi baru
+                                unread = None
+                                sinkron_berikutnya = loop.time() + config['STREAM_SINKRON']
+                        else:
+                            yield ": ping\n\n"
+                        continue
+                    unread = await sync_to_async(lepas_koneksi(hitung_unread))(user_id)
+        finally:
+            hub.berhenti(user_id, pelanggan)
@@ -1,6 +1,7 @@
 # produk_app/admin.py
 from django.contrib import admin
 from .models import Kategori, Produk
+from .search import filter_pencarian
 
 # Mendaftarkan model Kategori
 @admin.register(Kategori)
@@ -15,3 +16,7 @@ class ProdukAdmin(admin.ModelAdmin):
     search_fields = ('kode', 'nama')  # Mencari berdasarkan kode dan nama produk
     list_filter = ('kategori',)  # Memfilter produk berdasarkan kategori
 
+    def get_search_results(self, request, queryset, search_term):
+        # Memakai index pencarian produk, bukan LIKE '%q%' di setiap field
+        return filter_pencarian(queryset, search_term), False
+
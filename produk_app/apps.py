@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ProdukAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'produk_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(signals.perbaiki_indeks_pencarian, sender=self)
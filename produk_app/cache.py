@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+
+from .models import Produk
+from .serializers import ProdukSerializer
+
+# Field yang boleh dipakai untuk lookup scan kasir
+LOOKUP_FIELDS = ('kode', 'barcode')
+
+DEFAULTS = {
+    'MAX_ENTRIES': 4096,   # Jumlah entri maksimum di LRU lokal per proses
+    'TTL': 300,            # Umur entri dalam detik (lokal dan shared)
+    'SHARED_CACHE': None,  # Alias di settings.CACHES untuk tier bersama, None = nonaktif
+    'KEY_PREFIX': 'produk-lookup',
+}
+
+
+class ProdukLookupCache:
+    """
+    Cache write-through dua tingkat untuk payload ProdukSerializer, dikunci dengan `kode` dan `barcode`.
+
+    Tier pertama adalah LRU di memori proses, tier kedua (opsional) adalah cache Django bersama
+    (mis. Redis/Memcached). Entri dihapus tepat saat produk disimpan, dihapus, atau stoknya berubah.
+    LRU proses lain hanya bisa kedaluwarsa lewat TTL, jadi TTL juga menjadi batas basi antar worker.
+    """
+
+    def __init__(self, max_entries=DEFAULTS['MAX_ENTRIES'], ttl=DEFAULTS['TTL'], shared_cache=None, key_prefix=DEFAULTS['KEY_PREFIX']):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_cache = shared_cache
+        self.key_prefix = key_prefix
+        self._entries = OrderedDict()  # key -> (expires_at, payload)
+        self._keys_by_id = {}  # produk_id -> set(key), untuk invalidasi saat kode/barcode berubah
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @classmethod
+    def from_settings(cls):
+        config = {**DEFAULTS, **getattr(settings, 'PRODUK_LOOKUP_CACHE', {})}
+        shared_cache = caches[config['SHARED_CACHE']] if config['SHARED_CACHE'] else None
+        return cls(
+            max_entries=config['MAX_ENTRIES'],
+            ttl=config['TTL'],
+            shared_cache=shared_cache,
+            key_prefix=config['KEY_PREFIX'],
+        )
+
+    def make_key(self, field, value):
+        return f"{self.key_prefix}:{field}:{value}"
+
+    def get(self, field, value):
+        """Mengambil payload dari LRU lokal lalu tier bersama; None jika tidak ada."""
+        key = self.make_key(field, value)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.local_hits += 1
+                    return payload
+                self._discard(key)
+
+        if self.shared_cache is not None:
+            payload = self.shared_cache.get(key)
+            if payload is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                    self._store_local(payload, now)
+                return payload
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, payload):
+        """Menyimpan payload di semua tier untuk setiap field lookup yang terisi."""
+        with self._lock:
+            self._store_local(payload, time.monotonic())
+        if self.shared_cache is not None:
+            self.shared_cache.set_many({key: payload for key in self._payload_keys(payload)}, self.ttl)
+
+    def invalidate(self, produk_id, kode=None, barcode=None):
+        """Menghapus semua entri milik produk, termasuk kunci lama bila kode/barcode berubah."""
+        keys = {self.make_key(field, value) for field, value in (('kode', kode), ('barcode', barcode)) if value}
+        with self._lock:
+            keys |= self._keys_by_id.get(produk_id, set())
+            for key in keys:
+                self._discard(key)
+            self.invalidations += 1
+        if self.shared_cache is not None and keys:
+            self.shared_cache.delete_many(list(keys))
+
+    def invalidate_produk(self, produk):
+        self.invalidate(produk.pk, kode=produk.kode, barcode=produk.barcode)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+
+    def reset_stats(self):
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.local_hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'shared_cache': self.shared_cache is not None,
+            }
+
+    def _payload_keys(self, payload):
+        return [self.make_key(field, payload[field]) for field in LOOKUP_FIELDS if payload.get(field)]
+
+    def _store_local(self, payload, now):
+        # Dipanggil dengan self._lock sudah dipegang
+        expires_at = now + self.ttl
+        keys = self._payload_keys(payload)
+        for key in keys:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+        self._keys_by_id.setdefault(payload['id'], set()).update(keys)
+        while len(self._entries) > self.max_entries:
+            key, (_, evicted) = self._entries.popitem(last=False)
+            self._forget_key(key, evicted['id'])
+            self.evictions += 1
+
+    def _discard(self, key):
+        # Dipanggil dengan self._lock sudah dipegang
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._forget_key(key, entry[1]['id'])
+
+    def _forget_key(self, key, produk_id):
+        keys = self._keys_by_id.get(produk_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_id[produk_id]
+
+
+_produk_cache = None
+_produk_cache_lock = threading.Lock()
+
+
+def get_produk_cache():
+    """Instance cache per proses, dibuat sekali dari settings.PRODUK_LOOKUP_CACHE."""
+    global _produk_cache
+    if _produk_cache is None:
+        with _produk_cache_lock:
+            if _produk_cache is None:
+                _produk_cache = ProdukLookupCache.from_settings()
+    return _produk_cache
+
+
+def cari_produk(field, value):
+    """
+    Mengambil payload ProdukSerializer berdasarkan `kode` atau `barcode` lewat cache.
+    Melempar Produk.DoesNotExist jika produk tidak ada.
+    """
+    if field not in LOOKUP_FIELDS:
+        raise ValueError(f"Lookup produk tidak didukung: {field}")
+    cache = get_produk_cache()
+    payload = cache.get(field, value)
+    if payload is None:
+        produk = Produk.objects.get(**{field: value})
+        payload = dict(ProdukSerializer(produk).data)
+        cache.set(payload)
+    return payload
+
+
+def cari_produk_massal(lookups):
+    """
+    Versi batch dari `cari_produk` untuk scan banyak item sekaligus.
+    `lookups` berisi pasangan (field, value); yang tidak ada di cache dicari dengan satu query IN.
+    Mengembalikan dict (field, value) -> payload; lookup yang tidak ditemukan tidak ada di hasil.
+    """
+    cache = get_produk_cache()
+    hasil = {}
+    dicari = {field: set() for field in LOOKUP_FIELDS}
+    for field, value in lookups:
+        if field not in LOOKUP_FIELDS:
+            raise ValueError(f"Lookup produk tidak didukung: {field}")
+        payload = cache.get(field, value)
+        if payload is None:
+            dicari[field].add(value)
+        else:
+            hasil[(field, value)] = payload
+
+    kondisi = Q()
+    for field, values in dicari.items():
+        if values:
+            kondisi |= Q(**{f'{field}__in': values})
+    if kondisi:
+        for produk in Produk.objects.filter(kondisi):
+            payload = dict(ProdukSerializer(produk).data)
+            cache.set(payload)
+            for field, values in dicari.items():
+                if payload[field] in values:
+                    hasil[(field, payload[field])] = payload
+    return hasil
+
+
+def produk_dari_payload(payload):
+    """Membangun instance Produk (tidak disimpan) dari payload cache, agar relasi bisa dipakai tanpa query."""
+    return Produk(
+        id=payload['id'],
+        kode=payload['kode'],
+        nama=payload['nama'],
+        deskripsi=payload['deskripsi'],
+        stok=payload['stok'],
+        kategori_id=payload['kategori'],
+        barcode=payload['barcode'],
+        harga_khusus=Decimal(payload['harga_khusus']),
+        harga_umum=Decimal(payload['harga_umum']),
+    )
@@ -0,0 +1,126 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from admin_app.models import CustomUser
+from produk_app.models import Kategori, Produk, ProdukTombstone
+from produk_app.views import ProdukListView, ProdukSyncView
+
+PREFIX = 'benchmark-sync'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark sinkronisasi katalog kasir: muat ulang seluruh katalog (?mode=kasir per halaman) "
+        "dibandingkan produk/sync/ dengan watermark setelah sebagian kecil produk berubah, dan 304 bila tidak "
+        "ada perubahan. Katalog benchmark dibuat di database aktif dan dihapus setelah selesai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--produk', type=int, default=50_000, help="Jumlah SKU katalog (default 50000).")
+        parser.add_argument('--ubah', type=int, default=200, help="Produk yang diubah di antara dua sinkronisasi (default 200).")
+        parser.add_argument('--hapus', type=int, default=20, help="Produk yang dihapus di antara dua sinkronisasi (default 20).")
+        parser.add_argument('--ulang', type=int, default=20, help="Jumlah pengulangan per skenario (default 20).")
+
+    def handle(self, *args, **options):
+        if Kategori.objects.filter(nama=PREFIX).exists():
+            raise CommandError(f"Data benchmark sebelumnya masih ada (kategori {PREFIX}); hapus dulu.")
+        if Produk.objects.filter(Q(kode__startswith='SY') | Q(barcode__startswith='28')).exists():
+            raise CommandError("Kode SY* atau barcode 28* sudah dipakai produk lain; jalankan di database terpisah.")
+
+        self.factory = APIRequestFactory()
+        self.user = CustomUser(id=0, email='benchmark@example.com', role='petugas')
+        kategori = Kategori.objects.create(nama=PREFIX)
+        try:
+            # JEDA 0 agar perubahan yang baru dibuat langsung ikut sinkronisasi; host RequestFactory untuk link cursor
+            with override_settings(KATALOG_SYNC={'JEDA': 0}, ALLOWED_HOSTS=['testserver']):
+                self.jalankan(kategori, options)
+        finally:
+            ids = list(Produk.objects.filter(kategori=kategori).values_list('id', flat=True))
+            Produk.objects.filter(id__in=ids).delete()
+            kategori.delete()
+            ProdukTombstone.objects.filter(kode__startswith='SY').delete()
+
+    def jalankan(self, kategori, options):
+        Produk.objects.bulk_create(
+            [
+                Produk(
+                    kode=f'SY{i:07d}', nama=f'Produk sinkron {i}', harga_khusus=Decimal('9000.00'),
+                    harga_umum=Decimal('10000.00'), stok=100, kategori=kategori, barcode=f'28{i:011d}',
+                )
+                for i in range(options['produk'])
+            ],
+            batch_size=1000,
+        )
+        watermark = self.ikuti_sync()[3]
+
+        rng = random.Random(42)
+        ids = list(Produk.objects.filter(kategori=kategori).values_list('id', flat=True))
+        for produk in Produk.objects.filter(id__in=rng.sample(ids, options['ubah'])):
+            produk.stok -= 1
+            produk.save()
+        for produk in Produk.objects.filter(id__in=rng.sample(ids, options['hapus'])):
+            produk.delete()
+
+        *_, watermark_baru, etag = self.ikuti_sync(since=watermark)
+
+        skenario = [
+            ('muat ulang ?mode=kasir', self.muat_ulang),
+            ('sync tanpa since', self.ikuti_sync),
+            ('sync delta', lambda: self.ikuti_sync(since=watermark)),
+            ('sync 304 (If-None-Match)', lambda: self.ikuti_sync(since=watermark_baru, etag=etag)),
+        ]
+        self.stdout.write(
+            f"{options['produk']} produk, {options['ubah']} diubah dan {options['hapus']} dihapus di antara sinkronisasi; "
+            f"median dari {options['ulang']} pengulangan"
+        )
+        self.stdout.write(f"{'skenario':<28}{'request':>9}{'waktu (ms)':>12}{'byte':>12}")
+        for label, fungsi in skenario:
+            hasil = [fungsi() for _ in range(options['ulang'])]
+            request, _, byte, *_ = hasil[0]
+            waktu = statistics.median(h[1] for h in hasil)
+            self.stdout.write(f"{label:<28}{request:>9}{waktu:>12.1f}{byte:>12}")
+
+    def sync(self, etag=None, **params):
+        request = self.factory.get('/api/produk/sync/', params, **({'HTTP_IF_NONE_MATCH': etag} if etag else {}))
+        force_authenticate(request, user=self.user)
+        response = ProdukSyncView.as_view()(request)
+        response.render()
+        return response
+
+    def ikuti_sync(self, since=None, etag=None):
+        """
+        Mengikuti watermark sampai ada_lagi False, seperti kasir. Mengembalikan (jumlah request, ms, byte,
+        watermark terakhir, ETag terakhir).
+        """
+        mulai, jumlah, byte = time.perf_counter(), 0, 0
+        while True:
+            params = {'since': since} if since else {}
+            response = self.sync(etag=etag, limit=5000, **params)
+            jumlah += 1
+            byte += len(response.content)
+            if response.status_code == 304:
+                return jumlah, (time.perf_counter() - mulai) * 1000, byte, since, etag
+            since = response.data['watermark']
+            if not response.data['ada_lagi']:
+                return jumlah, (time.perf_counter() - mulai) * 1000, byte, since, response['ETag']
+
+    def muat_ulang(self):
+        mulai, jumlah, byte, params = time.perf_counter(), 0, 0, {'mode': 'kasir', 'page_size': 500}
+        while True:
+            request = self.factory.get('/api/produk/', params)
+            force_authenticate(request, user=self.user)
+            response = ProdukListView.as_view()(request)
+            response.render()
+            jumlah += 1
+            byte += len(response.content)
+            if not response.data['next']:
+                return jumlah, (time.perf_counter() - mulai) * 1000, byte
+            params['cursor'] = parse_qs(urlparse(response.data['next']).query)['cursor'][0]
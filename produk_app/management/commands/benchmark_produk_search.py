@@ -0,0 +1,126 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from produk_app.models import Kategori, Produk
+from produk_app.search import cari_typeahead, optimasi_indeks
+from produk_app.serializers import ProdukKasirSerializer
+
+PREFIX = 'benchmark-cari'
+
+MEREK = [
+    'Indomie', 'Sedaap', 'Aqua', 'Le Minerale', 'Teh Botol', 'Sosro', 'Ultra', 'Frisian Flag', 'Indomilk', 'Chitato',
+    'Qtela', 'Oreo', 'Roma', 'Khong Guan', 'Sari Roti', 'Bimoli', 'Sunco', 'Rinso', 'Sunlight', 'Lifebuoy',
+    'Pepsodent', 'Dettol', 'Mamypoko', 'Kapal Api', 'ABC', 'Nescafe', 'Good Day', 'Gulaku', 'Rose Brand', 'Sasa',
+    'Royco', 'Masako', 'Bango', 'Teh Pucuk', 'Pocari Sweat', 'Mizone', 'Silverqueen', 'Tango', 'Beng Beng', 'Kusuka',
+]
+VARIAN = [
+    'Goreng', 'Kuah', 'Soto', 'Rendang', 'Ayam Bawang', 'Kari', 'Original', 'Coklat', 'Vanila', 'Stroberi', 'Keju',
+    'Pedas', 'Manis', 'Lemon', 'Jeruk', 'Mangga', 'Susu', 'Kopi', 'Gula Aren', 'Sabun Cair', 'Sikat Gigi', 'Shampo',
+    'Deterjen', 'Minyak Goreng', 'Tepung', 'Beras', 'Saus Sambal', 'Kecap Manis', 'Sirup', 'Teh Hijau',
+]
+UKURAN = [
+    '50g', '85g', '100g', '250g', '500g', '1kg', '2kg', '5kg', '250ml', '330ml', '600ml', '1L', '1.5L', '2L',
+    'Sachet', 'Pouch', 'Botol', 'Kaleng', 'Dus', 'Pak',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark typeahead produk: index pencarian (produk_app.search) dibandingkan LIKE '%q%' pada nama/kode, "
+        "dengan query berupa awalan yang diketik kasir. Katalog benchmark dibuat di database aktif dan dihapus "
+        "setelah selesai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--produk', type=int, default=200_000, help="Jumlah SKU katalog (default 200000).")
+        parser.add_argument('--queries', type=int, default=2000, help="Jumlah query per metode (default 2000).")
+        parser.add_argument('--limit', type=int, default=10, help="Jumlah hasil per query (default 10).")
+
+    def handle(self, *args, **options):
+        if Kategori.objects.filter(nama=PREFIX).exists():
+            raise CommandError(f"Data benchmark sebelumnya masih ada (kategori {PREFIX}); hapus dulu.")
+        if Produk.objects.filter(Q(kode__startswith='BM') | Q(barcode__startswith='29')).exists():
+            raise CommandError("Kode BM* atau barcode 29* sudah dipakai produk lain; jalankan di database terpisah.")
+
+        rng = random.Random(42)
+        mulai = time.perf_counter()
+        nama = self.seed(rng, options['produk'])
+        self.stdout.write(f"{options['produk']} produk dibuat dan diindex dalam {time.perf_counter() - mulai:.1f} detik")
+        try:
+            queries = self.buat_queries(rng, nama, options['queries'])
+            metode = [
+                ('like', lambda q: self.cari_like(q, options['limit'])),
+                ('index', lambda q: cari_typeahead(q, options['limit'])),
+            ]
+            self.stdout.write(f"{len(queries)} query typeahead, limit {options['limit']}, termasuk serialisasi hasil")
+            self.stdout.write(f"{'metode':<8}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'maks (ms)':>11}{'hasil/query':>13}")
+            for label, cari in metode:
+                latensi, jumlah = self.ukur(cari, queries)
+                self.stdout.write(
+                    f"{label:<8}{self.persentil(latensi, 50):>10.2f}{self.persentil(latensi, 95):>10.2f}"
+                    f"{self.persentil(latensi, 99):>10.2f}{latensi[-1]:>11.2f}{jumlah / len(queries):>13.1f}"
+                )
+        finally:
+            Produk.objects.filter(kategori__nama=PREFIX).delete()
+            Kategori.objects.filter(nama=PREFIX).delete()
+
+    def seed(self, rng, jumlah):
+        kategori = Kategori.objects.create(nama=PREFIX)
+        nama = [f'{rng.choice(MEREK)} {rng.choice(VARIAN)} {rng.choice(UKURAN)}' for _ in range(jumlah)]
+        Produk.objects.bulk_create(
+            (
+                Produk(
+                    kode=f'BM{i:07d}', nama=nama[i], harga_khusus=Decimal('900'), harga_umum=Decimal('1000'),
+                    stok=100, kategori=kategori, barcode=f'29{i:011d}',
+                )
+                for i in range(jumlah)
+            ),
+            batch_size=5000,
+        )
+        # Seperti setelah impor katalog: gabungkan segmen index FTS5
+        optimasi_indeks(connection)
+        return nama
+
+    def buat_queries(self, rng, nama, jumlah):
+        # Ketikan kasir: awalan kata pertama, dua kata pertama yang belum selesai, awalan kode, atau salah ketik
+        queries = []
+        for _ in range(jumlah):
+            kata = rng.choice(nama).split()
+            jenis = rng.random()
+            if jenis < 0.4:
+                queries.append(kata[0][:rng.randint(2, len(kata[0]))])
+            elif jenis < 0.7:
+                queries.append(' '.join(kata[:2])[:rng.randint(len(kata[0]) + 2, len(kata[0]) + 1 + len(kata[1]))])
+            elif jenis < 0.9:
+                queries.append(f'BM{rng.randrange(len(nama)):07d}'[:rng.randint(5, 9)])
+            else:
+                queries.append(kata[0][:3] + 'x' + kata[0][3:])
+        return queries
+
+    def cari_like(self, q, limit):
+        # Perilaku SearchFilter sebelumnya: setiap kata icontains di nama atau kode
+        queryset = Produk.objects.all()
+        for kata in q.split():
+            queryset = queryset.filter(Q(nama__icontains=kata) | Q(kode__icontains=kata))
+        return list(queryset[:limit])
+
+    def ukur(self, cari, queries):
+        latensi = []
+        jumlah = 0
+        for q in queries:
+            mulai = time.perf_counter()
+            data = ProdukKasirSerializer(cari(q), many=True).data
+            latensi.append((time.perf_counter() - mulai) * 1000)
+            jumlah += len(data)
+        return sorted(latensi), jumlah
+
+    def persentil(self, data, p):
+        if len(data) < 2:
+            return data[0] if data else 0
+        return statistics.quantiles(data, n=100, method='inclusive')[p - 1]
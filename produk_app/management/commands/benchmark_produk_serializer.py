@@ -0,0 +1,59 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from produk_app.models import Produk
+from produk_app.serializers import ProdukKasirSerializer, ProdukSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark serialisasi satu halaman katalog produk: ProdukSerializer lengkap, sparse fieldset "
+        "(?fields=) dan mode kasir (?mode=kasir), termasuk render JSON. Memakai instance Produk di memori, "
+        "tanpa database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--produk', type=int, default=500, help="Jumlah produk per halaman (default 500).")
+        parser.add_argument('--ulang', type=int, default=50, help="Jumlah pengulangan per varian (default 50).")
+
+    def handle(self, *args, **options):
+        sekarang = timezone.now()
+        produk = [
+            Produk(
+                id=i, kode=f'BRG-{i:06d}', nama=f'Produk katalog nomor {i} kemasan 250g',
+                deskripsi='Deskripsi produk untuk katalog. ' * 8, harga_khusus=Decimal('12500.00'),
+                harga_umum=Decimal('13750.00'), stok=i % 500, kategori_id=1, barcode=f'899{i:010d}',
+                created_at=sekarang, updated_at=sekarang,
+            )
+            for i in range(1, options['produk'] + 1)
+        ]
+        varian = [
+            ('lengkap', lambda: ProdukSerializer(produk, many=True).data),
+            ('fields=kode,nama,harga_umum,stok', lambda: ProdukSerializer(produk, many=True, fields=['kode', 'nama', 'harga_umum', 'stok']).data),
+            ('mode=kasir', lambda: ProdukKasirSerializer(produk, many=True).data),
+        ]
+
+        renderer = JSONRenderer()
+        self.stdout.write(f"{options['produk']} produk per halaman, median dari {options['ulang']} pengulangan")
+        self.stdout.write(f"{'varian':<36}{'serialisasi (ms)':>18}{'render (ms)':>13}{'byte/produk':>13}{'relatif':>9}")
+        acuan = None
+        for label, serialisasi in varian:
+            waktu_serialisasi, waktu_render = [], []
+            for _ in range(options['ulang']):
+                mulai = time.perf_counter()
+                data = serialisasi()
+                tengah = time.perf_counter()
+                body = renderer.render(data)
+                waktu_serialisasi.append((tengah - mulai) * 1000)
+                waktu_render.append((time.perf_counter() - tengah) * 1000)
+            total = statistics.median(waktu_serialisasi) + statistics.median(waktu_render)
+            acuan = acuan or total
+            self.stdout.write(
+                f"{label:<36}{statistics.median(waktu_serialisasi):>18.2f}{statistics.median(waktu_render):>13.2f}"
+                f"{len(body) / len(produk):>13.0f}{total / acuan:>9.2f}"
+            )
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from produk_app.sync import get_config, hapus_tombstone_lama
+
+
+class Command(BaseCommand):
+    help = (
+        "Retensi tombstone produk: menghapus catatan produk yang dihapus lebih lama dari --days hari "
+        "(default KATALOG_SYNC['RETENSI_TOMBSTONE']). Kasir yang belum sinkron sejak itu mendapat katalog lengkap."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Umur minimum tombstone yang dihapus, dalam hari.")
+
+    def handle(self, *args, **options):
+        retensi = get_config()['RETENSI_TOMBSTONE']
+        days = options['days'] if options['days'] is not None else retensi
+        if days < retensi:
+            raise CommandError(f"--days tidak boleh kurang dari RETENSI_TOMBSTONE ({retensi} hari).")
+
+        sebelum = timezone.now() - timedelta(days=days)
+        jumlah = hapus_tombstone_lama(sebelum)
+        self.stdout.write(self.style.SUCCESS(f"{jumlah} tombstone produk sebelum {sebelum:%Y-%m-%d %H:%M} dihapus."))
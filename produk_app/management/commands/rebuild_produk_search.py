@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from produk_app.search import bangun_ulang_indeks, optimasi_indeks
+
+
+class Command(BaseCommand):
+    help = (
+        "Membangun ulang index pencarian produk dari tabel produk (memasang trigger yang hilang), "
+        "misalnya setelah impor atau penghapusan produk dalam jumlah besar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Alias database (default 'default').")
+        parser.add_argument('--optimize-only', action='store_true', help="Hanya menggabungkan segmen index tanpa membangun ulang isinya.")
+
+    def handle(self, *args, **options):
+        koneksi = connections[options['database']]
+        if options['optimize_only']:
+            optimasi_indeks(koneksi)
+            self.stdout.write("Segmen index pencarian produk digabungkan.")
+        else:
+            bangun_ulang_indeks(koneksi)
+            self.stdout.write(self.style.SUCCESS("Index pencarian produk dibangun ulang."))
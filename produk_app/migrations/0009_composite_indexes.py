@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produk_app', '0008_alter_kategori_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stocklog',
+            index=models.Index(fields=['produk', '-created_at'], name='stocklog_produk_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='stocklog',
+            name='produk',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='produk_app.produk'),
+        ),
+    ]
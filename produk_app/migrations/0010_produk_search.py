@@ -0,0 +1,75 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:12
+
+from django.db import migrations
+
+# DDL dibekukan di sini; produk_app.search boleh berubah tanpa mengubah migrasi yang sudah berjalan
+SQL_SQLITE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS produk_app_produk_fts USING fts5(
+        kode, nama, barcode,
+        content='produk_app_produk', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produk_app_produk_fts_ai AFTER INSERT ON produk_app_produk BEGIN
+        INSERT INTO produk_app_produk_fts(rowid, kode, nama, barcode) VALUES (new.id, new.kode, new.nama, new.barcode);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produk_app_produk_fts_ad AFTER DELETE ON produk_app_produk BEGIN
+        INSERT INTO produk_app_produk_fts(produk_app_produk_fts, rowid, kode, nama, barcode) VALUES ('delete', old.id, old.kode, old.nama, old.barcode);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS produk_app_produk_fts_au AFTER UPDATE OF kode, nama, barcode ON produk_app_produk
+    WHEN old.kode IS NOT new.kode OR old.nama IS NOT new.nama OR old.barcode IS NOT new.barcode BEGIN
+        INSERT INTO produk_app_produk_fts(produk_app_produk_fts, rowid, kode, nama, barcode) VALUES ('delete', old.id, old.kode, old.nama, old.barcode);
+        INSERT INTO produk_app_produk_fts(rowid, kode, nama, barcode) VALUES (new.id, new.kode, new.nama, new.barcode);
+    END
+    """,
+    "INSERT INTO produk_app_produk_fts(produk_app_produk_fts) VALUES ('rebuild')",
+]
+
+SQL_SQLITE_HAPUS = [
+    "DROP TRIGGER IF EXISTS produk_app_produk_fts_ai",
+    "DROP TRIGGER IF EXISTS produk_app_produk_fts_ad",
+    "DROP TRIGGER IF EXISTS produk_app_produk_fts_au",
+    "DROP TABLE IF EXISTS produk_app_produk_fts",
+]
+
+SQL_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS produk_nama_trgm_idx ON produk_app_produk USING gin (UPPER(nama::text) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS produk_kode_trgm_idx ON produk_app_produk USING gin (UPPER(kode::text) gin_trgm_ops)",
+]
+
+SQL_POSTGRESQL_HAPUS = [
+    "DROP INDEX IF EXISTS produk_nama_trgm_idx",
+    "DROP INDEX IF EXISTS produk_kode_trgm_idx",
+]
+
+
+def jalankan(schema_editor, per_vendor):
+    for sql in per_vendor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def pasang_indeks_pencarian(apps, schema_editor):
+    jalankan(schema_editor, {'sqlite': SQL_SQLITE, 'postgresql': SQL_POSTGRESQL})
+
+
+def hapus_indeks_pencarian(apps, schema_editor):
+    jalankan(schema_editor, {'sqlite': SQL_SQLITE_HAPUS, 'postgresql': SQL_POSTGRESQL_HAPUS})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produk_app', '0009_composite_indexes'),
+    ]
+
+    operations = [
+        # FTS5 + trigger di SQLite, index trigram di PostgreSQL (lihat produk_app.search)
+        migrations.RunPython(pasang_indeks_pencarian, hapus_indeks_pencarian),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.1 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produk_app', '0010_produk_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProdukTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('produk_id', models.BigIntegerField()),
+                ('kode', models.CharField(max_length=50)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Tombstone Produk',
+                'verbose_name_plural': 'Tombstone Produk',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='produk',
+            index=models.Index(fields=['updated_at', 'id'], name='produk_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produktombstone',
+            index=models.Index(fields=['deleted_at'], name='produktombstone_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:40
+
+from django.db import migrations
+
+
+def pasang_indeks_barcode(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS produk_barcode_trgm_idx ON produk_app_produk USING gin (UPPER(barcode::text) gin_trgm_ops)"
+        )
+
+
+def hapus_indeks_barcode(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS produk_barcode_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produk_app', '0011_produk_sync'),
+    ]
+
+    operations = [
+        # Index trigram barcode untuk icontains di PostgreSQL; SQLite sudah memakai kolom barcode di FTS5
+        migrations.RunPython(pasang_indeks_barcode, hapus_indeks_barcode),
+    ]
@@ -54,10 +54,33 @@ class Produk(models.Model):
     display_harga_khusus.short_description = "Harga Khusus"
     display_harga_umum.short_description = "Harga Umum"
 
+    class Meta:
+        indexes = [
+            # Sinkronisasi katalog kasir: WHERE (updated_at, id) > watermark ORDER BY updated_at, id
+            models.Index(fields=['updated_at', 'id'], name='produk_updated_idx'),
+        ]
+
+
+class ProdukTombstone(models.Model):
+    """Catatan produk yang sudah dihapus, agar kasir bisa menghapusnya dari katalog lokal (produk_app.sync)."""
+    produk_id = models.BigIntegerField()
+    kode = models.CharField(max_length=50)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.kode} dihapus pada {self.deleted_at}"
+
+    class Meta:
+        verbose_name = "Tombstone Produk"
+        verbose_name_plural = "Tombstone Produk"
+        indexes = [
+            models.Index(fields=['deleted_at'], name='produktombstone_deleted_idx'),
+        ]
+
 
 
 class StockLog(models.Model):
-    produk = models.ForeignKey('Produk', on_delete=models.CASCADE)
+    produk = models.ForeignKey('Produk', on_delete=models.CASCADE, db_index=False)  # Di-index lewat stocklog_produk_created_idx
     perubahan = models.IntegerField()
     deskripsi = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -68,4 +91,8 @@ class StockLog(models.Model):
     class Meta:
         verbose_name = "Log Perubahan Stok"
         verbose_name_plural = "Log Perubahan Stok"
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Riwayat stok per produk: WHERE produk = ? ORDER BY created_at DESC
+            models.Index(fields=['produk', '-created_at'], name='stocklog_produk_created_idx'),
+        ]
\ No newline at end of file
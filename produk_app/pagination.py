@@ -1,6 +1,12 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 class CustomPagination(PageNumberPagination):
     page_size = 10  # Ukuran halaman default
     page_size_query_param = 'page_size'  # Mengizinkan klien untuk mengatur ukuran halaman menggunakan parameter query
     max_page_size = 100  # Batas maksimum ukuran halaman
+
+class ProdukCursorPagination(CursorPagination):
+    page_size = 50  # Ukuran halaman default katalog
+    page_size_query_param = 'page_size'  # Mengizinkan klien untuk mengatur ukuran halaman menggunakan parameter query
+    max_page_size = 500  # Batas maksimum ukuran halaman
+    ordering = ('id',)  # Keyset id: halaman stabil walau produk ditambah saat katalog sedang dimuat
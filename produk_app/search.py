@@ -0,0 +1,228 @@
+"""
+Pencarian teks produk untuk kotak cari kasir (typeahead) dan parameter ?search= di ProdukListView.
+
+Setiap kata di query dicocokkan sebagai awalan kata pada kode, nama, atau barcode, dan semua kata harus
+cocok ("indo gor" menemukan "Indomie Goreng 85g"). Index dipilih sesuai database:
+
+- SQLite: tabel FTS5 `produk_app_produk_fts` (external content atas produk_app_produk) dengan index awalan,
+  diperbarui oleh trigger database saat kode/nama/barcode berubah. Trigger juga berlaku untuk bulk_create
+  dan QuerySet.update, dan tidak menyentuh index saat hanya stok/harga yang berubah.
+- PostgreSQL: index GIN trigram (pg_trgm) atas UPPER(kode), UPPER(nama) dan UPPER(barcode), sehingga
+  icontains pada ketiga kolom memakai index (BitmapOr) dan tidak jatuh ke seq scan.
+- Database lain: icontains biasa.
+
+Typeahead mengurutkan hasil: kode/barcode yang sama persis lebih dulu, lalu skor bm25 (kode dan barcode
+berbobot lebih tinggi dari nama). Agar latensi tetap rendah untuk awalan yang sangat umum, bm25 hanya
+dihitung untuk kandidat: KANDIDAT kecocokan pertama di kolom kode/barcode ditambah KANDIDAT kecocokan
+pertama di kolom mana pun. Kecocokan kode/barcode (yang bobotnya paling tinggi) dengan demikian tidak
+terbuang oleh batas kandidat; bila ada lebih dari KANDIDAT produk yang hanya cocok lewat nama, yang dinilai
+hanya KANDIDAT pertama menurut urutan id, sehingga peringkat di antara kecocokan nama adalah perkiraan.
+
+Insert/hapus massal (impor katalog) meninggalkan banyak segmen kecil di index FTS5 yang memperlambat query;
+jalankan `manage.py rebuild_produk_search` sesudahnya.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length
+from rest_framework import filters
+
+from .models import Produk
+
+TABEL_FTS = 'produk_app_produk_fts'
+KOLOM_INDEKS = ('kode', 'nama', 'barcode')
+KANDIDAT = 500          # Jumlah kecocokan FTS yang diberi skor bm25 per query typeahead
+BOBOT_BM25 = (10.0, 1.0, 5.0)  # kode, nama, barcode
+
+KATA = re.compile(r'\w+')
+
+SQL_SQLITE = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABEL_FTS} USING fts5(
+        kode, nama, barcode,
+        content='produk_app_produk', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABEL_FTS}_ai AFTER INSERT ON produk_app_produk BEGIN
+        INSERT INTO {TABEL_FTS}(rowid, kode, nama, barcode) VALUES (new.id, new.kode, new.nama, new.barcode);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABEL_FTS}_ad AFTER DELETE ON produk_app_produk BEGIN
+        INSERT INTO {TABEL_FTS}({TABEL_FTS}, rowid, kode, nama, barcode) VALUES ('delete', old.id, old.kode, old.nama, old.barcode);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABEL_FTS}_au AFTER UPDATE OF kode, nama, barcode ON produk_app_produk
+    WHEN old.kode IS NOT new.kode OR old.nama IS NOT new.nama OR old.barcode IS NOT new.barcode BEGIN
+        INSERT INTO {TABEL_FTS}({TABEL_FTS}, rowid, kode, nama, barcode) VALUES ('delete', old.id, old.kode, old.nama, old.barcode);
+        INSERT INTO {TABEL_FTS}(rowid, kode, nama, barcode) VALUES (new.id, new.kode, new.nama, new.barcode);
+    END
+    """,
+]
+
+SQL_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS produk_nama_trgm_idx ON produk_app_produk USING gin (UPPER(nama::text) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS produk_kode_trgm_idx ON produk_app_produk USING gin (UPPER(kode::text) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS produk_barcode_trgm_idx ON produk_app_produk USING gin (UPPER(barcode::text) gin_trgm_ops)",
+]
+
+TRIGGER_SQLITE = (f'{TABEL_FTS}_ai', f'{TABEL_FTS}_ad', f'{TABEL_FTS}_au')
+
+
+def pasang_indeks(koneksi):
+    """Membuat index pencarian untuk database `koneksi`; aman dipanggil berulang."""
+    if koneksi.vendor == 'sqlite':
+        with koneksi.cursor() as cursor:
+            for sql in SQL_SQLITE:
+                cursor.execute(sql)
+    elif koneksi.vendor == 'postgresql':
+        with koneksi.cursor() as cursor:
+            for sql in SQL_POSTGRESQL:
+                cursor.execute(sql)
+
+
+def hapus_indeks(koneksi):
+    if koneksi.vendor == 'sqlite':
+        with koneksi.cursor() as cursor:
+            for trigger in TRIGGER_SQLITE:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute(f"DROP TABLE IF EXISTS {TABEL_FTS}")
+    elif koneksi.vendor == 'postgresql':
+        with koneksi.cursor() as cursor:
+            cursor.execute("DROP INDEX IF EXISTS produk_nama_trgm_idx")
+            cursor.execute("DROP INDEX IF EXISTS produk_kode_trgm_idx")
+            cursor.execute("DROP INDEX IF EXISTS produk_barcode_trgm_idx")
+
+
+def bangun_ulang_indeks(koneksi):
+    """Memasang index lalu mengisi ulang isi FTS dari tabel produk (SQLite)."""
+    pasang_indeks(koneksi)
+    if koneksi.vendor == 'sqlite':
+        with koneksi.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {TABEL_FTS}({TABEL_FTS}) VALUES ('rebuild')")
+
+
+def optimasi_indeks(koneksi):
+    """Menggabungkan segmen index FTS5 menjadi satu (SQLite)."""
+    if koneksi.vendor == 'sqlite':
+        with koneksi.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {TABEL_FTS}({TABEL_FTS}) VALUES ('optimize')")
+
+
+def perbaiki_trigger(koneksi):
+    """
+    SQLite membuang trigger saat migrasi membuat ulang tabel produk (ALTER lewat tabel baru). Dipanggil
+    setelah migrate: bila tabel FTS ada tetapi triggernya hilang, trigger dipasang lagi dan isi index
+    dibangun ulang. Mengembalikan True bila ada yang diperbaiki.
+    """
+    if koneksi.vendor != 'sqlite':
+        return False
+    with koneksi.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = %s OR (type = 'trigger' AND tbl_name = 'produk_app_produk')",
+            [TABEL_FTS],
+        )
+        ada = {nama for nama, in cursor.fetchall()}
+    if TABEL_FTS not in ada or ada.issuperset(TRIGGER_SQLITE):
+        return False
+    bangun_ulang_indeks(koneksi)
+    return True
+
+
+def ekspresi_match(q, kolom=None):
+    """
+    Query FTS5: setiap kata menjadi awalan yang di-quote, digabung AND, opsional dibatasi ke `kolom`.
+    None bila tidak ada kata.
+    """
+    kata = KATA.findall(q or '')
+    if not kata:
+        return None
+    ekspresi = ' '.join(f'"{k}"*' for k in kata)
+    return f"{{{' '.join(kolom)}}} : ({ekspresi})" if kolom else ekspresi
+
+
+def filter_pencarian(queryset, q, kolom=KOLOM_INDEKS):
+    """
+    Membatasi `queryset` produk ke hasil pencarian `q` di `kolom` (bagian dari KOLOM_INDEKS) tanpa
+    mengubah urutannya.
+    """
+    tidak_terindeks = set(kolom) - set(KOLOM_INDEKS)
+    if tidak_terindeks:
+        raise ImproperlyConfigured(f"Kolom pencarian produk tanpa index: {', '.join(sorted(tidak_terindeks))}")
+    kata = KATA.findall(q or '')
+    if not kata:
+        return queryset
+    if connection.vendor == 'sqlite':
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {TABEL_FTS} WHERE {TABEL_FTS} MATCH %s",
+            [ekspresi_match(q, None if set(kolom) == set(KOLOM_INDEKS) else kolom)],
+        ))
+    for k in kata:
+        kondisi = Q()
+        for nama in kolom:
+            kondisi |= Q(**{f'{nama}__icontains': k})
+        queryset = queryset.filter(kondisi)
+    return queryset
+
+
+def cari_typeahead(q, limit=10, kandidat=KANDIDAT):
+    """Maksimal `limit` produk yang cocok dengan `q`, urut dari yang paling relevan (lihat docstring modul)."""
+    q = (q or '').strip()
+    if not KATA.search(q):
+        return []
+    sama_persis = Q(kode=q) | Q(barcode=q)
+
+    if connection.vendor != 'sqlite':
+        skor = Case(
+            When(sama_persis, then=Value(0)),
+            When(kode__istartswith=q, then=Value(1)),
+            When(nama__istartswith=q, then=Value(2)),
+            default=Value(3),
+            output_field=IntegerField(),
+        )
+        return list(
+            Produk.objects
+            .filter(Q(pk__in=filter_pencarian(Produk.objects.all(), q).values('pk')) | sama_persis)
+            .annotate(skor=skor)
+            .order_by('skor', Length('nama'), 'id')[:limit]
+        )
+
+    # bm25 dihitung di dalam setiap subquery ber-LIMIT saja; baris yang ada di keduanya memakai skor terbaik
+    kandidat_sql = f"SELECT rowid, bm25({TABEL_FTS}, %s, %s, %s) AS skor FROM {TABEL_FTS} WHERE {TABEL_FTS} MATCH %s LIMIT %s"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rowid, MIN(skor) AS skor FROM (
+                SELECT * FROM ({kandidat_sql}) UNION ALL SELECT * FROM ({kandidat_sql})
+            ) GROUP BY rowid ORDER BY skor LIMIT %s
+            """,
+            [
+                *BOBOT_BM25, ekspresi_match(q, kolom=('kode', 'barcode')), kandidat,
+                *BOBOT_BM25, ekspresi_match(q), kandidat,
+                limit,
+            ],
+        )
+        urutan = {produk_id: i for i, (produk_id, _) in enumerate(cursor.fetchall())}
+
+    produk = Produk.objects.filter(Q(id__in=urutan) | sama_persis)
+    # Kecocokan persis (hasil scan kode/barcode) selalu di atas, lalu urutan skor bm25
+    hasil = sorted(produk, key=lambda p: (p.kode != q and p.barcode != q, urutan.get(p.id, len(urutan))))
+    return hasil[:limit]
+
+
+class ProdukSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter untuk Produk yang memakai index pencarian alih-alih LIKE '%q%' di setiap field.
+    `search_fields` view harus bagian dari KOLOM_INDEKS dan tanpa prefix lookup (^, =, @, $).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        kolom = self.get_search_fields(view, request) or KOLOM_INDEKS
+        return filter_pencarian(queryset, request.query_params.get(self.search_param, ''), kolom)
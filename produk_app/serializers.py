@@ -8,8 +8,17 @@ class KategoriSerializer(serializers.ModelSerializer):
         model = Kategori
         fields = ['id', 'nama']
 
+class FieldSelectionMixin:
+    """Menerima argumen `fields` (daftar nama field) agar hanya field tersebut yang diserialisasi."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for nama in set(self.fields) - set(fields):
+                self.fields.pop(nama)
+
 # Serializer untuk Produk
-class ProdukSerializer(serializers.ModelSerializer):
+class ProdukSerializer(FieldSelectionMixin, serializers.ModelSerializer):
     harga_khusus_rupiah = serializers.SerializerMethodField()
     harga_umum_rupiah = serializers.SerializerMethodField()
 
@@ -67,6 +76,15 @@ class ProdukSerializer(serializers.ModelSerializer):
         data['harga_umum'] = harga_umum
         return data
 
+class ProdukKasirSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    """
+    Representasi ringkas untuk kasir (typeahead dan katalog ?mode=kasir): hanya field model tanpa
+    deskripsi dan tanpa SerializerMethodField format Rupiah.
+    """
+    class Meta:
+        model = Produk
+        fields = ['id', 'kode', 'nama', 'barcode', 'harga_khusus', 'harga_umum', 'stok']
+
 class StockLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = StockLog
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, When
+from django.utils import timezone
+
+from .cache import get_produk_cache
+from .models import Produk
+
+
+class StokTidakCukup(Exception):
+    """Dilempar jika satu atau lebih produk tidak memiliki stok yang cukup."""
+
+    def __init__(self, kekurangan):
+        self.kekurangan = kekurangan
+        super().__init__("Stok tidak cukup untuk: " + ", ".join(str(k['nama'] or k['produk_id']) for k in kekurangan))
+
+
+def hitung_kekurangan(permintaan, produk_map, semua=False):
+    """
+    Mengembalikan daftar kekurangan stok per produk berdasarkan produk yang sudah dibaca.
+    Jika `semua` True, setiap produk yang diminta dilaporkan beserta stok terbarunya.
+    """
+    kekurangan = []
+    for produk_id, jumlah in sorted(permintaan.items()):
+        produk = produk_map.get(produk_id)
+        tersedia = produk.stok if produk is not None else 0
+        if semua or jumlah > tersedia:
+            kekurangan.append({
+                'produk_id': produk_id,
+                'kode': produk.kode if produk is not None else None,
+                'nama': produk.nama if produk is not None else None,
+                'diminta': jumlah,
+                'tersedia': tersedia,
+            })
+    return kekurangan
+
+
+def reservasi_stok(permintaan):
+    """
+    Mengurangi stok beberapa produk sekaligus secara aman terhadap transaksi paralel.
+
+    `permintaan` adalah dict {produk_id: jumlah}. Baris produk dikunci dengan urutan id
+    yang konsisten (agar dua kasir tidak saling deadlock), lalu stok dikurangi dengan satu
+    UPDATE bersyarat `stok >= jumlah`. Jika ada produk yang kurang, tidak ada stok yang
+    berubah dan StokTidakCukup dilempar dengan daftar semua kekurangan.
+
+    Mengembalikan dict {produk_id: Produk} berisi produk yang dikunci (nilai stok sebelum
+    dikurangi), sehingga pemanggil bisa memakai harga tanpa query tambahan.
+    """
+    produk_ids = sorted(permintaan)
+    with transaction.atomic():
+        produk_map = Produk.objects.select_for_update().order_by('id').in_bulk(produk_ids)
+
+        kekurangan = hitung_kekurangan(permintaan, produk_map)
+        if kekurangan:
+            raise StokTidakCukup(kekurangan)
+
+        kondisi = Q()
+        for produk_id, jumlah in permintaan.items():
+            kondisi |= Q(id=produk_id, stok__gte=jumlah)
+        updated = Produk.objects.filter(kondisi).update(
+            stok=Case(
+                *[When(id=produk_id, then=F('stok') - jumlah) for produk_id, jumlah in permintaan.items()],
+                output_field=IntegerField(),
+            ),
+            updated_at=timezone.now(),
+        )
+
+        if updated != len(permintaan):
+            # Database tanpa row lock (mis. SQLite) bisa kalah balapan di sini; baca ulang stok
+            # terbaru untuk laporan, lalu batalkan seluruh pengurangan lewat rollback savepoint.
+            terbaru = Produk.objects.in_bulk(produk_ids)
+            raise StokTidakCukup(hitung_kekurangan(permintaan, terbaru) or hitung_kekurangan(permintaan, terbaru, semua=True))
+
+        # Payload cache lookup memuat stok, jadi hapus setelah pengurangan ter-commit
+        transaction.on_commit(lambda: invalidasi_cache_stok(produk_map.values()))
+
+    return produk_map
+
+
+def invalidasi_cache_stok(produk_list):
+    cache = get_produk_cache()
+    for produk in produk_list:
+        cache.invalidate_produk(produk)
@@ -0,0 +1,42 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .cache import get_produk_cache
+from .models import Produk, ProdukTombstone
+from .search import perbaiki_trigger
+
+
+@receiver(post_init, sender=Produk)
+def simpan_lookup_asal(sender, instance, **kwargs):
+    """Mencatat kode/barcode saat dimuat, agar kunci cache lama ikut dihapus jika keduanya berubah."""
+    # Lewat __dict__ agar field yang di-defer (QuerySet.only) tidak memicu query
+    instance._lookup_asal = (instance.__dict__.get('kode'), instance.__dict__.get('barcode'))
+
+
+@receiver(post_save, sender=Produk)
+@receiver(post_delete, sender=Produk)
+def invalidasi_cache_produk(sender, instance, **kwargs):
+    """Menghapus entri cache lookup produk setelah perubahan ter-commit."""
+    produk_id, kode, barcode = instance.pk, instance.kode, instance.barcode
+    kode_asal, barcode_asal = getattr(instance, '_lookup_asal', (None, None))
+
+    def invalidasi():
+        cache = get_produk_cache()
+        cache.invalidate(produk_id, kode=kode, barcode=barcode)
+        if (kode_asal, barcode_asal) != (kode, barcode):
+            cache.invalidate(produk_id, kode=kode_asal, barcode=barcode_asal)
+
+    transaction.on_commit(invalidasi)
+    instance._lookup_asal = (kode, barcode)
+
+
+@receiver(post_delete, sender=Produk)
+def catat_tombstone(sender, instance, **kwargs):
+    """Mencatat produk yang dihapus (termasuk lewat cascade kategori) untuk sinkronisasi katalog kasir."""
+    ProdukTombstone.objects.create(produk_id=instance.pk, kode=instance.kode)
+
+
+def perbaiki_indeks_pencarian(using, **kwargs):
+    """Dipasang untuk post_migrate: memasang lagi trigger FTS yang hilang karena tabel produk dibuat ulang."""
+    perbaiki_trigger(connections[using])
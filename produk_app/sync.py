@@ -0,0 +1,141 @@
+"""
+Sinkronisasi delta katalog untuk kasir yang menyimpan katalog lokal (offline).
+
+Kasir memanggil produk/sync/ tanpa `since` sekali untuk memuat seluruh katalog, lalu selanjutnya hanya
+mengirim watermark dari respons terakhir dan menerima produk yang dibuat/diubah (Produk.updated_at) serta
+id produk yang dihapus (ProdukTombstone) sejak watermark itu.
+
+- Watermark berisi keyset produk (updated_at, id), batas waktu tombstone yang sudah terkirim, dan `dasar`:
+  waktu sampai mana katalog kasir sudah lengkap sebelum rangkaian halaman ini dimulai (0 untuk muat awal).
+  Dikodekan `<mikrodetik updated_at>-<id>-<mikrodetik tombstone>-<mikrodetik dasar>`. Dengan keyset,
+  perubahan massal yang updated_at-nya sama tetap bisa dipecah per halaman tanpa baris terlewat atau berulang.
+- Produk yang dibuat setelah `dasar` dikirim di `dibuat`, selain itu di `diubah`; jadi setiap halaman muat
+  awal berisi `dibuat` saja. Produk yang berubah lagi selagi kasir masih mengambil halaman berikutnya bisa
+  muncul dua kali di `dibuat`, sehingga kasir menyimpan `dibuat` sebagai insert-atau-ganti per id.
+- Hanya perubahan yang updated_at-nya paling lambat JEDA detik sebelum request yang dikirim. Transaksi yang
+  masih berjalan saat request (updated_at sudah diisi tetapi belum commit) tidak terlewat selama selesai
+  dalam JEDA detik; perubahan baru sampai ke kasir paling lambat JEDA detik kemudian.
+- Tombstone yang lebih tua dari RETENSI_TOMBSTONE hari boleh dihapus (prune_produk_tombstones); kasir yang
+  terakhir menerima tombstone sebelum itu dijawab dengan katalog lengkap dan `reset` = True.
+- ETag adalah versi katalog (updated_at terbaru dan tombstone terakhir sampai batas JEDA). Kasir mengirim
+  If-None-Match dengan ETag respons terakhirnya; bila katalog belum berubah jawabannya 304 tanpa body.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import Produk, ProdukTombstone
+
+DEFAULTS = {
+    'BATAS': 1000,                # Produk per respons bila `limit` tidak diberikan
+    'MAKS_BATAS': 5000,           # Batas maksimum `limit`
+    'JEDA': 2,                    # Detik; perubahan yang lebih baru dari ini menunggu sinkronisasi berikutnya
+    'RETENSI_TOMBSTONE': 30,      # Hari; umur tombstone yang dijamin masih ada
+}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ID_MAKS = 2 ** 63 - 1  # Watermark akhir: semua baris dengan updated_at yang sama sudah terkirim
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'KATALOG_SYNC', {})}
+
+
+def ke_mikrodetik(waktu):
+    return (waktu - EPOCH) // timedelta(microseconds=1)
+
+
+def dari_mikrodetik(mikrodetik):
+    return EPOCH + timedelta(microseconds=mikrodetik)
+
+
+def format_watermark(waktu, produk_id, waktu_tombstone, dasar):
+    return f"{ke_mikrodetik(waktu)}-{produk_id}-{ke_mikrodetik(waktu_tombstone)}-{ke_mikrodetik(dasar)}"
+
+
+def parse_watermark(watermark):
+    """
+    Mengembalikan (updated_at, id, waktu tombstone, dasar) dari watermark; ValueError bila tidak valid.
+    Watermark lama tiga bagian (tanpa dasar) memakai updated_at sebagai dasar.
+    """
+    bagian = watermark.split('-')
+    if len(bagian) not in (3, 4):
+        raise ValueError(f"Watermark tidak valid: {watermark}")
+    try:
+        waktu, produk_id, waktu_tombstone = dari_mikrodetik(int(bagian[0])), int(bagian[1]), dari_mikrodetik(int(bagian[2]))
+        dasar = dari_mikrodetik(int(bagian[3])) if len(bagian) == 4 else waktu
+    except OverflowError:
+        raise ValueError(f"Watermark di luar rentang: {watermark}")
+    return waktu, produk_id, waktu_tombstone, dasar
+
+
+def batas_waktu(sekarang=None):
+    """Waktu terakhir yang dianggap sudah pasti ter-commit."""
+    return (sekarang or timezone.now()) - timedelta(seconds=get_config()['JEDA'])
+
+
+def versi_katalog(horizon):
+    """ETag katalog sampai `horizon`: berubah setiap ada produk yang disimpan atau dihapus."""
+    terakhir_diubah = Produk.objects.filter(updated_at__lte=horizon).aggregate(terakhir=Max('updated_at'))['terakhir']
+    terakhir_dihapus = ProdukTombstone.objects.filter(deleted_at__lte=horizon).aggregate(terakhir=Max('id'))['terakhir']
+    return f'"{ke_mikrodetik(terakhir_diubah) if terakhir_diubah else 0}-{terakhir_dihapus or 0}"'
+
+
+def delta_katalog(since=None, batas=None, horizon=None):
+    """
+    Perubahan katalog setelah watermark `since` (string, None = katalog lengkap) sampai `horizon`.
+
+    Mengembalikan dict berisi `dibuat` dan `diubah` (list Produk, urut updated_at, id), `dihapus` (list id
+    produk), `watermark` untuk request berikutnya, `ada_lagi` bila masih ada halaman berikutnya, dan `reset`
+    bila katalog lokal kasir harus dikosongkan dulu. ValueError bila `since` tidak valid.
+    """
+    config = get_config()
+    batas = batas or config['BATAS']
+    horizon = horizon or batas_waktu()
+
+    posisi = parse_watermark(since) if since else None
+    reset = posisi is None or posisi[2] < horizon - timedelta(days=config['RETENSI_TOMBSTONE'])
+    if reset:
+        posisi = None
+    dasar = EPOCH if posisi is None else posisi[3]
+
+    produk = Produk.objects.filter(updated_at__lte=horizon)
+    if posisi is not None:
+        waktu, produk_id, _, _ = posisi
+        # Bentuk (updated_at >= w) AND (updated_at > w OR id > i) agar index (updated_at, id) dipakai sebagai
+        # rentang yang sudah urut; OR murni membuat database menggabungkan dua scan lalu mengurutkan ulang
+        produk = produk.filter(Q(updated_at__gt=waktu) | Q(id__gt=produk_id), updated_at__gte=waktu)
+    produk = list(produk.order_by('updated_at', 'id')[:batas + 1])
+
+    ada_lagi = len(produk) > batas
+    produk = produk[:batas]
+    if ada_lagi:
+        watermark = format_watermark(produk[-1].updated_at, produk[-1].id, horizon, dasar)
+    else:
+        watermark = format_watermark(horizon, ID_MAKS, horizon, horizon)
+
+    dihapus = []
+    if posisi is not None:
+        # Batas bawah inklusif: tombstone di tepi batas bisa terkirim dua kali, menghapus ulang aman di kasir
+        dihapus = list(
+            ProdukTombstone.objects
+            .filter(deleted_at__gte=posisi[2], deleted_at__lte=horizon)
+            .order_by('deleted_at', 'id')
+            .values_list('produk_id', flat=True)
+        )
+
+    return {
+        'watermark': watermark,
+        'ada_lagi': ada_lagi,
+        'reset': reset,
+        'dibuat': [p for p in produk if p.created_at > dasar],
+        'diubah': [p for p in produk if p.created_at <= dasar],
+        'dihapus': dihapus,
+    }
+
+
+def hapus_tombstone_lama(sebelum):
+    """Menghapus tombstone yang dibuat sebelum `sebelum`; mengembalikan jumlah baris yang dihapus."""
+    return ProdukTombstone.objects.filter(deleted_at__lt=sebelum).delete()[0]
@@ -1,3 +1,410 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from admin_app.models import CustomUser
+
+from .cache import ProdukLookupCache, cari_produk, get_produk_cache
+from .models import Kategori, Produk, ProdukTombstone
+from .search import TRIGGER_SQLITE, cari_typeahead, filter_pencarian, perbaiki_trigger
+from .sync import format_watermark
+from .services import reservasi_stok, StokTidakCukup
+
+
+def buat_produk(kategori, kode, stok):
+    return Produk.objects.create(
+        kode=kode,
+        nama=f'Produk {kode}',
+        harga_khusus=Decimal('900'),
+        harga_umum=Decimal('1000'),
+        stok=stok,
+        kategori=kategori,
+    )
+
+
+class ReservasiStokTests(TestCase):
+    def setUp(self):
+        self.kategori = Kategori.objects.create(nama='Minuman')
+
+    def test_mengurangi_semua_produk(self):
+        a = buat_produk(self.kategori, 'A', 5)
+        b = buat_produk(self.kategori, 'B', 3)
+        reservasi_stok({a.id: 2, b.id: 3})
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual((a.stok, b.stok), (3, 0))
+
+    def test_melaporkan_semua_kekurangan_tanpa_mengubah_stok(self):
+        a = buat_produk(self.kategori, 'A', 1)
+        b = buat_produk(self.kategori, 'B', 0)
+        c = buat_produk(self.kategori, 'C', 10)
+        with self.assertRaises(StokTidakCukup) as ctx:
+            reservasi_stok({a.id: 2, b.id: 1, c.id: 1})
+        self.assertEqual([k['kode'] for k in ctx.exception.kekurangan], ['A', 'B'])
+        self.assertEqual(Produk.objects.get(id=c.id).stok, 10)
+
+
+class ReservasiStokConcurrencyTests(TransactionTestCase):
+    JUMLAH_KASIR = 24
+    STOK_AWAL = 10
+    BATAS_WAKTU = 30
+
+    def test_tidak_ada_oversell_pada_kasir_paralel(self):
+        kategori = Kategori.objects.create(nama='Rokok')
+        produk = buat_produk(kategori, 'X', self.STOK_AWAL)
+        cadangan = buat_produk(kategori, 'Y', self.JUMLAH_KASIR)
+
+        berhasil = []
+        gagal = []
+        mulai = threading.Barrier(self.JUMLAH_KASIR)
+        tenggat = time.monotonic() + self.BATAS_WAKTU
+
+        def kasir(urutan):
+            mulai.wait()
+            try:
+                # Urutan permintaan dibalik untuk separuh kasir agar urutan kunci diuji
+                permintaan = {produk.id: 1, cadangan.id: 1} if urutan % 2 else {cadangan.id: 1, produk.id: 1}
+                percobaan = 0
+                while time.monotonic() < tenggat:
+                    try:
+                        with transaction.atomic():
+                            reservasi_stok(permintaan)
+                        berhasil.append(urutan)
+                        return
+                    except StokTidakCukup:
+                        gagal.append(urutan)
+                        return
+                    except OperationalError:
+                        # SQLite menolak penulis paralel dengan "database is locked"; coba lagi
+                        percobaan += 1
+                        time.sleep(0.001 * (percobaan % 10 + 1))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=kasir, args=(i,)) for i in range(self.JUMLAH_KASIR)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        produk.refresh_from_db()
+        cadangan.refresh_from_db()
+        # Setiap unit yang terjual tercatat tepat sekali dan stok tidak pernah terjual melebihi persediaan
+        self.assertLessEqual(len(berhasil), self.STOK_AWAL)
+        self.assertEqual(produk.stok, self.STOK_AWAL - len(berhasil))
+        self.assertEqual(cadangan.stok, self.JUMLAH_KASIR - len(berhasil))
+        # Kasir hanya ditolak setelah stok benar-benar habis
+        if gagal:
+            self.assertEqual(produk.stok, 0)
+        self.assertEqual(len(berhasil) + len(gagal), self.JUMLAH_KASIR)
+
+
+class ProdukLookupCacheTests(TestCase):
+    def setUp(self):
+        self.kategori = Kategori.objects.create(nama='Snack')
+        self.cache = get_produk_cache()
+        self.cache.clear()
+        self.cache.reset_stats()
+
+    def test_scan_kedua_dilayani_dari_cache(self):
+        buat_produk(self.kategori, 'S1', 5)
+        cari_produk('kode', 'S1')
+        with self.assertNumQueries(0):
+            payload = cari_produk('kode', 'S1')
+        self.assertEqual(payload['stok'], 5)
+        stats = self.cache.stats()
+        self.assertEqual((stats['local_hits'], stats['misses']), (1, 1))
+
+    def test_lru_membuang_entri_tertua(self):
+        cache = ProdukLookupCache(max_entries=2, ttl=60)
+        for i in range(3):
+            cache.set({'id': i, 'kode': f'K{i}', 'barcode': None})
+        self.assertIsNone(cache.get('kode', 'K0'))
+        self.assertIsNotNone(cache.get('kode', 'K2'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_invalidasi_saat_produk_disimpan(self):
+        produk = buat_produk(self.kategori, 'S2', 5)
+        produk.barcode = '899000'
+        with self.captureOnCommitCallbacks(execute=True):
+            produk.save()
+        cari_produk('barcode', '899000')
+        produk.kode = 'S2-BARU'
+        produk.stok = 7
+        with self.captureOnCommitCallbacks(execute=True):
+            produk.save()
+        self.assertEqual(cari_produk('barcode', '899000')['stok'], 7)
+        with self.assertRaises(Produk.DoesNotExist):
+            cari_produk('kode', 'S2')
+
+    def test_invalidasi_saat_stok_berkurang(self):
+        produk = buat_produk(self.kategori, 'S3', 5)
+        cari_produk('kode', 'S3')
+        with self.captureOnCommitCallbacks(execute=True):
+            reservasi_stok({produk.id: 2})
+        self.assertEqual(cari_produk('kode', 'S3')['stok'], 3)
+
+
+class ProdukSearchTests(TestCase):
+    def setUp(self):
+        self.kategori = Kategori.objects.create(nama='Mie')
+        self.minuman = Kategori.objects.create(nama='Minuman')
+        self.goreng = Produk.objects.create(
+            kode='MIE-01', nama='Indomie Goreng 85g', harga_khusus=Decimal('2900'), harga_umum=Decimal('3000'),
+            stok=10, kategori=self.kategori, barcode='8998866200301',
+        )
+        self.soto = Produk.objects.create(
+            kode='MIE-02', nama='Indomie Soto 70g', harga_khusus=Decimal('2900'), harga_umum=Decimal('3000'),
+            stok=10, kategori=self.kategori,
+        )
+        self.teh = Produk.objects.create(
+            kode='INDO-TEH', nama='Teh Botol Sosro', harga_khusus=Decimal('4500'), harga_umum=Decimal('5000'),
+            stok=10, kategori=self.minuman,
+        )
+        kasir = CustomUser.objects.create_user(email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas')
+        self.client = APIClient()
+        self.client.force_authenticate(user=kasir)
+
+    def test_semua_kata_dicocokkan_sebagai_awalan(self):
+        self.assertEqual(cari_typeahead('indo gor'), [self.goreng])
+        self.assertEqual(set(cari_typeahead('INDOMIE')), {self.goreng, self.soto})
+        self.assertEqual(cari_typeahead('8998866'), [self.goreng])
+        self.assertEqual(cari_typeahead('"*'), [])
+
+    def test_kode_diberi_bobot_lebih_tinggi_dan_kecocokan_persis_di_atas(self):
+        self.assertEqual(cari_typeahead('indo')[0], self.teh)
+        self.assertEqual(cari_typeahead('MIE-02')[0], self.soto)
+        self.assertEqual(len(cari_typeahead('indo', limit=1)), 1)
+
+    def test_kecocokan_kode_tidak_terbuang_batas_kandidat(self):
+        Produk.objects.bulk_create([
+            Produk(kode=f'TB-{i}', nama=f'Teh Botol {i}', harga_khusus=Decimal('4500'), harga_umum=Decimal('5000'), kategori=self.minuman)
+            for i in range(10)
+        ])
+        # Dibuat paling akhir (rowid terbesar) dan hanya cocok lewat kode
+        tehbox = Produk.objects.create(
+            kode='TEHBOX-1', nama='Minuman Kotak', harga_khusus=Decimal('2500'), harga_umum=Decimal('3000'), kategori=self.minuman,
+        )
+        self.assertEqual(cari_typeahead('teh', kandidat=3)[0], tehbox)
+        self.assertEqual(len(cari_typeahead('teh', limit=20, kandidat=3)), 4)
+
+    def test_index_mengikuti_perubahan_produk(self):
+        self.soto.nama = 'Sarimi Soto 70g'
+        self.soto.save()
+        self.assertEqual(cari_typeahead('sarimi'), [self.soto])
+        self.assertEqual(cari_typeahead('indomie soto'), [])
+
+        Produk.objects.filter(pk=self.goreng.pk).update(nama='Mie Sedaap Goreng')
+        self.assertEqual(cari_typeahead('sedaap'), [self.goreng])
+
+        Produk.objects.bulk_create([
+            Produk(kode='MIE-03', nama='Indomie Kari Ayam', harga_khusus=Decimal('2900'), harga_umum=Decimal('3000'), kategori=self.kategori)
+        ])
+        self.assertEqual([p.kode for p in cari_typeahead('kari')], ['MIE-03'])
+
+        self.teh.delete()
+        self.assertEqual(cari_typeahead('sosro'), [])
+
+    def test_trigger_dipasang_ulang_setelah_hilang(self):
+        with connection.cursor() as cursor:
+            for trigger in TRIGGER_SQLITE:
+                cursor.execute(f"DROP TRIGGER {trigger}")
+        Produk.objects.filter(pk=self.teh.pk).update(nama='Teh Pucuk Harum')
+
+        self.assertTrue(perbaiki_trigger(connection))
+        self.assertFalse(perbaiki_trigger(connection))
+        self.assertEqual(cari_typeahead('pucuk'), [self.teh])
+
+    def test_typeahead_endpoint(self):
+        response = self.client.get(reverse('produk-typeahead'), {'q': 'indomie', 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(set(response.data[0]), {'id', 'kode', 'nama', 'barcode', 'harga_khusus', 'harga_umum', 'stok'})
+
+        self.assertEqual(self.client.get(reverse('produk-typeahead'), {'q': 'indomie', 'limit': 500}).status_code, 400)
+
+    def test_search_di_daftar_produk(self):
+        response = self.client.get(reverse('produk-list'), {'search': 'indo'})
+        self.assertEqual({p['kode'] for p in response.data['results']}, {'MIE-01', 'MIE-02', 'INDO-TEH'})
+
+        response = self.client.get(reverse('produk-list'), {'search': 'indo', 'kategori': self.minuman.id})
+        self.assertEqual([p['kode'] for p in response.data['results']], ['INDO-TEH'])
+
+        response = self.client.get(reverse('produk-list'), {'search': '8998866'})
+        self.assertEqual([p['kode'] for p in response.data['results']], ['MIE-01'])
+
+    def test_search_hanya_di_kolom_yang_diminta(self):
+        self.assertEqual(list(filter_pencarian(Produk.objects.all(), 'indo', ['kode'])), [self.teh])
+        self.assertEqual(set(filter_pencarian(Produk.objects.all(), 'indo', ['nama'])), {self.goreng, self.soto})
+        with self.assertRaises(ImproperlyConfigured):
+            filter_pencarian(Produk.objects.all(), 'indo', ['deskripsi'])
+
+
+class ProdukKatalogTests(TestCase):
+    def setUp(self):
+        kategori = Kategori.objects.create(nama='Snack')
+        for i in range(5):
+            buat_produk(kategori, f'K{i}', 10 + i)
+        kasir = CustomUser.objects.create_user(email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas')
+        self.client = APIClient()
+        self.client.force_authenticate(user=kasir)
+
+    def test_katalog_dipaginasi_dengan_cursor(self):
+        response = self.client.get(reverse('produk-list'), {'page_size': 2})
+        self.assertEqual([p['kode'] for p in response.data['results']], ['K0', 'K1'])
+
+        kode = []
+        url = reverse('produk-list') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            kode += [p['kode'] for p in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(kode, ['K0', 'K1', 'K2', 'K3', 'K4'])
+
+    def test_sparse_fieldset(self):
+        response = self.client.get(reverse('produk-list'), {'fields': 'kode,harga_umum_rupiah'})
+        self.assertEqual(response.data['results'][0], {'kode': 'K0', 'harga_umum_rupiah': 'Rp1.000'})
+
+        response = self.client.get(reverse('produk-list'), {'fields': 'kode,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', str(response.data['fields']))
+
+    def test_mode_kasir(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('produk-list'), {'mode': 'kasir'})
+        self.assertEqual(
+            set(response.data['results'][0]), {'id', 'kode', 'nama', 'barcode', 'harga_khusus', 'harga_umum', 'stok'}
+        )
+        # Kolom yang tidak ditampilkan tidak dibaca dari database
+        self.assertNotIn('deskripsi', queries[-1]['sql'])
+
+        response = self.client.get(reverse('produk-list'), {'mode': 'kasir', 'fields': 'kode,stok'})
+        self.assertEqual(response.data['results'][0], {'kode': 'K0', 'stok': 10})
+
+        self.assertEqual(self.client.get(reverse('produk-list'), {'mode': 'lain'}).status_code, 400)
+
+
+@override_settings(KATALOG_SYNC={'JEDA': 0})
+class ProdukSyncTests(TestCase):
+    def setUp(self):
+        self.kategori = Kategori.objects.create(nama='Snack')
+        self.produk = [buat_produk(self.kategori, f'K{i}', 10) for i in range(3)]
+        kasir = CustomUser.objects.create_user(email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas')
+        self.client = APIClient()
+        self.client.force_authenticate(user=kasir)
+
+    def sync(self, since=None, etag=None, **params):
+        if since:
+            params['since'] = since
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(reverse('produk-sync'), params, **headers)
+
+    def test_sinkron_awal_lalu_delta(self):
+        awal = self.sync()
+        self.assertTrue(awal.data['reset'])
+        self.assertEqual([p['kode'] for p in awal.data['dibuat']], ['K0', 'K1', 'K2'])
+        self.assertEqual(awal.data['dihapus'], [])
+
+        self.produk[0].stok = 7
+        self.produk[0].save()
+        baru = buat_produk(self.kategori, 'K3', 5)
+        dihapus_id = self.produk[1].id
+        self.produk[1].delete()
+
+        delta = self.sync(awal.data['watermark'])
+        self.assertFalse(delta.data['reset'])
+        self.assertEqual([(p['kode'], p['stok']) for p in delta.data['diubah']], [('K0', 7)])
+        self.assertEqual([p['id'] for p in delta.data['dibuat']], [baru.id])
+        self.assertEqual(delta.data['dihapus'], [dihapus_id])
+
+        kosong = self.sync(delta.data['watermark'])
+        self.assertEqual((kosong.data['dibuat'], kosong.data['diubah']), ([], []))
+
+    def test_etag_tanpa_perubahan_304(self):
+        awal = self.sync()
+        response = self.sync(awal.data['watermark'], etag=awal['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        ProdukTombstone.objects.create(produk_id=999, kode='X')
+        self.assertEqual(self.sync(awal.data['watermark'], etag=awal['ETag']).status_code, 200)
+
+    def test_halaman_dengan_updated_at_sama(self):
+        Produk.objects.update(updated_at=timezone.now() - timedelta(seconds=1))
+        buat_produk(self.kategori, 'K3', 1)
+
+        kode, since = [], None
+        while True:
+            response = self.sync(since, limit=2)
+            kode += [p['kode'] for p in response.data['dibuat'] + response.data['diubah']]
+            since = response.data['watermark']
+            if not response.data['ada_lagi']:
+                self.assertIn('ETag', response)
+                break
+            self.assertNotIn('ETag', response)
+        self.assertEqual(kode, ['K0', 'K1', 'K2', 'K3'])
+
+    def ikuti(self, since=None, limit=2):
+        """Mengambil semua halaman seperti kasir; mengembalikan (dibuat, diubah) berupa kode, dan watermark akhir."""
+        dibuat, diubah = [], []
+        while True:
+            response = self.sync(since, limit=limit)
+            dibuat += [p['kode'] for p in response.data['dibuat']]
+            diubah += [p['kode'] for p in response.data['diubah']]
+            since = response.data['watermark']
+            if not response.data['ada_lagi']:
+                return dibuat, diubah, since
+
+    def test_semua_halaman_muat_awal_berisi_dibuat(self):
+        for i in range(3, 7):
+            buat_produk(self.kategori, f'K{i}', 1)
+        # Produk lama yang diubah satu per satu: created_at lebih tua dari updated_at halaman sebelumnya
+        sekarang = timezone.now()
+        for i, produk in enumerate(Produk.objects.order_by('id')):
+            Produk.objects.filter(pk=produk.pk).update(
+                created_at=sekarang - timedelta(days=1), updated_at=sekarang - timedelta(seconds=10 - i),
+            )
+        self.assertEqual(self.ikuti()[:2], ([f'K{i}' for i in range(7)], []))
+
+    def test_produk_baru_di_halaman_berikutnya_delta_tetap_dibuat(self):
+        _, _, watermark = self.ikuti()
+        # Dibuat sebelum halaman pertama delta berakhir, tetapi baru muncul di halaman kedua karena diubah lagi
+        baru = buat_produk(self.kategori, 'K3', 1)
+        for produk in self.produk:
+            produk.stok = 1
+            produk.save()
+        baru.stok = 2
+        baru.save()
+
+        dibuat, diubah, _ = self.ikuti(watermark)
+        self.assertEqual(dibuat, ['K3'])
+        self.assertEqual(sorted(diubah), ['K0', 'K1', 'K2'])
+
+    def test_perubahan_terbaru_menunggu_jeda(self):
+        awal = self.sync()
+        with self.settings(KATALOG_SYNC={'JEDA': 60}):
+            buat_produk(self.kategori, 'K3', 1)
+            self.assertEqual(self.sync(awal.data['watermark']).data['dibuat'], [])
+        self.assertEqual([p['kode'] for p in self.sync(awal.data['watermark']).data['dibuat']], ['K3'])
+
+    def test_tombstone_dari_cascade_kategori(self):
+        awal = self.sync()
+        self.kategori.delete()
+        self.assertEqual(sorted(self.sync(awal.data['watermark']).data['dihapus']), sorted(p.id for p in self.produk))
+
+    def test_watermark_tidak_valid_atau_kedaluwarsa(self):
+        self.assertEqual(self.sync('bukan-watermark').status_code, 400)
+        self.assertEqual(self.sync('1-2-99999999999999999999').status_code, 400)
+
+        lama = timezone.now() - timedelta(days=31)
+        response = self.sync(format_watermark(lama, 0, lama, lama))
+        self.assertTrue(response.data['reset'])
+        self.assertEqual(len(response.data['dibuat']), 3)
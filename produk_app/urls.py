@@ -4,12 +4,20 @@ from .views import (
     ProdukDetailView,
     StockLogListView,
     StockLogDetailView,
+    SearchProdukView,
+    ProdukTypeaheadView,
+    ProdukSyncView,
+    ProdukCacheStatsView,
 )
 
 urlpatterns = [
     # URLs untuk manajemen produk
     path('produk/', ProdukListView.as_view(), name='produk-list'),  # List & Create Produk
     path('produk/<int:pk>/', ProdukDetailView.as_view(), name='produk-detail'),  # Retrieve, Update & Destroy Produk
+    path('produk/search/', SearchProdukView.as_view(), name='produk-search'),  # Cari produk berdasarkan kode/barcode (scan)
+    path('produk/typeahead/', ProdukTypeaheadView.as_view(), name='produk-typeahead'),  # Saran produk saat kasir mengetik nama/kode
+    path('produk/sync/', ProdukSyncView.as_view(), name='produk-sync'),  # Delta katalog untuk kasir offline (watermark + ETag)
+    path('produk/cache-stats/', ProdukCacheStatsView.as_view(), name='produk-cache-stats'),  # Statistik cache lookup produk
 
     # URLs untuk log stok
     path('stok-log/', StockLogListView.as_view(), name='stock-log-list'),  # List & Create StockLog
@@ -1,9 +1,13 @@
-from rest_framework import generics, status
+from rest_framework import generics, serializers, status
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from .serializers import ProdukSerializer, StockLogSerializer
+from .serializers import ProdukSerializer, ProdukKasirSerializer, StockLogSerializer
 from .models import Produk, StockLog
+from .cache import cari_produk, get_produk_cache
+from .search import ProdukSearchFilter, cari_typeahead
+from .pagination import ProdukCursorPagination
+from .sync import batas_waktu, delta_katalog, get_config as get_sync_config, versi_katalog
 from admin_app.permissions import IsAdminAplikasi  # Import custom permission
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
@@ -13,10 +17,48 @@ class ProdukListView(generics.ListCreateAPIView):
     queryset = Produk.objects.all()
     serializer_class = ProdukSerializer
     permission_classes = [IsAuthenticated]  # Allow any authenticated user
+    pagination_class = ProdukCursorPagination
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, ProdukSearchFilter]  # ?search= lewat index pencarian produk (awalan kata)
     filterset_fields = ['kategori']
-    search_fields = ['nama', 'kode']
+    search_fields = ['nama', 'kode', 'barcode']
+
+    # ?mode=kasir: representasi ringkas tanpa deskripsi dan format Rupiah
+    MODE_SERIALIZER = {'lengkap': ProdukSerializer, 'kasir': ProdukKasirSerializer}
+    # Kolom model yang dibutuhkan field hasil format
+    KOLOM_SUMBER = {'harga_khusus_rupiah': 'harga_khusus', 'harga_umum_rupiah': 'harga_umum'}
+
+    def get_serializer_class(self):
+        if self.request.method != 'GET':
+            return self.serializer_class
+        mode = self.request.query_params.get('mode', 'lengkap')
+        if mode not in self.MODE_SERIALIZER:
+            raise serializers.ValidationError({'mode': f"Mode harus salah satu dari: {', '.join(self.MODE_SERIALIZER)}."})
+        return self.MODE_SERIALIZER[mode]
+
+    def get_fields(self):
+        """Field dari ?fields=kode,nama (sparse fieldset), None bila tidak diminta."""
+        if self.request.method != 'GET' or not self.request.query_params.get('fields'):
+            return None
+        fields = [nama.strip() for nama in self.request.query_params['fields'].split(',') if nama.strip()]
+        tersedia = self.get_serializer_class().Meta.fields
+        tidak_dikenal = [nama for nama in fields if nama not in tersedia]
+        if tidak_dikenal:
+            raise serializers.ValidationError({'fields': f"Field tidak dikenal: {', '.join(tidak_dikenal)}."})
+        return fields
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET':
+            kwargs.setdefault('fields', self.get_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        # Hanya muat kolom yang diserialisasi (mis. deskripsi tidak dibaca pada mode kasir)
+        fields = self.get_fields() or self.get_serializer_class().Meta.fields
+        return queryset.only('id', *{self.KOLOM_SUMBER.get(nama, nama) for nama in fields})
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -69,6 +111,16 @@ class StockLogListView(generics.ListCreateAPIView):
     serializer_class = StockLogSerializer
     permission_classes = [IsAuthenticated]  # Allow any authenticated user
 
+    def get_queryset(self):
+        # Riwayat satu produk: ?produk=<id>, memakai index (produk, -created_at)
+        queryset = super().get_queryset()
+        produk_id = self.request.query_params.get('produk')
+        if produk_id:
+            if not produk_id.isdigit():
+                raise serializers.ValidationError({'produk': 'ID produk tidak valid.'})
+            queryset = queryset.filter(produk_id=produk_id)
+        return queryset
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
@@ -117,18 +169,77 @@ class SearchProdukView(APIView):
         if kode_barang and barcode:
             return Response({"error": "Hanya satu dari kode barang atau barcode yang dapat disediakan."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Search by kode_barang
-        if kode_barang:
-            try:
-                produk = Produk.objects.get(kode=kode_barang)
-            except Produk.DoesNotExist:
-                return Response({"error": "Produk tidak ditemukan."}, status=status.HTTP_404_NOT_FOUND)
-        # Search by barcode
-        elif barcode:
-            try:
-                produk = Produk.objects.get(barcode=barcode)
-            except Produk.DoesNotExist:
-                return Response({"error": "Produk tidak ditemukan."}, status=status.HTTP_404_NOT_FOUND)
-
-        serializer = ProdukSerializer(produk)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Cari lewat cache lookup (LRU lokal + cache bersama), jatuh ke database saat miss
+        field, value = ('kode', kode_barang) if kode_barang else ('barcode', barcode)
+        try:
+            data = cari_produk(field, value)
+        except Produk.DoesNotExist:
+            return Response({"error": "Produk tidak ditemukan."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(data, status=status.HTTP_200_OK)
+
+# Typeahead kotak cari kasir: hasil berperingkat dari index pencarian
+class ProdukTypeaheadView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_LIMIT = 50
+
+    def get(self, request):
+        """
+        ?q= dan ?limit= (maks. 50). Urutan: kode/barcode sama persis, lalu skor relevansi. Untuk awalan yang
+        sangat umum skor hanya dihitung atas sebagian kecocokan (semua kecocokan kode/barcode pertama dan
+        sebagian kecocokan nama menurut urutan id), jadi urutan antar-produk yang hanya cocok lewat nama
+        adalah perkiraan; ketik lebih banyak huruf untuk hasil yang tepat.
+        """
+        q = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({"error": "limit harus berupa angka."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= self.MAX_LIMIT:
+            return Response({"error": f"limit harus antara 1 dan {self.MAX_LIMIT}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        produk = cari_typeahead(q, limit)
+        return Response(ProdukKasirSerializer(produk, many=True).data, status=status.HTTP_200_OK)
+
+# Sinkronisasi delta katalog kasir: produk yang dibuat/diubah/dihapus sejak watermark
+class ProdukSyncView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        config = get_sync_config()
+        try:
+            limit = int(request.query_params.get('limit', config['BATAS']))
+        except ValueError:
+            return Response({"error": "limit harus berupa angka."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= config['MAKS_BATAS']:
+            return Response({"error": f"limit harus antara 1 dan {config['MAKS_BATAS']}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        horizon = batas_waktu()
+        versi = versi_katalog(horizon)
+        if request.headers.get('If-None-Match') == versi:
+            # Tidak ada perubahan sejak sinkronisasi terakhir kasir; watermark lamanya tetap berlaku
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': versi})
+
+        try:
+            delta = delta_katalog(request.query_params.get('since'), batas=limit, horizon=horizon)
+        except ValueError:
+            return Response({"error": "Watermark since tidak valid."}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {
+            'watermark': delta['watermark'],
+            'ada_lagi': delta['ada_lagi'],
+            'reset': delta['reset'],
+            'dibuat': ProdukKasirSerializer(delta['dibuat'], many=True).data,
+            'diubah': ProdukKasirSerializer(delta['diubah'], many=True).data,
+            'dihapus': delta['dihapus'],
+        }
+        # ETag hanya untuk halaman terakhir: kasir yang masih punya halaman berikutnya belum sinkron penuh
+        headers = {} if delta['ada_lagi'] else {'ETag': versi}
+        return Response(data, status=status.HTTP_200_OK, headers=headers)
+
+# Statistik cache lookup produk
+class ProdukCacheStatsView(APIView):
+    permission_classes = [IsAdminAplikasi]
+
+    def get(self, request):
+        return Response(get_produk_cache().stats(), status=status.HTTP_200_OK)
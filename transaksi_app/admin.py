@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import InvoiceItem
 
 class InvoiceItemAdmin(admin.ModelAdmin):
-    list_display = ('invoice', 'cart_item', 'jumlah', 'subtotal')  # Ubah transaksi_item ke cart_item
+    list_display = ('invoice', 'nama_produk', 'harga', 'jumlah', 'subtotal')
 
     def subtotal(self, obj):
         return obj.subtotal()
@@ -0,0 +1,442 @@
+"""
+Penyimpanan keranjang kasir dan operasi massalnya.
+
+Keranjang adalah data sementara; backend-nya bisa dipilih lewat settings.KERANJANG:
+
+- `orm`: baris CartItem di database utama (perilaku lama).
+- `kv`: satu hash per petugas di key-value store kompatibel Redis (`KV_URL`), sehingga scan tidak
+  menulis ke database utama dan tidak berebut lock dengan checkout. `KV_URL = 'memory://'`
+  memakai store in-process (untuk test, benchmark, dan pengembangan satu proses).
+
+Kedua backend mengembalikan instance CartItem (untuk backend kv tidak disimpan, `id` = id produk)
+dengan atribut `harga_satuan` dan `subtotal_harga`, sehingga view dan serializer tidak perlu tahu
+backend mana yang aktif.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, When
+from django.dispatch import receiver
+
+from produk_app.cache import cari_produk_massal
+from produk_app.models import Produk
+from .models import CartItem
+
+AKSI_KERANJANG = ('tambah', 'ubah', 'hapus')
+
+DEFAULTS = {
+    'BACKEND': 'orm',          # 'orm' atau 'kv'
+    'KV_URL': 'memory://',     # redis://host:port/db, atau memory:// untuk store in-process
+    'KEY_PREFIX': 'keranjang',
+    'TTL': 12 * 3600,          # Detik; keranjang kv yang tidak disentuh selama ini hilang sendiri
+}
+
+
+def harga_item(produk, tipe_harga):
+    return produk.harga_khusus if tipe_harga == 'harga_khusus' else produk.harga_umum
+
+
+class ORMCartBackend:
+    """Keranjang sebagai baris CartItem di database utama."""
+    # Item yang dikembalikan adalah baris CartItem tersimpan, jadi boleh dirujuk lewat foreign key
+    item_tersimpan = True
+
+    def isi(self, petugas, dengan_produk=True):
+        """
+        Isi keranjang dalam satu query: produk ikut di-join, dan harga satuan serta subtotal
+        dihitung di database sesuai tipe_harga.
+        """
+        harga_satuan = Case(
+            When(tipe_harga='harga_khusus', then=F('produk__harga_khusus')),
+            default=F('produk__harga_umum'),
+        )
+        return list(
+            CartItem.objects
+            .filter(petugas=petugas)
+            .select_related('produk')
+            .annotate(
+                harga_satuan=harga_satuan,
+                subtotal_harga=ExpressionWrapper(harga_satuan * F('jumlah'), output_field=DecimalField(max_digits=15, decimal_places=2)),
+            )
+            .order_by('id')
+        )
+
+    def ambil_item(self, petugas, item_id):
+        return CartItem.objects.select_related('produk').filter(id=item_id, petugas=petugas).first()
+
+    def ambil_items(self, petugas, item_ids):
+        """Item keranjang `petugas` dengan id di `item_ids` beserta produknya, {id: item}, dalam satu query."""
+        return CartItem.objects.select_related('produk').filter(petugas=petugas).in_bulk(item_ids)
+
+    def tambah(self, petugas, produk, jumlah, tipe_harga):
+        """Menambah `jumlah` produk ke keranjang. Mengembalikan (item, dibuat)."""
+        cart_item, created = CartItem.objects.get_or_create(
+            petugas=petugas,
+            produk=produk,
+            defaults={'jumlah': jumlah, 'tipe_harga': tipe_harga}
+        )
+        if not created:
+            cart_item.jumlah += jumlah
+            cart_item.save()
+        return cart_item, created
+
+    def ubah_jumlah(self, petugas, item_id, jumlah):
+        """Mengganti jumlah item; jumlah <= 0 menghapus item. None jika item tidak ada."""
+        cart_item = self.ambil_item(petugas, item_id)
+        if cart_item is None:
+            return None
+        if jumlah <= 0:
+            cart_item.delete()
+        else:
+            cart_item.jumlah = jumlah
+            cart_item.save()
+        return cart_item
+
+    def hapus_item(self, petugas, item_id):
+        deleted, _ = CartItem.objects.filter(id=item_id, petugas=petugas).delete()
+        return deleted > 0
+
+    def kosongkan(self, petugas):
+        CartItem.objects.filter(petugas=petugas).delete()
+
+    def selesai_checkout(self, petugas, cart_items):
+        """Menghapus item yang sudah di-checkout; ikut transaksi checkout yang sedang berjalan."""
+        CartItem.objects.filter(id__in=[item.id for item in cart_items]).delete()
+
+    def terapkan_massal(self, petugas, aksi, per_produk):
+        """
+        Menerapkan operasi massal (lihat `ubah_keranjang_massal`) dalam satu transaksi.
+        Mengembalikan id produk yang tidak ada di keranjang untuk aksi hapus.
+        """
+        tidak_ada = []
+        with transaction.atomic():
+            existing = {}
+            for cart_item in (
+                CartItem.objects
+                .select_for_update()
+                .filter(petugas=petugas, produk_id__in=per_produk)
+                .order_by('id')
+            ):
+                existing.setdefault(cart_item.produk_id, cart_item)
+
+            dibuat, diperbarui, dihapus = [], [], []
+            for produk_id, baris in per_produk.items():
+                cart_item = existing.get(produk_id)
+                if aksi == 'hapus' or (aksi == 'ubah' and baris['jumlah'] == 0):
+                    if cart_item is not None:
+                        dihapus.append(produk_id)
+                    elif aksi == 'hapus':
+                        tidak_ada.append(produk_id)
+                elif cart_item is None:
+                    dibuat.append(CartItem(
+                        petugas=petugas,
+                        produk_id=produk_id,
+                        jumlah=baris['jumlah'],
+                        tipe_harga=baris['tipe_harga'] or 'harga_umum',
+                    ))
+                else:
+                    cart_item.jumlah = F('jumlah') + baris['jumlah'] if aksi == 'tambah' else baris['jumlah']
+                    if baris['tipe_harga']:
+                        cart_item.tipe_harga = baris['tipe_harga']
+                    diperbarui.append(cart_item)
+
+            if dihapus:
+                CartItem.objects.filter(petugas=petugas, produk_id__in=dihapus).delete()
+            if dibuat:
+                CartItem.objects.bulk_create(dibuat)
+            if diperbarui:
+                CartItem.objects.bulk_update(diperbarui, ['jumlah', 'tipe_harga'])
+        return tidak_ada
+
+
+class KeyValueCartBackend:
+    """
+    Keranjang sebagai satu hash per petugas di key-value store kompatibel Redis.
+
+    Field hash per produk: `<produk_id>` = jumlah (HINCRBY), `t:<produk_id>` = tipe_harga,
+    `u:<produk_id>` = urutan scan; field `0` adalah penghitung urutan. Key diberi TTL dan
+    diperpanjang setiap kali keranjang berubah.
+    `client` cukup mendukung hincrby, hsetnx, hset, hdel, hgetall, delete, dan expire.
+    Item yang dikembalikan adalah CartItem yang tidak disimpan dengan id = produk_id.
+    """
+    item_tersimpan = False
+
+    def __init__(self, client, key_prefix=DEFAULTS['KEY_PREFIX'], ttl=DEFAULTS['TTL']):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.ttl = ttl
+
+    def key(self, petugas):
+        return f"{self.key_prefix}:{petugas.pk}"
+
+    def _fields(self, produk_id):
+        return (str(produk_id), f't:{produk_id}', f'u:{produk_id}')
+
+    def _baca(self, petugas):
+        """produk_id -> (jumlah, tipe_harga, urutan) dari hash keranjang."""
+        data = {}
+        for field, value in self.client.hgetall(self.key(petugas)).items():
+            field = field.decode() if isinstance(field, bytes) else field
+            value = value.decode() if isinstance(value, bytes) else value
+            data[field] = value
+        hasil = {}
+        for field, value in data.items():
+            if field.isdigit() and field != '0':
+                hasil[int(field)] = (int(value), data.get(f't:{field}', 'harga_umum'), int(data.get(f'u:{field}', 0)))
+        return hasil
+
+    def _item(self, petugas, produk_id, jumlah, tipe_harga, produk=None):
+        item = CartItem(id=produk_id, petugas=petugas, produk_id=produk_id, jumlah=jumlah, tipe_harga=tipe_harga)
+        if produk is not None:
+            item.produk = produk
+            item.harga_satuan = harga_item(produk, tipe_harga)
+            item.subtotal_harga = item.harga_satuan * jumlah
+        return item
+
+    def isi(self, petugas, dengan_produk=True):
+        """Isi keranjang urut scan; produk dimuat dengan satu query bila `dengan_produk`."""
+        data = sorted(self._baca(petugas).items(), key=lambda baris: baris[1][2])
+        produk_map = Produk.objects.in_bulk([produk_id for produk_id, _ in data]) if dengan_produk and data else {}
+        items = []
+        for produk_id, (jumlah, tipe_harga, _) in data:
+            if dengan_produk and produk_id not in produk_map:
+                # Produk sudah dihapus dari katalog; buang dari keranjang
+                self.client.hdel(self.key(petugas), *self._fields(produk_id))
+                continue
+            items.append(self._item(petugas, produk_id, jumlah, tipe_harga, produk_map.get(produk_id)))
+        return items
+
+    def ambil_item(self, petugas, item_id):
+        baris = self._baca(petugas).get(int(item_id))
+        if baris is None:
+            return None
+        produk = Produk.objects.filter(id=item_id).first()
+        if produk is None:
+            return None
+        return self._item(petugas, int(item_id), baris[0], baris[1], produk)
+
+    def ambil_items(self, petugas, item_ids):
+        data = self._baca(petugas)
+        item_ids = [int(item_id) for item_id in item_ids if int(item_id) in data]
+        produk_map = Produk.objects.in_bulk(item_ids) if item_ids else {}
+        return {
+            item_id: self._item(petugas, item_id, data[item_id][0], data[item_id][1], produk_map[item_id])
+            for item_id in item_ids if item_id in produk_map
+        }
+
+    def _simpan(self, petugas, produk_id, tipe_harga, jumlah=None, tambah=None):
+        """Menambah (`tambah`) atau mengganti (`jumlah`) jumlah produk. Mengembalikan (jumlah baru, dibuat)."""
+        key = self.key(petugas)
+        if tambah is not None:
+            jumlah_baru = self.client.hincrby(key, str(produk_id), tambah)
+        else:
+            self.client.hset(key, str(produk_id), jumlah)
+            jumlah_baru = jumlah
+        dibuat = bool(self.client.hsetnx(key, f't:{produk_id}', tipe_harga or 'harga_umum'))
+        if dibuat:
+            self.client.hset(key, f'u:{produk_id}', self.client.hincrby(key, '0', 1))
+        elif tipe_harga and tambah is None:
+            self.client.hset(key, f't:{produk_id}', tipe_harga)
+        self.client.expire(key, self.ttl)
+        return jumlah_baru, dibuat
+
+    def tambah(self, petugas, produk, jumlah, tipe_harga):
+        jumlah_baru, dibuat = self._simpan(petugas, produk.id, tipe_harga, tambah=jumlah)
+        if not dibuat:
+            tipe_harga = self._baca(petugas).get(produk.id, (None, tipe_harga, 0))[1]
+        return self._item(petugas, produk.id, jumlah_baru, tipe_harga, produk), dibuat
+
+    def ubah_jumlah(self, petugas, item_id, jumlah):
+        cart_item = self.ambil_item(petugas, item_id)
+        if cart_item is None:
+            return None
+        if jumlah <= 0:
+            self.hapus_item(petugas, item_id)
+        else:
+            self._simpan(petugas, cart_item.produk_id, None, jumlah=jumlah)
+            cart_item.jumlah = jumlah
+            cart_item.subtotal_harga = cart_item.harga_satuan * jumlah
+        return cart_item
+
+    def hapus_item(self, petugas, item_id):
+        return self.client.hdel(self.key(petugas), *self._fields(item_id)) > 0
+
+    def kosongkan(self, petugas):
+        self.client.delete(self.key(petugas))
+
+    def selesai_checkout(self, petugas, cart_items):
+        # Keranjang baru dibersihkan setelah transaksi checkout commit; bila rollback, keranjang tetap utuh
+        fields = [field for item in cart_items for field in self._fields(item.produk_id)]
+        transaction.on_commit(lambda: self.client.hdel(self.key(petugas), *fields))
+
+    def terapkan_massal(self, petugas, aksi, per_produk):
+        existing = self._baca(petugas)
+        tidak_ada = []
+        for produk_id, baris in per_produk.items():
+            if aksi == 'hapus' or (aksi == 'ubah' and baris['jumlah'] == 0):
+                if produk_id in existing:
+                    self.hapus_item(petugas, produk_id)
+                elif aksi == 'hapus':
+                    tidak_ada.append(produk_id)
+            elif aksi == 'tambah':
+                _, dibuat = self._simpan(petugas, produk_id, baris['tipe_harga'], tambah=baris['jumlah'])
+                if baris['tipe_harga'] and not dibuat:
+                    self.client.hset(self.key(petugas), f't:{produk_id}', baris['tipe_harga'])
+            else:
+                self._simpan(petugas, produk_id, baris['tipe_harga'], jumlah=baris['jumlah'])
+        return tidak_ada
+
+
+class MemoriKeyValue:
+    """
+    Store in-process dengan subset perintah hash Redis yang dipakai KeyValueCartBackend.
+    Aman dipakai banyak thread; data hilang saat proses berhenti.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def _hash(self, key, buat=False):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        if buat:
+            return self._data.setdefault(key, {})
+        return self._data.get(key, {})
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            data = self._hash(key, buat=True)
+            data[field] = str(int(data.get(field, 0)) + amount)
+            return int(data[field])
+
+    def hsetnx(self, key, field, value):
+        with self._lock:
+            data = self._hash(key, buat=True)
+            if field in data:
+                return 0
+            data[field] = str(value)
+            return 1
+
+    def hset(self, key, field, value):
+        with self._lock:
+            self._hash(key, buat=True)[field] = str(value)
+            return 1
+
+    def hdel(self, key, *fields):
+        with self._lock:
+            data = self._hash(key)
+            return sum(1 for field in fields if data.pop(field, None) is not None)
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._hash(key))
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if key not in self._data:
+                return 0
+            self._expires[key] = time.monotonic() + seconds
+            return 1
+
+
+def buat_backend(config):
+    config = {**DEFAULTS, **config}
+    if config['BACKEND'] == 'orm':
+        return ORMCartBackend()
+    if config['BACKEND'] == 'kv':
+        if config['KV_URL'] == 'memory://':
+            client = MemoriKeyValue()
+        else:
+            try:
+                import redis
+            except ImportError:
+                raise ImproperlyConfigured("Backend keranjang 'kv' dengan KV_URL Redis membutuhkan paket redis.")
+            client = redis.Redis.from_url(config['KV_URL'])
+        return KeyValueCartBackend(client, key_prefix=config['KEY_PREFIX'], ttl=config['TTL'])
+    raise ImproperlyConfigured(f"Backend keranjang tidak dikenal: {config['BACKEND']}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_cart_backend():
+    """Backend keranjang per proses, dibuat sekali dari settings.KERANJANG."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = buat_backend(getattr(settings, 'KERANJANG', {}))
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_cart_backend(setting, **kwargs):
+    global _backend
+    if setting == 'KERANJANG':
+        _backend = None
+
+
+def etag_keranjang(petugas, cart_items):
+    """ETag isi keranjang: berubah bila item, jumlah, tipe harga, harga, atau stok produk berubah."""
+    isi = ';'.join(
+        f"{item.id}:{item.produk_id}:{item.jumlah}:{item.tipe_harga}:{item.harga_satuan}:{item.produk.stok}:{item.produk.kode}:{item.produk.nama}"
+        for item in cart_items
+    )
+    return '"' + hashlib.sha1(f"{petugas.pk}|{isi}".encode()).hexdigest() + '"'
+
+
+def ubah_keranjang_massal(petugas, aksi, items):
+    """
+    Menerapkan `aksi` ke keranjang `petugas` untuk daftar item tervalidasi
+    (dict berisi salah satu `kode`/`barcode`, `jumlah`, dan `tipe_harga`, beserta `index` asalnya).
+    Seluruh produk di-resolve lewat cache scan + satu query IN.
+
+    - tambah: jumlah ditambahkan ke item yang sudah ada, atau item baru dibuat.
+    - ubah: jumlah diganti; jumlah 0 menghapus item. Item yang belum ada dibuat.
+    - hapus: item produk tersebut dihapus dari keranjang.
+
+    Mengembalikan daftar error per item: [{'index': ..., 'error': ...}].
+    """
+    if aksi not in AKSI_KERANJANG:
+        raise ValueError(f"Aksi keranjang tidak didukung: {aksi}")
+
+    lookup = {}
+    for item in items:
+        field = 'kode' if item.get('kode') else 'barcode'
+        lookup[item['index']] = (field, item[field])
+    produk_map = cari_produk_massal(lookup.values())
+
+    errors = []
+    # Gabungkan item per produk; scan ganda untuk produk yang sama dijumlahkan (tambah) atau yang terakhir menang (ubah)
+    per_produk = {}
+    for item in items:
+        payload = produk_map.get(lookup[item['index']])
+        if payload is None:
+            field, value = lookup[item['index']]
+            errors.append({'index': item['index'], 'error': f"Produk dengan {field} {value} tidak ditemukan."})
+            continue
+        baris = per_produk.setdefault(payload['id'], {'index': [], 'jumlah': 0, 'tipe_harga': None})
+        baris['index'].append(item['index'])
+        baris['jumlah'] = baris['jumlah'] + item['jumlah'] if aksi == 'tambah' else item['jumlah']
+        baris['tipe_harga'] = item.get('tipe_harga') or baris['tipe_harga']
+
+    if per_produk:
+        for produk_id in get_cart_backend().terapkan_massal(petugas, aksi, per_produk):
+            errors.extend({'index': i, 'error': "Produk tidak ada di keranjang."} for i in per_produk[produk_id]['index'])
+
+    errors.sort(key=lambda error: error['index'])
+    return errors
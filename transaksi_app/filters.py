@@ -0,0 +1,27 @@
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django.utils import timezone
+
+from .models import Transaksi
+
+
+class TransaksiFilter(django_filters.FilterSet):
+    start = django_filters.DateFilter(method='filter_start')  # Tanggal awal (YYYY-MM-DD)
+    end = django_filters.DateFilter(method='filter_end')  # Tanggal akhir (YYYY-MM-DD), inklusif
+    kasir = django_filters.NumberFilter(field_name='user')  # ID user kasir
+    metode_pembayaran = django_filters.CharFilter(field_name='metode_pembayaran', lookup_expr='iexact')
+
+    class Meta:
+        model = Transaksi
+        fields = ['start', 'end', 'kasir', 'metode_pembayaran']
+
+    # Batas hari dihitung sebagai tengah malam lokal (seperti laporan_app.exports) sehingga filter menjadi
+    # rentang atas kolom tanggal dan memakai index, bukan fungsi DATE(tanggal) per baris
+    def filter_start(self, queryset, name, value):
+        return queryset.filter(tanggal__gte=datetime.combine(value, time.min, tzinfo=timezone.get_current_timezone()))
+
+    def filter_end(self, queryset, name, value):
+        return queryset.filter(
+            tanggal__lt=datetime.combine(value + timedelta(days=1), time.min, tzinfo=timezone.get_current_timezone())
+        )
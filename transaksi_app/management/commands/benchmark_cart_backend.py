@@ -0,0 +1,140 @@
+import random
+import statistics
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+
+from admin_app.models import CustomUser
+from produk_app.models import Kategori, Produk
+from transaksi_app.cart import buat_backend
+from transaksi_app.models import Transaksi, TransaksiItem
+
+PREFIX = 'benchmark-keranjang'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark latensi scan (tambah ke keranjang) per backend keranjang di bawah beban: beberapa kasir "
+        "memindai bersamaan sementara thread checkout terus menulis transaksi dan stok. "
+        "Data benchmark dibuat di database aktif dan dihapus setelah selesai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', action='append', choices=['orm', 'kv'], help="Backend yang diukur (default: orm dan kv).")
+        parser.add_argument('--kv-url', default='memory://', help="KV_URL untuk backend kv (default memory://).")
+        parser.add_argument('--kasir', type=int, default=8, help="Jumlah thread kasir yang memindai (default 8).")
+        parser.add_argument('--scans', type=int, default=200, help="Jumlah scan per kasir (default 200).")
+        parser.add_argument('--checkout-writers', type=int, default=2, help="Jumlah thread checkout sebagai beban tulis (default 2).")
+        parser.add_argument('--produk', type=int, default=200, help="Jumlah produk katalog (default 200).")
+
+    def handle(self, *args, **options):
+        if CustomUser.objects.filter(email__startswith=PREFIX).exists():
+            raise CommandError(f"Data benchmark sebelumnya masih ada (email {PREFIX}*); hapus dulu.")
+
+        kasir, produk = self.seed(options['kasir'], options['produk'])
+        try:
+            self.stdout.write(
+                f"{options['kasir']} kasir x {options['scans']} scan, {options['checkout_writers']} thread checkout"
+            )
+            self.stdout.write(f"{'backend':<10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'maks (ms)':>11}{'scan/detik':>12}{'checkout':>10}{'error':>8}")
+            for nama in options['backend'] or ['orm', 'kv']:
+                backend = buat_backend({'BACKEND': nama, 'KV_URL': options['kv_url']})
+                hasil = self.ukur(backend, kasir, produk, options['scans'], options['checkout_writers'])
+                for petugas in kasir:
+                    backend.kosongkan(petugas)
+                latensi = sorted(hasil['latensi'])
+                self.stdout.write(
+                    f"{nama:<10}{self.persentil(latensi, 50):>10.2f}{self.persentil(latensi, 95):>10.2f}"
+                    f"{self.persentil(latensi, 99):>10.2f}{latensi[-1]:>11.2f}"
+                    f"{len(latensi) / hasil['durasi']:>12.0f}{hasil['checkout']:>10}{hasil['error']:>8}"
+                )
+        finally:
+            Transaksi.objects.filter(user__in=kasir).delete()
+            CustomUser.objects.filter(email__startswith=PREFIX).delete()
+            Produk.objects.filter(kode__startswith=PREFIX).delete()
+            Kategori.objects.filter(nama=PREFIX).delete()
+
+    def seed(self, jumlah_kasir, jumlah_produk):
+        kategori = Kategori.objects.create(nama=PREFIX)
+        Produk.objects.bulk_create([
+            Produk(
+                kode=f'{PREFIX}-{i}', nama=f'Produk benchmark {i}', harga_khusus=Decimal('900'),
+                harga_umum=Decimal('1000'), stok=10 ** 9, kategori=kategori,
+            )
+            for i in range(jumlah_produk)
+        ])
+        kasir = [
+            CustomUser.objects.create_user(
+                email=f'{PREFIX}-{i}@example.com', password=None, full_name=f'Kasir {i}', role='petugas'
+            )
+            for i in range(jumlah_kasir)
+        ]
+        return kasir, list(Produk.objects.filter(kode__startswith=PREFIX))
+
+    def ukur(self, backend, kasir, produk, scans, jumlah_writer):
+        latensi = []
+        hitungan = {'checkout': 0, 'error': 0}
+        lock = threading.Lock()
+        berhenti = threading.Event()
+
+        def scan(petugas, seed):
+            rng = random.Random(seed)
+            hasil = []
+            try:
+                for _ in range(scans):
+                    item = rng.choice(produk)
+                    mulai = time.perf_counter()
+                    try:
+                        backend.tambah(petugas, item, 1, 'harga_umum')
+                    except OperationalError:
+                        with lock:
+                            hitungan['error'] += 1
+                    hasil.append((time.perf_counter() - mulai) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                latensi.extend(hasil)
+
+        def checkout(seed):
+            # Meniru tulisan checkout: transaksi + item + pengurangan stok dalam satu transaksi database
+            rng = random.Random(seed)
+            try:
+                while not berhenti.is_set():
+                    try:
+                        with transaction.atomic():
+                            transaksi = Transaksi.objects.create(user=rng.choice(kasir), total_harga=Decimal('5000'), metode_pembayaran='tunai')
+                            dibeli = rng.sample(produk, 5)
+                            TransaksiItem.objects.bulk_create([
+                                TransaksiItem(transaksi=transaksi, produk=p, jumlah=1, harga=p.harga_umum) for p in dibeli
+                            ])
+                            Produk.objects.filter(id__in=[p.id for p in dibeli]).update(stok=F('stok') - 1)
+                        with lock:
+                            hitungan['checkout'] += 1
+                    except OperationalError:
+                        pass
+            finally:
+                connection.close()
+
+        writers = [threading.Thread(target=checkout, args=(i,)) for i in range(jumlah_writer)]
+        scanners = [threading.Thread(target=scan, args=(petugas, i)) for i, petugas in enumerate(kasir)]
+        for thread in writers:
+            thread.start()
+        mulai = time.perf_counter()
+        for thread in scanners:
+            thread.start()
+        for thread in scanners:
+            thread.join()
+        durasi = time.perf_counter() - mulai
+        berhenti.set()
+        for thread in writers:
+            thread.join()
+        return {'latensi': latensi, 'durasi': durasi, **hitungan}
+
+    def persentil(self, data, p):
+        if len(data) < 2:
+            return data[0] if data else 0
+        return statistics.quantiles(data, n=100, method='inclusive')[p - 1]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produk_app', '0009_composite_indexes'),
+        ('transaksi_app', '0016_alter_invoiceitem_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(fields=['petugas', 'produk'], name='cartitem_petugas_produk_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaksi',
+            index=models.Index(fields=['user', 'tanggal', 'id'], name='transaksi_user_tanggal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaksi',
+            index=models.Index(fields=['tanggal', 'id'], name='transaksi_tanggal_idx'),
+        ),
+        migrations.AlterField(
+            model_name='cartitem',
+            name='petugas',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='transaksi',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
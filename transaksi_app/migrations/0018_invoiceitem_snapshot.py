@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produk_app', '0009_composite_indexes'),
+        ('transaksi_app', '0017_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoiceitem',
+            name='harga',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='invoiceitem',
+            name='nama_produk',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='invoiceitem',
+            name='produk',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='produk_app.produk'),
+        ),
+        migrations.AlterField(
+            model_name='invoiceitem',
+            name='cart_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='transaksi_app.cartitem'),
+        ),
+    ]
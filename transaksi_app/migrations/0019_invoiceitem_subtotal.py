@@ -0,0 +1,65 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:44
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+BATCH = 1000
+
+
+def isi_snapshot(apps, schema_editor):
+    """
+    Mengisi snapshot baris invoice lama: produk, nama dan harga diambil dari CartItem yang masih
+    dirujuk (sesuai tipe harganya), subtotal dihitung dari harga x jumlah, lalu total invoice
+    dihitung ulang dari subtotal tersimpan.
+    """
+    InvoiceItem = apps.get_model('transaksi_app', 'InvoiceItem')
+    Invoice = apps.get_model('transaksi_app', 'Invoice')
+
+    batch = []
+    baris_lama = (
+        InvoiceItem.objects
+        .filter(produk__isnull=True, cart_item__isnull=False)
+        .select_related('cart_item__produk')
+        .iterator(chunk_size=BATCH)
+    )
+    for item in baris_lama:
+        produk = item.cart_item.produk
+        item.produk = produk
+        item.nama_produk = produk.nama
+        item.harga = produk.harga_khusus if item.cart_item.tipe_harga == 'harga_khusus' else produk.harga_umum
+        batch.append(item)
+        if len(batch) >= BATCH:
+            InvoiceItem.objects.bulk_update(batch, ['produk', 'nama_produk', 'harga'])
+            batch = []
+    if batch:
+        InvoiceItem.objects.bulk_update(batch, ['produk', 'nama_produk', 'harga'])
+
+    InvoiceItem.objects.update(subtotal_harga=models.F('harga') * models.F('jumlah'))
+
+    total = (
+        InvoiceItem.objects
+        .filter(invoice=OuterRef('pk'))
+        .values('invoice')
+        .annotate(total=Sum('subtotal_harga'))
+        .values('total')
+    )
+    Invoice.objects.filter(pk__in=InvoiceItem.objects.values('invoice')).update(
+        total_harga=Coalesce(Subquery(total), models.Value(0), output_field=models.DecimalField(max_digits=15, decimal_places=2))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transaksi_app', '0018_invoiceitem_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoiceitem',
+            name='subtotal_harga',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=15),
+        ),
+        migrations.RunPython(isi_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transaksi_app', '0019_invoiceitem_subtotal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tanggal', models.DateField(unique=True)),
+                ('terakhir', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Counter Invoice',
+                'verbose_name_plural': 'Counter Invoice',
+            },
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Sum, F
 from django.utils import timezone
 from admin_app.models import CustomUser  # Import custom user
@@ -6,12 +6,20 @@ from produk_app.models import Produk
 from django.core.exceptions import ValidationError
 
 class Transaksi(models.Model):
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)  # Petugas kasir yang melakukan transaksi
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)  # Petugas kasir yang melakukan transaksi (di-index lewat transaksi_user_tanggal_idx)
     tanggal = models.DateTimeField(auto_now_add=True)  # Tanggal transaksi
     total_harga = models.DecimalField(max_digits=15, decimal_places=2, editable=False, default=0)  # Total harga transaksi
     metode_pembayaran = models.CharField(max_length=50)  # Metode pembayaran (misal: tunai, transfer, dll.)
     pelanggan = models.CharField(max_length=255, blank=True, null=True)  # Nama pelanggan
 
+    class Meta:
+        indexes = [
+            # Daftar/terbaru/dashboard per kasir: WHERE user = ? ORDER BY tanggal DESC, id DESC LIMIT n
+            models.Index(fields=['user', 'tanggal', 'id'], name='transaksi_user_tanggal_idx'),
+            # Daftar admin dan rentang tanggal laporan/export: WHERE tanggal BETWEEN ... ORDER BY tanggal, id
+            models.Index(fields=['tanggal', 'id'], name='transaksi_tanggal_idx'),
+        ]
+
     def __str__(self):
         return f"Transaksi #{self.id} oleh {self.user.full_name}"
 
@@ -21,50 +29,43 @@ class Transaksi(models.Model):
         self.total_harga = total
         self.save(update_fields=['total_harga'])  # Update hanya field total_harga
 
-    def save(self, *args, **kwargs):
-        """Override save untuk menghitung total_harga jika baru."""
-        is_new = self._state.adding  # Check if it's a new instance
-        super().save(*args, **kwargs)
-        if is_new:
-            self.update_total_harga()  # Only update total_harga if instance is newly created
-
     def buat_invoice(self):
-        """Membuat invoice dari transaksi ini."""
+        """
+        Membuat invoice dari transaksi ini dengan jumlah query tetap: baris invoice adalah snapshot
+        (produk, nama, harga, jumlah) dari item transaksi dan dibuat dengan satu bulk insert.
+        """
         if hasattr(self, 'invoice'):
             raise ValueError("Invoice sudah dibuat untuk transaksi ini.")
         
-        # Buat nomor invoice unik (misalnya, bisa menggunakan ID transaksi)
-        nomor_invoice = f"INV-{self.id}-{timezone.now().strftime('%Y%m%d')}"
-
-        # Buat invoice
-        invoice = Invoice.objects.create(
-            transaksi=self,
-            nomor_invoice=nomor_invoice,
-            total_harga=self.total_harga,
-            pelanggan=self.pelanggan
-        )
-
-        # Buat item invoice dari item transaksi
-        for item in self.items.all():
-            InvoiceItem.objects.create(
-                invoice=invoice,
-                transaksi_item=item,
-                jumlah=item.jumlah
+        from .penomoran import ambil_nomor_invoice
+
+        items = list(self.items.select_related('produk'))
+
+        with transaction.atomic():
+            # Nomor diambil di dalam transaksi yang sama agar ikut batal bila invoice gagal dibuat
+            nomor_invoice = ambil_nomor_invoice()
+            invoice = Invoice.objects.create(
+                transaksi=self,
+                nomor_invoice=nomor_invoice,
+                total_harga=self.total_harga,
+                pelanggan=self.pelanggan or ''
             )
+            InvoiceItem.objects.bulk_create([
+                InvoiceItem.snapshot(invoice, item.produk, item.harga, item.jumlah)
+                for item in items
+            ])
 
         return invoice
 
     @classmethod
     def get_today_summary(cls, user):
-        """Mengambil ringkasan transaksi untuk user pada hari ini."""
-        today = timezone.now().date()
-
-        # Filter transaksi yang dilakukan oleh user pada hari ini
-        transaksi_hari_ini = cls.objects.filter(user=user, tanggal__date=today)
+        """Mengambil ringkasan transaksi untuk user pada hari ini dari counter harian kasir."""
+        from laporan_app.services import ringkasan_kasir  # Import lokal: laporan_app bergantung pada model ini
 
-        # Hitung jumlah transaksi dan total pendapatan
-        jumlah_transaksi = transaksi_hari_ini.count()
-        total_pendapatan = transaksi_hari_ini.aggregate(Sum('total_harga'))['total_harga__sum'] or 0
+        today = timezone.localdate()
+        ringkasan = ringkasan_kasir(user, [today])[today]
+        jumlah_transaksi = ringkasan['jumlah_transaksi']
+        total_pendapatan = ringkasan['total_penjualan']
 
         return jumlah_transaksi, total_pendapatan
 
@@ -101,7 +102,7 @@ class TransaksiItem(models.Model):
 
 
 class CartItem(models.Model):
-    petugas = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    petugas = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)  # Di-index lewat cartitem_petugas_produk_idx
     produk = models.ForeignKey(Produk, on_delete=models.CASCADE)
     jumlah = models.PositiveIntegerField(default=1)
     tipe_harga = models.CharField(max_length=20, choices=[
@@ -109,6 +110,12 @@ class CartItem(models.Model):
         ('harga_khusus', 'Harga Khusus')
     ])
 
+    class Meta:
+        indexes = [
+            # Keranjang per petugas dan get_or_create (petugas, produk) saat scan
+            models.Index(fields=['petugas', 'produk'], name='cartitem_petugas_produk_idx'),
+        ]
+
     def subtotal(self):
         """Menghitung subtotal berdasarkan tipe_harga."""
         harga = self.produk.harga_khusus if self.tipe_harga == 'harga_khusus' else self.produk.harga_umum
@@ -137,22 +144,54 @@ class Invoice(models.Model):
         return f"Invoice #{self.nomor_invoice} untuk {self.pelanggan}"
 
     def total_invoice(self):
-        """Menghitung total dari semua item dalam invoice."""
-        return sum(item.subtotal() for item in self.items.all())
+        """Menghitung total dari subtotal tersimpan semua item invoice dengan satu agregat di database."""
+        return self.items.aggregate(total=Sum('subtotal_harga'))['total'] or 0
+
+class InvoiceCounter(models.Model):
+    """Nomor invoice terakhir yang sudah dibagikan per hari (lihat transaksi_app.penomoran)."""
+    tanggal = models.DateField(unique=True)
+    terakhir = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Counter Invoice'
+        verbose_name_plural = 'Counter Invoice'
+
+    def __str__(self):
+        return f"{self.tanggal}: {self.terakhir}"
+
 
 class InvoiceItem(models.Model):
     invoice = models.ForeignKey('Invoice', related_name='items', on_delete=models.CASCADE)
-    cart_item = models.ForeignKey('CartItem', on_delete=models.CASCADE, default=1)
+    # Referensi lama ke keranjang; keranjang dihapus saat checkout, jadi baris invoice tidak boleh ikut terhapus
+    cart_item = models.ForeignKey('CartItem', on_delete=models.SET_NULL, null=True, blank=True)
+    # Snapshot baris saat invoice dibuat, agar invoice tidak berubah bila produk diubah atau dihapus
+    produk = models.ForeignKey(Produk, on_delete=models.SET_NULL, null=True, blank=True)
+    nama_produk = models.CharField(max_length=255, blank=True, default='')
+    harga = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # Harga satuan saat invoice dibuat
     jumlah = models.PositiveIntegerField()
+    subtotal_harga = models.DecimalField(max_digits=15, decimal_places=2, default=0, editable=False)  # harga x jumlah
 
     class Meta:
         verbose_name = 'Item Invoice'
         verbose_name_plural = 'Item Invoice'
 
+    @classmethod
+    def snapshot(cls, invoice, produk, harga, jumlah, cart_item=None):
+        """Baris invoice (belum disimpan) dengan nama, harga dan subtotal produk saat ini, siap untuk bulk_create."""
+        return cls(
+            invoice=invoice, produk=produk, cart_item=cart_item, nama_produk=produk.nama,
+            harga=harga, jumlah=jumlah, subtotal_harga=harga * jumlah,
+        )
+
     def subtotal(self):
-        """Menghitung subtotal berdasarkan jumlah dan harga per item di CartItem."""
-        harga = self.cart_item.produk.harga_khusus if self.cart_item.tipe_harga == 'harga_khusus' else self.cart_item.produk.harga_umum
-        return self.jumlah * harga
+        """Subtotal tersimpan; tidak perlu query ke produk atau keranjang."""
+        return self.subtotal_harga
+
+    def save(self, *args, **kwargs):
+        self.subtotal_harga = self.harga * self.jumlah
+        if kwargs.get('update_fields') is not None and {'harga', 'jumlah'} & set(kwargs['update_fields']):
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'subtotal_harga'}
+        super().save(*args, **kwargs)
 
     def clean(self):
         """Validasi untuk memastikan jumlah lebih besar dari nol."""
@@ -160,4 +199,4 @@ class InvoiceItem(models.Model):
             raise ValidationError('Jumlah harus lebih besar dari nol.')
 
     def __str__(self):
-        return f"{self.jumlah} x {self.cart_item.produk.nama} - Invoice #{self.invoice.nomor_invoice}"
+        return f"{self.jumlah} x {self.nama_produk} - Invoice #{self.invoice.nomor_invoice}"
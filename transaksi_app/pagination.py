@@ -0,0 +1,7 @@
+from rest_framework.pagination import CursorPagination
+
+class TransaksiCursorPagination(CursorPagination):
+    page_size = 50  # Ukuran halaman default
+    page_size_query_param = 'page_size'  # Mengizinkan klien untuk mengatur ukuran halaman menggunakan parameter query
+    max_page_size = 200  # Batas maksimum ukuran halaman
+    ordering = ('-tanggal', '-id')  # Keyset (tanggal, id) agar urutan stabil walau tanggal sama
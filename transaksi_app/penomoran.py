@@ -0,0 +1,112 @@
+"""
+Penomoran invoice harian tanpa bentrok: `INV-YYYYMMDD-000001`, urut per tanggal lokal.
+
+Nomor terakhir per hari disimpan di InvoiceCounter dan dinaikkan dengan UPDATE atomik, sehingga baris
+counter terkunci sampai transaksi pemanggil selesai. Nomor sudah unik sebelum invoice di-insert; tidak
+ada lagi IntegrityError dari unique constraint yang harus di-retry. Mode dipilih lewat
+settings.INVOICE_NUMBERING['BLOK']:
+
+- BLOK = 1: setiap invoice menaikkan counter di dalam transaksi invoice itu sendiri. Bila invoice batal,
+  counter ikut batal sehingga nomor tidak berlubang; harganya satu lock counter per invoice.
+- BLOK > 1: setiap worker memesan BLOK nomor sekaligus dan membagikan sisanya dari memori tanpa query.
+  Sisa blok baru dipakai setelah transaksi pemesanannya commit, jadi nomor tetap unik; nomor milik
+  invoice yang gagal atau sisa blok worker yang berhenti menjadi lubang.
+"""
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import InvoiceCounter
+
+DEFAULTS = {
+    'PREFIX': 'INV',
+    'BLOK': 1,      # Jumlah nomor yang dipesan worker sekaligus; 1 = tanpa lubang
+}
+
+
+def format_nomor(prefix, tanggal, nomor):
+    return f"{prefix}-{tanggal:%Y%m%d}-{nomor:06d}"
+
+
+def reservasi_counter(tanggal, jumlah):
+    """Menaikkan counter `tanggal` sebanyak `jumlah` dan mengembalikan nomor terbesar yang dipesan."""
+    with transaction.atomic():
+        if not InvoiceCounter.objects.filter(tanggal=tanggal).update(terakhir=F('terakhir') + jumlah):
+            try:
+                with transaction.atomic():
+                    InvoiceCounter.objects.create(tanggal=tanggal, terakhir=jumlah)
+                return jumlah
+            except IntegrityError:
+                # Worker lain membuat counter hari ini lebih dulu
+                InvoiceCounter.objects.filter(tanggal=tanggal).update(terakhir=F('terakhir') + jumlah)
+        return InvoiceCounter.objects.values_list('terakhir', flat=True).get(tanggal=tanggal)
+
+
+class PenomoranInvoice:
+    """Pembagi nomor invoice per proses; menyimpan sisa blok yang sudah commit per tanggal."""
+
+    def __init__(self, prefix='INV', blok=1):
+        self.prefix = prefix
+        self.blok = blok
+        self._lock = threading.Lock()
+        self._rentang = {}  # tanggal -> [[berikut, akhir], ...]
+
+    def ambil(self, tanggal=None):
+        tanggal = tanggal or timezone.localdate()
+        nomor = self._dari_memori(tanggal) if self.blok > 1 else None
+        if nomor is None:
+            akhir = reservasi_counter(tanggal, self.blok)
+            nomor = akhir - self.blok + 1
+            if akhir > nomor:
+                transaction.on_commit(lambda: self._simpan(tanggal, nomor + 1, akhir))
+        return format_nomor(self.prefix, tanggal, nomor)
+
+    def _dari_memori(self, tanggal):
+        with self._lock:
+            rentang = self._rentang.get(tanggal)
+            if not rentang:
+                return None
+            nomor = rentang[0][0]
+            if nomor == rentang[0][1]:
+                rentang.pop(0)
+            else:
+                rentang[0][0] += 1
+            return nomor
+
+    def _simpan(self, tanggal, awal, akhir):
+        with self._lock:
+            # Sisa blok hari sebelumnya tidak akan dipakai lagi
+            self._rentang = {t: rentang for t, rentang in self._rentang.items() if t >= tanggal}
+            self._rentang.setdefault(tanggal, []).append([awal, akhir])
+
+
+_penomoran = None
+_penomoran_lock = threading.Lock()
+
+
+def get_penomoran():
+    """Pembagi nomor invoice per proses, dibuat sekali dari settings.INVOICE_NUMBERING."""
+    global _penomoran
+    if _penomoran is None:
+        with _penomoran_lock:
+            if _penomoran is None:
+                config = {**DEFAULTS, **getattr(settings, 'INVOICE_NUMBERING', {})}
+                _penomoran = PenomoranInvoice(prefix=config['PREFIX'], blok=config['BLOK'])
+    return _penomoran
+
+
+@receiver(setting_changed)
+def reset_penomoran(setting, **kwargs):
+    global _penomoran
+    if setting == 'INVOICE_NUMBERING':
+        _penomoran = None
+
+
+def ambil_nomor_invoice(tanggal=None):
+    """Nomor invoice berikutnya; panggil di dalam transaksi yang membuat invoice-nya."""
+    return get_penomoran().ambil(tanggal)
@@ -1,32 +1,31 @@
 from django.db import transaction
-from django.db.models import F
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from .models import Transaksi, TransaksiItem, CartItem
 from produk_app.models import Produk
+from produk_app.services import reservasi_stok, StokTidakCukup
+from laporan_app.services import catat_penjualan
+from petugas_app.notifikasi import terbitkan_penjualan
 from admin_app.models import CustomUser
 from .models import InvoiceItem, Invoice
+from .penomoran import ambil_nomor_invoice
+from .cart import get_cart_backend
 
 
 class TransaksiItemSerializer(serializers.ModelSerializer):
-    kode_produk = serializers.SerializerMethodField()
-    jumlah = serializers.IntegerField()
+    # Saat menulis, produk dicari lewat kode_produk (lihat TransaksiSerializer.validate_items)
+    kode_produk = serializers.CharField(source='produk.kode')
+    jumlah = serializers.IntegerField(min_value=1)
     tipe_harga = serializers.ChoiceField(choices=[('harga_umum', 'Harga Umum'), ('harga_khusus', 'Harga Khusus')])
-    nama_produk = serializers.SerializerMethodField()
+    nama_produk = serializers.CharField(source='produk.nama', read_only=True)
 
     class Meta:
         model = TransaksiItem
         fields = ['kode_produk', 'jumlah', 'tipe_harga', 'nama_produk']
 
-    def get_kode_produk(self, obj):
-        """Retrieve kode from the related Produk model."""
-        return obj.produk.kode
-
-    def get_nama_produk(self, obj):
-        return obj.produk.nama
-
 
 class TransaksiSerializer(serializers.ModelSerializer):
-    items = TransaksiItemSerializer(many=True)
+    items = TransaksiItemSerializer(many=True, allow_empty=False)
     user = serializers.StringRelatedField(read_only=True)
 
     class Meta:
@@ -34,38 +33,56 @@ class TransaksiSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'total_harga', 'tanggal', 'items']
         read_only_fields = ['id', 'total_harga', 'tanggal']
 
+    def validate_items(self, items_data):
+        """Mencari id produk setiap item dari kode_produk dengan satu query, berapa pun jumlah itemnya."""
+        kode_ke_id = dict(
+            Produk.objects
+            .filter(kode__in={data['produk']['kode'] for data in items_data})
+            .values_list('kode', 'id')
+        )
+        errors = {}
+        for index, data in enumerate(items_data):
+            produk_id = kode_ke_id.get(data['produk']['kode'])
+            if produk_id is None:
+                errors[index] = f"Produk dengan kode {data['produk']['kode']} tidak ditemukan."
+            data['produk_id'] = produk_id
+        if errors:
+            raise serializers.ValidationError(errors)
+        return items_data
+
     @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop('items')
         user = self.context['request'].user
 
-        
-        transaksi = Transaksi.objects.create(user=user, total_harga=0)
+        permintaan = {}
+        for item_data in items_data:
+            produk_id = item_data['produk_id']
+            permintaan[produk_id] = permintaan.get(produk_id, 0) + item_data['jumlah']
+
+        # Kunci dan kurangi stok semua produk secara atomik sebelum transaksi dibuat
+        try:
+            produk_map = reservasi_stok(permintaan)
+        except StokTidakCukup as e:
+            raise serializers.ValidationError({
+                'items': [
+                    f'Stok produk "{k["nama"]}" tidak mencukupi. Stok saat ini: {k["tersedia"]}'
+                    for k in e.kekurangan
+                ]
+            })
 
         total_harga = 0
         transaksi_items = []
-        produk_list = []
 
         for item_data in items_data:
-            produk = Produk.objects.get(id=item_data.get('produk').id)  
-            jumlah = item_data.get('jumlah')
-            tipe_harga = item_data.get('tipe_harga')
-
-           
-            if produk.stok < jumlah:
-                raise serializers.ValidationError(f'Stok produk "{produk.nama}" tidak mencukupi. Stok saat ini: {produk.stok}')
+            produk = produk_map[item_data['produk_id']]
+            jumlah = item_data['jumlah']
+            tipe_harga = item_data['tipe_harga']
 
-            
             harga = produk.harga_khusus if tipe_harga == 'harga_khusus' else produk.harga_umum
             total_harga += harga * jumlah
 
-            
-            produk.stok = F('stok') - jumlah
-            produk_list.append(produk)
-
-            
             transaksi_item = TransaksiItem(
-                transaksi=transaksi,
                 produk=produk,
                 jumlah=jumlah,
                 tipe_harga=tipe_harga,
@@ -73,15 +90,16 @@ class TransaksiSerializer(serializers.ModelSerializer):
             )
             transaksi_items.append(transaksi_item)
 
-        Produk.objects.bulk_update(produk_list, ['stok'])
-
-        
+        transaksi = Transaksi.objects.create(user=user, total_harga=total_harga)
+        for transaksi_item in transaksi_items:
+            transaksi_item.transaksi = transaksi
         TransaksiItem.objects.bulk_create(transaksi_items)
 
-        
-        transaksi.total_harga = total_harga
-        transaksi.save()
+        catat_penjualan(transaksi, transaksi_items)
+        terbitkan_penjualan(transaksi, user, produk_map, permintaan)
 
+        # Item dan produknya dimuat sekaligus untuk respons
+        prefetch_related_objects([transaksi], 'items__produk')
         return transaksi
 
 
@@ -95,7 +113,10 @@ class CartItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'produk', 'produk_detail', 'jumlah', 'tipe_harga', 'subtotal', 'tipe_harga_keterangan']
 
     def get_produk_detail(self, obj):
-        harga = obj.produk.harga_khusus if obj.tipe_harga == 'harga_khusus' else obj.produk.harga_umum
+        # Pakai harga yang sudah dihitung backend keranjang (lihat cart.py) bila tersedia
+        harga = getattr(obj, 'harga_satuan', None)
+        if harga is None:
+            harga = obj.produk.harga_khusus if obj.tipe_harga == 'harga_khusus' else obj.produk.harga_umum
         return {
             'kode': obj.produk.kode,
             'nama': obj.produk.nama,
@@ -103,51 +124,212 @@ class CartItemSerializer(serializers.ModelSerializer):
         }
 
     def get_subtotal(self, obj):
-        return obj.subtotal()
+        subtotal = getattr(obj, 'subtotal_harga', None)
+        return obj.subtotal() if subtotal is None else subtotal
 
     def get_tipe_harga_keterangan(self, obj):
         return "Harga Khusus" if obj.tipe_harga == 'harga_khusus' else "Harga Umum"
 
 
+class TipeHargaField(serializers.CharField):
+    """Tipe harga item keranjang; alias 'umum'/'khusus' diterima dan harus salah satu pilihan CartItem.tipe_harga."""
+    ALIAS = {'umum': 'harga_umum', 'khusus': 'harga_khusus'}
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        value = self.ALIAS.get(value, value)
+        if value not in dict(CartItem._meta.get_field('tipe_harga').choices):
+            raise serializers.ValidationError("Tipe harga harus 'harga_umum' atau 'harga_khusus'.")
+        return value
+
+
+class AddToCartSerializer(serializers.Serializer):
+    """Satu scan untuk ditambahkan ke keranjang; backend key-value tidak punya constraint kolom, jadi validasi di sini."""
+    kode_produk = serializers.CharField()
+    jumlah = serializers.IntegerField(min_value=1, default=1)
+    tipe_harga = TipeHargaField(default='harga_umum')
+
+
+class UpdateCartItemSerializer(serializers.Serializer):
+    """Jumlah baru satu item keranjang; 0 menghapus item."""
+    jumlah = serializers.IntegerField(min_value=0)
+
+
+class BulkCartItemSerializer(serializers.Serializer):
+    """Satu baris scan pada operasi keranjang massal; produk dicari lewat `kode` atau `barcode`."""
+    kode = serializers.CharField(required=False)
+    barcode = serializers.CharField(required=False)
+    jumlah = serializers.IntegerField(min_value=0, default=1)
+    tipe_harga = TipeHargaField(required=False)
+
+    def validate(self, data):
+        if bool(data.get('kode')) == bool(data.get('barcode')):
+            raise serializers.ValidationError("Isi salah satu dari kode atau barcode.")
+        if self.context.get('aksi') == 'tambah' and data['jumlah'] < 1:
+            raise serializers.ValidationError({'jumlah': "Jumlah minimal 1."})
+        return data
+
+
 class InvoiceItemSerializer(serializers.ModelSerializer):
+    """
+    Baris invoice. Saat menulis, baris baru diisi dengan `produk` atau `cart_item` (harga diambil dari
+    produk sesuai tipe harga bila `harga` kosong); baris lama dirujuk lewat `id`.
+    """
+    id = serializers.IntegerField(required=False)
+    produk = serializers.IntegerField(source='produk_id', required=False, allow_null=True)
+    cart_item = serializers.IntegerField(required=False, write_only=True)
+    harga = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    jumlah = serializers.IntegerField(min_value=1)
+    subtotal = serializers.SerializerMethodField()
+
     class Meta:
         model = InvoiceItem
-        fields = ['cart_item', 'jumlah', 'subtotal']
+        fields = ['id', 'produk', 'cart_item', 'nama_produk', 'harga', 'jumlah', 'subtotal']
+        read_only_fields = ['nama_produk']
+
+    def get_subtotal(self, obj):
+        return obj.subtotal()
+
 
 class InvoiceSerializer(serializers.ModelSerializer):
-    items = InvoiceItemSerializer(many=True)
+    items = InvoiceItemSerializer(many=True, required=False)
+    transaksi = serializers.PrimaryKeyRelatedField(queryset=Transaksi.objects.all())
 
     class Meta:
         model = Invoice
-        fields = ['nomor_invoice', 'tanggal_invoice', 'total_harga', 'pelanggan', 'status', 'items']
-        read_only_fields = ['tanggal_invoice', 'total_harga']  # Total harga dan tanggal dibuat tidak bisa diubah
-
-    def create(self, validated_data):
-        items_data = validated_data.pop('items')  # Ambil data item dari validated_data
-        invoice = Invoice.objects.create(**validated_data)  # Buat objek Invoice
+        fields = ['id', 'transaksi', 'nomor_invoice', 'tanggal_invoice', 'total_harga', 'pelanggan', 'status', 'items']
+        # Total harga, tanggal dibuat, dan nomor (dari transaksi_app.penomoran) tidak bisa diisi klien
+        read_only_fields = ['nomor_invoice', 'tanggal_invoice', 'total_harga']
+
+    def validate_transaksi(self, transaksi):
+        if self.instance is not None and transaksi.id != self.instance.transaksi_id:
+            raise serializers.ValidationError("Transaksi invoice tidak bisa diubah.")
+        request = self.context.get('request')
+        if request is not None and request.user.role == 'petugas' and transaksi.user_id != request.user.id:
+            raise serializers.ValidationError("Transaksi ini bukan milik Anda.")
+        if self.instance is None and Invoice.objects.filter(transaksi=transaksi).exists():
+            raise serializers.ValidationError("Invoice sudah dibuat untuk transaksi ini.")
+        return transaksi
 
-        # Buat objek InvoiceItem berdasarkan data yang ada
-        for item_data in items_data:
-            InvoiceItem.objects.create(invoice=invoice, **item_data)
+    def validate_items(self, items_data):
+        """
+        Melengkapi setiap baris menjadi snapshot (produk, nama, harga, jumlah). Produk dan item keranjang
+        dimuat dengan satu query IN masing-masing, berapa pun jumlah barisnya. `cart_item` hanya dicari
+        di keranjang user yang membuat request, lewat backend keranjang yang aktif.
+        """
+        existing = {item.id: item for item in self.instance.items.select_related('produk')} if self.instance is not None else {}
+        produk_map = Produk.objects.in_bulk({data['produk_id'] for data in items_data if data.get('produk_id')})
+        cart_ids = {data['cart_item'] for data in items_data if data.get('cart_item')}
+        keranjang = get_cart_backend()
+        cart_map = keranjang.ambil_items(self.context['request'].user, cart_ids) if cart_ids else {}
+
+        baris, errors, id_dipakai = [], {}, set()
+        for index, data in enumerate(items_data):
+            lama = existing.get(data.get('id'))
+            if data.get('id') is not None and lama is None:
+                errors[index] = "Item invoice tidak ditemukan."
+                continue
+            if lama is not None:
+                # Satu baris lama hanya boleh dirujuk sekali, agar tidak terhitung dua kali di total
+                if lama.id in id_dipakai:
+                    errors[index] = "Item invoice dirujuk lebih dari sekali."
+                    continue
+                id_dipakai.add(lama.id)
+
+            cart_item = None
+            if data.get('cart_item'):
+                cart_item = cart_map.get(data['cart_item'])
+                if cart_item is None:
+                    errors[index] = "Item keranjang tidak ditemukan."
+                    continue
+                produk = cart_item.produk
+                harga = produk.harga_khusus if cart_item.tipe_harga == 'harga_khusus' else produk.harga_umum
+            elif data.get('produk_id'):
+                produk = produk_map.get(data['produk_id'])
+                if produk is None:
+                    errors[index] = "Produk tidak ditemukan."
+                    continue
+                harga = produk.harga_umum
+            elif lama is not None:
+                produk, harga = lama.produk, lama.harga
+            else:
+                errors[index] = "Isi produk atau cart_item untuk item baru."
+                continue
+
+            baris.append({
+                'id': data.get('id'),
+                'produk': produk,
+                # Item keranjang key-value tidak punya baris CartItem untuk dirujuk
+                'cart_item': cart_item if keranjang.item_tersimpan else None,
+                'nama_produk': produk.nama if produk is not None else lama.nama_produk,
+                'harga': data.get('harga', harga),
+                'jumlah': data['jumlah'],
+            })
+        if errors:
+            raise serializers.ValidationError(errors)
+        self._existing_items = existing
+        return baris
+
+    def _baris_dari_transaksi(self, transaksi):
+        return [
+            {'id': None, 'produk': item.produk, 'cart_item': None, 'nama_produk': item.produk.nama, 'harga': item.harga, 'jumlah': item.jumlah}
+            for item in transaksi.items.select_related('produk')
+        ]
+
+    def _baris_invoice(self, invoice, data):
+        return InvoiceItem(
+            invoice=invoice, subtotal_harga=data['harga'] * data['jumlah'],
+            **{field: value for field, value in data.items() if field != 'id'},
+        )
 
+    @transaction.atomic
+    def create(self, validated_data):
+        # Tanpa items, baris invoice disalin dari item transaksi
+        items_data = validated_data.pop('items', None)
+        if items_data is None:
+            items_data = self._baris_dari_transaksi(validated_data['transaksi'])
+
+        invoice = Invoice.objects.create(
+            nomor_invoice=ambil_nomor_invoice(),
+            total_harga=sum(data['harga'] * data['jumlah'] for data in items_data),
+            **validated_data,
+        )
+        InvoiceItem.objects.bulk_create([self._baris_invoice(invoice, data) for data in items_data])
         return invoice
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         items_data = validated_data.pop('items', None)  
 
         # Update field di Invoice
-        instance.nomor_invoice = validated_data.get('nomor_invoice', instance.nomor_invoice)
         instance.pelanggan = validated_data.get('pelanggan', instance.pelanggan)
         instance.status = validated_data.get('status', instance.status)
-        instance.save()
 
-        # Jika ada data item, update atau buat item baru
+        # Jika ada data item, terapkan selisihnya saja: ubah baris yang berubah, buat yang baru, hapus yang hilang
         if items_data is not None:
-            # Hapus semua item lama
-            instance.items.all().delete()
-            for item_data in items_data:
-                InvoiceItem.objects.create(invoice=instance, **item_data)
+            existing = self._existing_items
+            dibuat, diubah = [], []
+            for data in items_data:
+                if data['id'] is None:
+                    dibuat.append(self._baris_invoice(instance, data))
+                    continue
+                item = existing.pop(data['id'])
+                baru = {field: data[field] for field in ('produk', 'nama_produk', 'harga', 'jumlah')}
+                baru['subtotal_harga'] = data['harga'] * data['jumlah']
+                if any(getattr(item, field) != value for field, value in baru.items()):
+                    for field, value in baru.items():
+                        setattr(item, field, value)
+                    diubah.append(item)
+
+            if existing:
+                InvoiceItem.objects.filter(id__in=list(existing)).delete()
+            if diubah:
+                InvoiceItem.objects.bulk_update(diubah, ['produk', 'nama_produk', 'harga', 'jumlah', 'subtotal_harga'])
+            if dibuat:
+                InvoiceItem.objects.bulk_create(dibuat)
+            instance.total_harga = sum(data['harga'] * data['jumlah'] for data in items_data)
 
+        instance.save()
         return instance
 
 
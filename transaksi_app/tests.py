@@ -1,3 +1,896 @@
-from django.test import TestCase
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from admin_app.models import CustomUser
+from laporan_app.services import bangun_ulang_rollup
+from produk_app.cache import get_produk_cache
+from produk_app.models import Kategori, Produk, StockLog
+from .cart import KeyValueCartBackend, MemoriKeyValue, get_cart_backend, reset_cart_backend
+from .models import CartItem, InvoiceCounter, InvoiceItem, Transaksi, TransaksiItem
+from .penomoran import PenomoranInvoice, ambil_nomor_invoice
+
+
+class CheckoutViewTests(TestCase):
+    def setUp(self):
+        self.kategori = Kategori.objects.create(nama='Makanan')
+        self.petugas = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.petugas)
+
+    def isi_keranjang(self, jumlah_produk, prefix):
+        for i in range(jumlah_produk):
+            produk = Produk.objects.create(
+                kode=f'{prefix}-{i}',
+                nama=f'Produk {prefix} {i}',
+                harga_khusus=Decimal('900'),
+                harga_umum=Decimal('1000'),
+                stok=10,
+                kategori=self.kategori,
+            )
+            CartItem.objects.create(petugas=self.petugas, produk=produk, jumlah=2, tipe_harga='harga_umum')
+
+    def checkout_queries(self, jumlah_produk, prefix):
+        self.isi_keranjang(jumlah_produk, prefix)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('checkout'), {'pelanggan': 'Budi'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return len(ctx.captured_queries)
+
+    def test_checkout_jumlah_query_tetap(self):
+        # Checkout pertama hari itu membuat baris rekap kasir; setelahnya bentuk query selalu sama
+        self.checkout_queries(1, 'W')
+        kecil = self.checkout_queries(1, 'A')
+        besar = self.checkout_queries(40, 'B')
+        self.assertEqual(kecil, besar)
+
+    def test_checkout_mengurangi_stok_dan_menghitung_total(self):
+        self.isi_keranjang(3, 'C')
+        response = self.client.post(reverse('checkout'), {'pelanggan': 'Budi'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        transaksi = Transaksi.objects.get()
+        self.assertEqual(transaksi.total_harga, Decimal('6000'))
+        self.assertEqual(TransaksiItem.objects.filter(transaksi=transaksi).count(), 3)
+        self.assertEqual(len(response.data['transaksi']['items']), 3)
+        self.assertFalse(Produk.objects.exclude(stok=8).exists())
+        self.assertFalse(CartItem.objects.filter(petugas=self.petugas).exists())
+
+    def test_checkout_stok_tidak_cukup(self):
+        self.isi_keranjang(2, 'D')
+        Produk.objects.filter(kode='D-1').update(stok=1)
+        response = self.client.post(reverse('checkout'), {'pelanggan': 'Budi'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaksi.objects.exists())
+        self.assertEqual(Produk.objects.get(kode='D-0').stok, 10)
+
+
+class TransaksiCreateViewTests(TestCase):
+    def setUp(self):
+        kategori = Kategori.objects.create(nama='Makanan')
+        self.produk = [
+            Produk.objects.create(
+                kode=f'T{i}', nama=f'Produk {i}', harga_khusus=Decimal('900'), harga_umum=Decimal('1000'),
+                stok=10, kategori=kategori,
+            )
+            for i in range(2)
+        ]
+        self.petugas = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.petugas)
+
+    def buat(self, items):
+        return self.client.post(reverse('transaksi-list-create'), {'items': items}, format='json')
+
+    def test_buat_transaksi_mereservasi_stok(self):
+        response = self.buat([
+            {'kode_produk': 'T0', 'jumlah': 2, 'tipe_harga': 'harga_umum'},
+            {'kode_produk': 'T1', 'jumlah': 3, 'tipe_harga': 'harga_khusus'},
+            {'kode_produk': 'T0', 'jumlah': 1, 'tipe_harga': 'harga_umum'},
+        ])
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['total_harga'], '5700.00')
+        self.assertEqual([item['nama_produk'] for item in response.data['items']], ['Produk 0', 'Produk 1', 'Produk 0'])
+        self.assertEqual(dict(Produk.objects.values_list('kode', 'stok')), {'T0': 7, 'T1': 7})
+        self.assertEqual(Transaksi.objects.get().items.count(), 3)
+
+    def test_stok_tidak_cukup_tidak_mengubah_apa_pun(self):
+        response = self.buat([
+            {'kode_produk': 'T0', 'jumlah': 2, 'tipe_harga': 'harga_umum'},
+            {'kode_produk': 'T1', 'jumlah': 11, 'tipe_harga': 'harga_umum'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Produk 1', response.data['items'][0])
+        self.assertFalse(Transaksi.objects.exists())
+        self.assertFalse(Produk.objects.exclude(stok=10).exists())
+
+    def test_kode_tidak_dikenal_dan_jumlah_tidak_valid(self):
+        response = self.buat([
+            {'kode_produk': 'T0', 'jumlah': 0, 'tipe_harga': 'harga_umum'},
+            {'kode_produk': 'X9', 'jumlah': 1, 'tipe_harga': 'harga_umum'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('jumlah', response.data['items'][0])
+        self.assertEqual(self.buat([{'kode_produk': 'X9', 'jumlah': 1, 'tipe_harga': 'harga_umum'}]).status_code, 400)
+        self.assertEqual(self.buat([]).status_code, 400)
+        self.assertFalse(Transaksi.objects.exists())
+
+
+class TransaksiListViewTests(TestCase):
+    def setUp(self):
+        self.kategori = Kategori.objects.create(nama='Makanan')
+        self.produk = Produk.objects.create(
+            kode='P1', nama='Produk 1', harga_khusus=Decimal('900'), harga_umum=Decimal('1000'), stok=0, kategori=self.kategori
+        )
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com', password='rahasia123', full_name='Admin', role='admin', is_admin_aplikasi=True
+        )
+        self.petugas = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def buat_transaksi(self, jumlah, user=None, metode='tunai'):
+        for _ in range(jumlah):
+            transaksi = Transaksi.objects.create(user=user or self.petugas, total_harga=Decimal('2000'), metode_pembayaran=metode)
+            TransaksiItem.objects.bulk_create([
+                TransaksiItem(transaksi=transaksi, produk=self.produk, jumlah=1, harga=Decimal('1000')),
+                TransaksiItem(transaksi=transaksi, produk=self.produk, jumlah=1, harga=Decimal('1000')),
+            ])
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('transaksi-list-create'), {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_jumlah_query_tidak_bergantung_jumlah_transaksi(self):
+        self.buat_transaksi(3)
+        sedikit = self.list_queries()
+        self.buat_transaksi(30)
+        self.assertEqual(self.list_queries(), sedikit)
+
+    def test_cursor_melewati_semua_transaksi_tanpa_duplikat(self):
+        self.buat_transaksi(7)
+        ids = []
+        url = reverse('transaksi-list-create') + '?page_size=3'
+        while url:
+            response = self.client.get(url)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, list(Transaksi.objects.order_by('-tanggal', '-id').values_list('id', flat=True)))
+
+    def test_filter_metode_pembayaran_dan_kasir(self):
+        self.buat_transaksi(2, metode='tunai')
+        self.buat_transaksi(1, metode='transfer')
+        self.buat_transaksi(1, user=self.admin, metode='transfer')
+        response = self.client.get(reverse('transaksi-list-create'), {'metode_pembayaran': 'TRANSFER', 'kasir': self.petugas.id})
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_filter_rentang_tanggal_lokal_inklusif(self):
+        self.buat_transaksi(3)
+        tz = timezone.get_current_timezone()
+        hari = date(2026, 3, 10)
+        # Tepat tengah malam lokal, detik terakhir hari itu, dan hari berikutnya
+        tanggal = [
+            datetime.combine(hari, dt_time.min, tzinfo=tz),
+            datetime.combine(hari, dt_time.max, tzinfo=tz),
+            datetime.combine(hari + timedelta(days=1), dt_time.min, tzinfo=tz),
+        ]
+        for transaksi, waktu in zip(Transaksi.objects.order_by('id'), tanggal):
+            Transaksi.objects.filter(pk=transaksi.pk).update(tanggal=waktu)
+
+        response = self.client.get(reverse('transaksi-list-create'), {'start': hari.isoformat(), 'end': hari.isoformat()})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(reverse('transaksi-list-create'), {'start': (hari + timedelta(days=1)).isoformat()})
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class ViewCartTests(TestCase):
+    def setUp(self):
+        kategori = Kategori.objects.create(nama='Makanan')
+        self.petugas = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas', is_staff=True
+        )
+        self.produk = [
+            Produk.objects.create(
+                kode=f'P{i}', nama=f'Produk {i}', harga_khusus=Decimal('900'), harga_umum=Decimal('1000'),
+                stok=5, kategori=kategori,
+            )
+            for i in range(20)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.petugas)
+
+    def isi(self, produk_list, jumlah=1):
+        for i, produk in enumerate(produk_list):
+            tipe_harga = 'harga_khusus' if i % 2 else 'harga_umum'
+            CartItem.objects.create(petugas=self.petugas, produk=produk, jumlah=jumlah, tipe_harga=tipe_harga)
+
+    def test_satu_query_berapa_pun_jumlah_item(self):
+        self.isi(self.produk, jumlah=2)
+        self.produk[3].stok = 1
+        self.produk[3].save()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('view-cart'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['items']), 20)
+        self.assertEqual(response.data['total_harga'], Decimal('1000') * 2 * 10 + Decimal('900') * 2 * 10)
+        self.assertEqual(response.data['unavailable_items'], ['Produk 3'])
+        self.assertEqual(response.data['items'][1]['produk_detail']['harga'], Decimal('900'))
+        self.assertEqual(response.data['items'][1]['subtotal'], Decimal('1800'))
+
+    def test_ubah_jumlah_item(self):
+        self.isi(self.produk[:1])
+        item = CartItem.objects.get()
+        url = reverse('cart-update', args=[item.id])
+
+        # Form-encoded mengirim angka sebagai string
+        response = self.client.put(url, {'jumlah': '3'})
+        self.assertEqual((response.status_code, response.data['jumlah']), (200, 3))
+        for jumlah in (True, -1, 'dua', None):
+            self.assertEqual(self.client.put(url, {'jumlah': jumlah}, format='json').status_code, 400, jumlah)
+        self.assertEqual(CartItem.objects.get().jumlah, 3)
+
+        self.assertEqual(self.client.put(url, {'jumlah': 0}, format='json').status_code, 204)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_etag_mengembalikan_304_sampai_keranjang_berubah(self):
+        self.isi(self.produk[:3])
+        response = self.client.get(reverse('view-cart'))
+        etag = response['ETag']
+
+        response = self.client.get(reverse('view-cart'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        CartItem.objects.filter(produk=self.produk[0]).update(jumlah=4)
+        response = self.client.get(reverse('view-cart'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Perubahan harga produk juga mengubah ETag
+        etag = response['ETag']
+        Produk.objects.filter(id=self.produk[0].id).update(harga_umum=Decimal('1100'))
+        self.assertNotEqual(self.client.get(reverse('view-cart'))['ETag'], etag)
+
+class BulkCartViewTests(TestCase):
+    def setUp(self):
+        kategori = Kategori.objects.create(nama='Makanan')
+        self.petugas = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas', is_staff=True
+        )
+        self.produk = [
+            Produk.objects.create(
+                kode=f'P{i}', barcode=f'899{i:04d}', nama=f'Produk {i}', harga_khusus=Decimal('900'),
+                harga_umum=Decimal('1000'), stok=100, kategori=kategori,
+            )
+            for i in range(30)
+        ]
+        get_produk_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.petugas)
+
+    def kirim(self, items, aksi='tambah'):
+        return self.client.post(reverse('bulk-cart'), {'aksi': aksi, 'items': items}, format='json')
+
+    def test_scan_banyak_item_dengan_query_tetap(self):
+        items = [{'kode': p.kode, 'jumlah': 1} for p in self.produk[:5]]
+        with CaptureQueriesContext(connection) as kecil:
+            self.kirim(items)
+        CartItem.objects.all().delete()
+        get_produk_cache().clear()
+
+        items = [{'barcode': p.barcode, 'jumlah': 2, 'tipe_harga': 'khusus'} for p in self.produk]
+        with CaptureQueriesContext(connection) as besar:
+            response = self.kirim(items)
+        self.assertEqual(len(besar), len(kecil))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(len(response.data['items']), 30)
+        self.assertEqual(response.data['total_harga'], Decimal('900') * 2 * 30)
+
+    def test_tambah_menggabungkan_dengan_keranjang_dan_error_per_item(self):
+        CartItem.objects.create(petugas=self.petugas, produk=self.produk[0], jumlah=3, tipe_harga='harga_umum')
+        response = self.kirim([
+            {'kode': 'P0', 'jumlah': 2},
+            {'kode': 'TIDAK-ADA'},
+            {'barcode': self.produk[0].barcode},
+            {'kode': 'P1', 'barcode': '8990001'},
+            {'kode': 'P1', 'tipe_harga': 'grosir'},
+            {'kode': 'P1'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 3, 4])
+        jumlah = dict(CartItem.objects.values_list('produk__kode', 'jumlah'))
+        self.assertEqual(jumlah, {'P0': 6, 'P1': 1})
+
+    def test_ubah_dan_hapus(self):
+        for produk in self.produk[:3]:
+            CartItem.objects.create(petugas=self.petugas, produk=produk, jumlah=5, tipe_harga='harga_umum')
+
+        response = self.kirim([
+            {'kode': 'P0', 'jumlah': 1, 'tipe_harga': 'harga_khusus'},
+            {'kode': 'P1', 'jumlah': 0},
+        ], aksi='ubah')
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(
+            list(CartItem.objects.order_by('produk__kode').values_list('produk__kode', 'jumlah', 'tipe_harga')),
+            [('P0', 1, 'harga_khusus'), ('P2', 5, 'harga_umum')],
+        )
+
+        response = self.kirim([{'kode': 'P2'}, {'kode': 'P5'}], aksi='hapus')
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.assertEqual([item['produk'] for item in response.data['items']], [self.produk[0].id])
+
+    def test_payload_tidak_valid(self):
+        self.assertEqual(self.kirim([], aksi='tambah').status_code, 400)
+        self.assertEqual(self.kirim([{'kode': 'P0'}], aksi='ganti').status_code, 400)
+
+
+
+@override_settings(KERANJANG={'BACKEND': 'kv', 'KV_URL': 'memory://'}, NOTIFIKASI={'ASYNC': False})
+class KeyValueCartBackendTests(TestCase):
+    def setUp(self):
+        kategori = Kategori.objects.create(nama='Makanan')
+        self.petugas = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas', is_staff=True
+        )
+        self.produk = [
+            Produk.objects.create(
+                kode=f'P{i}', nama=f'Produk {i}', harga_khusus=Decimal('900'), harga_umum=Decimal('1000'),
+                stok=5, kategori=kategori,
+            )
+            for i in range(3)
+        ]
+        get_produk_cache().clear()
+        reset_cart_backend('KERANJANG')  # Store in-process baru untuk setiap test
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.petugas)
+
+    def scan(self, kode, jumlah=1, tipe_harga='harga_umum'):
+        response = self.client.post(reverse('add-to-cart'), {'kode_produk': kode, 'jumlah': jumlah, 'tipe_harga': tipe_harga}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_alur_keranjang_tanpa_menulis_cartitem(self):
+        self.assertIsInstance(get_cart_backend(), KeyValueCartBackend)
+        self.scan('P2', 2)
+        self.scan('P0', 1, 'harga_khusus')
+        response = self.scan('P2', 1)
+        self.assertEqual(response.data['jumlah'], 3)
+
+        self.client.post(reverse('bulk-cart'), {'items': [{'kode': 'P1', 'jumlah': 2}]}, format='json')
+        response = self.client.get(reverse('view-cart'))
+        # Urutan mengikuti urutan scan
+        self.assertEqual([item['produk_detail']['kode'] for item in response.data['items']], ['P2', 'P0', 'P1'])
+        self.assertEqual(response.data['total_harga'], Decimal('3000') + Decimal('900') + Decimal('2000'))
+        self.assertEqual(CartItem.objects.count(), 0)
+
+        item_id = response.data['items'][0]['id']
+        response = self.client.put(reverse('cart-update', args=[item_id]), {'jumlah': 1}, format='json')
+        self.assertEqual(response.data['subtotal'], Decimal('1000'))
+        response = self.client.delete(reverse('cart-item-detail', args=[item_id]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get(reverse('cart-item-detail', args=[item_id])).status_code, 404)
+
+        self.client.delete(reverse('clear-cart'))
+        self.assertEqual(self.client.get(reverse('view-cart')).data['items'], [])
+
+    def test_input_tidak_valid_ditolak_sebelum_masuk_keranjang(self):
+        for data in ({'kode_produk': 'P0', 'jumlah': -3, 'tipe_harga': 'bogus'}, {'kode_produk': 'P0', 'jumlah': 0},
+                     {'kode_produk': 'P0', 'jumlah': 'dua'}, {'kode_produk': 'P0', 'tipe_harga': 'grosir'}, {'jumlah': 1}):
+            self.assertEqual(self.client.post(reverse('add-to-cart'), data, format='json').status_code, 400, data)
+
+        response = self.client.post(reverse('bulk-cart'), {'items': [
+            {'kode': 'P0', 'jumlah': -3}, {'kode': 'P1', 'tipe_harga': 'bogus'}, {'kode': 'P2', 'jumlah': 0},
+        ]}, format='json')
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 1, 2])
+        self.assertEqual(self.client.get(reverse('view-cart')).data['items'], [])
+
+        response = self.client.post(reverse('add-to-cart'), {'kode_produk': 'P0'}, format='json')
+        self.assertEqual((response.status_code, response.data['jumlah'], response.data['tipe_harga']), (200, 1, 'harga_umum'))
+
+    def test_checkout_membersihkan_keranjang_setelah_commit(self):
+        self.scan('P0', 2)
+        self.scan('P1', 1, 'harga_khusus')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('checkout'), {'pelanggan': 'Budi'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Transaksi.objects.get().total_harga, Decimal('2900'))
+        self.assertEqual(Produk.objects.get(kode='P0').stok, 3)
+        self.assertEqual(self.client.get(reverse('view-cart')).data['items'], [])
+
+    def test_checkout_gagal_keranjang_tetap_utuh(self):
+        self.scan('P0', 9)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('checkout'), {'pelanggan': 'Budi'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.client.get(reverse('view-cart')).data['items']), 1)
+
+    def test_ttl_keranjang(self):
+        store = MemoriKeyValue()
+        backend = KeyValueCartBackend(store, ttl=-1)
+        backend.tambah(self.petugas, self.produk[0], 1, 'harga_umum')
+        self.assertEqual(backend.isi(self.petugas), [])
+
+# Pola baris plan yang berarti membaca seluruh tabel tanpa index
+class InvoiceTests(TestCase):
+    def setUp(self):
+        self.kategori = Kategori.objects.create(nama='Makanan')
+        self.petugas = CustomUser.objects.create_user(
+            email='kasir@example.com', password='rahasia123', full_name='Kasir', role='petugas'
+        )
+        self.produk = [
+            Produk.objects.create(
+                kode=f'INV-{i}', nama=f'Produk {i}', harga_khusus=Decimal('900'),
+                harga_umum=Decimal('1000'), stok=100, kategori=self.kategori,
+            )
+            for i in range(6)
+        ]
+        # Counter hari ini sudah ada, agar query insert counter pertama tidak ikut terhitung
+        InvoiceCounter.objects.create(tanggal=timezone.localdate())
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.petugas)
+
+    def buat_transaksi(self, jumlah_produk):
+        transaksi = Transaksi.objects.create(
+            user=self.petugas, total_harga=Decimal('1000') * jumlah_produk, metode_pembayaran='tunai', pelanggan='Budi'
+        )
+        TransaksiItem.objects.bulk_create([
+            TransaksiItem(transaksi=transaksi, produk=produk, jumlah=1, harga=produk.harga_umum)
+            for produk in self.produk[:jumlah_produk]
+        ])
+        return Transaksi.objects.get(id=transaksi.id)
+
+    def jumlah_query(self, fungsi):
+        with CaptureQueriesContext(connection) as ctx:
+            fungsi()
+        return len(ctx.captured_queries)
+
+    def test_buat_invoice_snapshot_dengan_query_tetap(self):
+        sedikit, banyak = self.buat_transaksi(1), self.buat_transaksi(6)
+        self.assertEqual(self.jumlah_query(sedikit.buat_invoice), self.jumlah_query(banyak.buat_invoice))
+
+        invoice = banyak.invoice
+        self.assertEqual(invoice.total_harga, Decimal('6000'))
+        self.assertEqual(invoice.pelanggan, 'Budi')
+        item = invoice.items.get(produk=self.produk[0])
+        self.assertEqual((item.nama_produk, item.harga, item.jumlah), ('Produk 0', Decimal('1000'), 1))
+
+    def test_snapshot_tetap_ada_setelah_keranjang_dan_harga_berubah(self):
+        transaksi = self.buat_transaksi(2)
+        cart_item = CartItem.objects.create(petugas=self.petugas, produk=self.produk[0], jumlah=1)
+        response = self.client.post(reverse('invoice-list-create'), {
+            'transaksi': transaksi.id, 'pelanggan': 'Budi',
+            'items': [{'cart_item': cart_item.id, 'jumlah': 2}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        cart_item.delete()
+        Produk.objects.filter(id=self.produk[0].id).update(harga_umum=Decimal('5000'))
+        item = InvoiceItem.objects.get(invoice_id=response.data['id'])
+        self.assertEqual((item.produk_id, item.harga, item.subtotal()), (self.produk[0].id, Decimal('1000'), Decimal('2000')))
+
+    def test_item_keranjang_kasir_lain_tidak_bisa_dipakai(self):
+        transaksi = self.buat_transaksi(1)
+        lain = CustomUser.objects.create_user(email='lain@example.com', password='rahasia123', full_name='Lain', role='petugas')
+        cart_item = CartItem.objects.create(petugas=lain, produk=self.produk[0], jumlah=1)
+        response = self.client.post(reverse('invoice-list-create'), {
+            'transaksi': transaksi.id, 'items': [{'cart_item': cart_item.id, 'jumlah': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(str(response.data['items'][0]), 'Item keranjang tidak ditemukan.')
+
+    @override_settings(KERANJANG={'BACKEND': 'kv', 'KV_URL': 'memory://'})
+    def test_item_keranjang_dari_backend_key_value(self):
+        reset_cart_backend('KERANJANG')
+        transaksi = self.buat_transaksi(1)
+        get_cart_backend().tambah(self.petugas, self.produk[1], 3, 'harga_khusus')
+        response = self.client.post(reverse('invoice-list-create'), {
+            'transaksi': transaksi.id, 'items': [{'cart_item': self.produk[1].id, 'jumlah': 2}, {'cart_item': self.produk[2].id, 'jumlah': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data['items']), [1])
+
+        response = self.client.post(reverse('invoice-list-create'), {
+            'transaksi': transaksi.id, 'pelanggan': 'Budi', 'items': [{'cart_item': self.produk[1].id, 'jumlah': 2}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        item = InvoiceItem.objects.get(invoice_id=response.data['id'])
+        self.assertEqual((item.produk_id, item.harga, item.cart_item_id), (self.produk[1].id, Decimal('900'), None))
+
+    def test_create_serializer_query_tetap(self):
+        def buat(jumlah_produk):
+            transaksi = self.buat_transaksi(jumlah_produk)
+            items = [{'produk': produk.id, 'jumlah': 2} for produk in self.produk[:jumlah_produk]]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(reverse('invoice-list-create'), {
+                    'transaksi': transaksi.id, 'pelanggan': 'Budi', 'items': items,
+                }, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+            return len(ctx.captured_queries), response.data
+
+        sedikit, _ = buat(1)
+        banyak, data = buat(6)
+        self.assertEqual(sedikit, banyak)
+        self.assertEqual(Decimal(data['total_harga']), Decimal('12000'))
+        self.assertEqual(len(data['items']), 6)
+
+    def test_create_tanpa_items_menyalin_item_transaksi(self):
+        transaksi = self.buat_transaksi(3)
+        response = self.client.post(reverse('invoice-list-create'), {
+            'transaksi': transaksi.id, 'pelanggan': 'Budi',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Decimal(response.data['total_harga']), Decimal('3000'))
+        self.assertEqual(InvoiceItem.objects.filter(invoice_id=response.data['id']).count(), 3)
+
+    def test_create_menolak_transaksi_milik_kasir_lain(self):
+        lain = CustomUser.objects.create_user(email='lain@example.com', password='rahasia123', full_name='Lain', role='petugas')
+        transaksi = Transaksi.objects.create(user=lain, total_harga=Decimal('0'), metode_pembayaran='tunai')
+        response = self.client.post(reverse('invoice-list-create'), {
+            'transaksi': transaksi.id, 'pelanggan': 'Budi',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('transaksi', response.data)
+
+    def test_update_hanya_menerapkan_selisih(self):
+        from .serializers import InvoiceSerializer
+
+        invoice = self.buat_transaksi(3).buat_invoice()
+        items = {item.produk_id: item for item in invoice.items.all()}
+        tetap, diubah, dihapus = (items[produk.id] for produk in self.produk[:3])
+
+        payload = [
+            {'id': tetap.id, 'jumlah': tetap.jumlah},
+            {'id': diubah.id, 'jumlah': 5},
+            {'produk': self.produk[3].id, 'jumlah': 1, 'harga': '750'},
+        ]
+        serializer = InvoiceSerializer(invoice, data={'items': payload}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        baris = {item.id: item for item in invoice.items.all()}
+        self.assertIn(tetap.id, baris)
+        self.assertEqual(baris[diubah.id].jumlah, 5)
+        self.assertNotIn(dihapus.id, baris)
+        self.assertEqual(len(baris), 3)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.total_harga, Decimal('1000') + Decimal('5000') + Decimal('750'))
+
+    def test_update_menolak_id_item_ganda(self):
+        from .serializers import InvoiceSerializer
+
+        invoice = self.buat_transaksi(2).buat_invoice()
+        item = invoice.items.first()
+        payload = [{'id': item.id, 'jumlah': 1}, {'id': item.id, 'jumlah': 3}]
+        serializer = InvoiceSerializer(invoice, data={'items': payload}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(list(serializer.errors['items']), [1])
+
+    def test_update_serializer_query_tetap(self):
+        from .serializers import InvoiceSerializer
+
+        def ubah(jumlah_produk):
+            invoice = self.buat_transaksi(jumlah_produk).buat_invoice()
+            payload = [{'id': item.id, 'jumlah': item.jumlah + 1} for item in invoice.items.all()]
+            payload.append({'produk': self.produk[0].id, 'jumlah': 1})
+            serializer = InvoiceSerializer(invoice, data={'items': payload}, partial=True)
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertTrue(serializer.is_valid(), serializer.errors)
+                serializer.save()
+            return len(ctx.captured_queries)
+
+        self.assertEqual(ubah(1), ubah(6))
+
+    def test_daftar_invoice_query_tetap(self):
+        def daftar():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('invoice-list-create'))
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries), response.data
+
+        self.buat_transaksi(2).buat_invoice()
+        sedikit, _ = daftar()
+        for jumlah_produk in (3, 6, 6):
+            self.buat_transaksi(jumlah_produk).buat_invoice()
+        banyak, data = daftar()
+
+        self.assertEqual(sedikit, banyak)
+        self.assertEqual(len(data), 4)
+        self.assertEqual(sum(len(invoice['items']) for invoice in data), 17)
+
+    def test_subtotal_tersimpan_tidak_ikut_harga_produk(self):
+        invoice = self.buat_transaksi(2).buat_invoice()
+        Produk.objects.update(harga_umum=Decimal('9999'))
+
+        self.assertEqual(invoice.total_invoice(), Decimal('2000'))
+        item = invoice.items.first()
+        item.jumlah = 3
+        item.save(update_fields=['jumlah'])
+        item.refresh_from_db()
+        self.assertEqual(item.subtotal_harga, Decimal('3000'))
+
+
+class PenomoranInvoiceTests(TestCase):
+    def test_nomor_urut_per_hari(self):
+        hari_ini, besok = date(2026, 3, 1), date(2026, 3, 2)
+        self.assertEqual(ambil_nomor_invoice(hari_ini), 'INV-20260301-000001')
+        self.assertEqual(ambil_nomor_invoice(hari_ini), 'INV-20260301-000002')
+        self.assertEqual(ambil_nomor_invoice(besok), 'INV-20260302-000001')
+
+    def test_nomor_ikut_batal_bersama_transaksinya(self):
+        tanggal = date(2026, 3, 1)
+        ambil_nomor_invoice(tanggal)
+        try:
+            with transaction.atomic():
+                ambil_nomor_invoice(tanggal)
+                raise RuntimeError("invoice gagal")
+        except RuntimeError:
+            pass
+        self.assertEqual(ambil_nomor_invoice(tanggal), 'INV-20260301-000002')
+
+    def test_blok_dibagikan_dari_memori_setelah_commit(self):
+        penomoran = PenomoranInvoice(blok=10)
+        tanggal = date(2026, 3, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(penomoran.ambil(tanggal), 'INV-20260301-000001')
+        with self.assertNumQueries(0):
+            berikutnya = [penomoran.ambil(tanggal) for _ in range(9)]
+        self.assertEqual(berikutnya[-1], 'INV-20260301-000010')
+        # Blok habis: worker lain yang memesan di antaranya tidak bentrok
+        self.assertEqual(PenomoranInvoice(blok=10).ambil(tanggal), 'INV-20260301-000011')
+        self.assertEqual(penomoran.ambil(tanggal), 'INV-20260301-000021')
+
+    def test_blok_yang_batal_tidak_dipakai(self):
+        penomoran = PenomoranInvoice(blok=10)
+        tanggal = date(2026, 3, 1)
+        try:
+            with transaction.atomic():
+                penomoran.ambil(tanggal)
+                raise RuntimeError("invoice gagal")
+        except RuntimeError:
+            pass
+        self.assertEqual(penomoran._rentang, {})
+        self.assertEqual(PenomoranInvoice(blok=1).ambil(tanggal), 'INV-20260301-000001')
+
+
+class PenomoranInvoiceConcurrencyTests(TransactionTestCase):
+    def ambil_bersamaan(self, blok, workers=4, per_worker=25):
+        tanggal = date(2026, 3, 1)
+        hasil, errors = [], []
+        lock = threading.Lock()
+
+        def worker():
+            penomoran = PenomoranInvoice(blok=blok)
+            try:
+                nomor = []
+                while len(nomor) < per_worker:
+                    # Database test SQLite in-memory (shared cache) langsung menolak penulis kedua
+                    # alih-alih menunggu busy timeout; transaksinya diulang seperti retry pada lock
+                    try:
+                        with transaction.atomic():
+                            baru = penomoran.ambil(tanggal)
+                    except OperationalError:
+                        time.sleep(0.001)
+                        continue
+                    nomor.append(baru)
+                with lock:
+                    hasil.extend(nomor)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return hasil
+
+    def test_tanpa_duplikat_dan_tanpa_lubang(self):
+        hasil = self.ambil_bersamaan(blok=1)
+        self.assertEqual(len(hasil), 100)
+        self.assertEqual(sorted(hasil), [f'INV-20260301-{i:06d}' for i in range(1, 101)])
+
+    def test_blok_per_worker_tanpa_duplikat(self):
+        hasil = self.ambil_bersamaan(blok=10)
+        self.assertEqual(len(hasil), 100)
+        self.assertEqual(len(set(hasil)), 100)
+
+
+# Setiap pembacaan seluruh tabel, termasuk berjalan di sepanjang index (SCAN t USING [COVERING] INDEX i)
+FULL_SCAN = {
+    'sqlite': re.compile(r'^SCAN (?!CONSTANT ROW)(\S+)'),
+    'postgresql': re.compile(r'Seq Scan on (\S+)'),
+}
+# Pengecualian yang disengaja: query top-N (LIMIT) tanpa filter boleh membaca index urutannya dari awal
+SCAN_URUT = {
+    'sqlite': re.compile(r'^SCAN (\S+) USING (?:COVERING )?INDEX \S+$'),
+    'postgresql': re.compile(r'^Index (?:Only )?Scan (?:Backward )?using \S+ on (\S+)'),
+}
+# Query top-N (LIMIT) harus membaca urutan langsung dari index, bukan mengurutkan semua baris yang cocok
+SORT_PENUH = {
+    'sqlite': re.compile(r'^USE TEMP B-TREE FOR (RIGHT PART OF )?ORDER BY$'),
+    'postgresql': re.compile(r'^Sort\b'),
+}
+# Pencarian rentang/lookup lewat index
+SEARCH_INDEX = {
+    'sqlite': re.compile(r'^SEARCH (\S+) USING (?:COVERING )?INDEX \S+ \('),
+    'postgresql': re.compile(r'(?:Index (?:Only )?Scan (?:Backward )?using \S+|Bitmap Heap Scan) on (\S+)'),
+}
+
+
+@skipUnless(connection.vendor in FULL_SCAN, "Harness query plan hanya untuk SQLite dan PostgreSQL")
+class QueryPlanTests(TestCase):
+    """
+    Menjalankan EXPLAIN untuk setiap query yang dieksekusi view-view panas terhadap dataset besar,
+    dan gagal bila ada query yang jatuh ke full table scan.
+    """
+    JUMLAH_KASIR = 20
+    JUMLAH_PRODUK = 200
+    JUMLAH_TRANSAKSI = 20000
+    JUMLAH_HARI = 365
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        kategori = Kategori.objects.create(nama='Makanan')
+        cls.kasir = [
+            CustomUser.objects.create_user(
+                email=f'kasir{i}@example.com', password=None, full_name=f'Kasir {i}', role='petugas', is_staff=True
+            )
+            for i in range(cls.JUMLAH_KASIR)
+        ]
+        cls.admin = CustomUser.objects.create_user(
+            email='admin@example.com', password=None, full_name='Admin', role='admin', is_admin_aplikasi=True
+        )
+        cls.produk = Produk.objects.bulk_create([
+            Produk(
+                kode=f'P{i}', nama=f'Produk {i}', harga_khusus=Decimal('900'), harga_umum=Decimal('1000'),
+                stok=1000, kategori=kategori,
+            )
+            for i in range(cls.JUMLAH_PRODUK)
+        ])
+
+        # auto_now_add akan menimpa tanggal sintetis; matikan sementara selama seeding
+        awal = timezone.now() - timedelta(days=cls.JUMLAH_HARI)
+        fields = [Transaksi._meta.get_field('tanggal'), StockLog._meta.get_field('created_at')]
+        for field in fields:
+            field.auto_now_add = False
+        try:
+            transaksi = Transaksi.objects.bulk_create([
+                Transaksi(
+                    user=rng.choice(cls.kasir),
+                    tanggal=awal + timedelta(seconds=rng.randrange(cls.JUMLAH_HARI * 24 * 3600)),
+                    total_harga=Decimal('1000'),
+                    metode_pembayaran='tunai',
+                )
+                for _ in range(cls.JUMLAH_TRANSAKSI)
+            ], batch_size=2000)
+            StockLog.objects.bulk_create([
+                StockLog(
+                    produk=rng.choice(cls.produk), perubahan=-1,
+                    created_at=awal + timedelta(seconds=rng.randrange(cls.JUMLAH_HARI * 24 * 3600)),
+                )
+                for _ in range(cls.JUMLAH_TRANSAKSI)
+            ], batch_size=2000)
+        finally:
+            for field in fields:
+                field.auto_now_add = True
+
+        TransaksiItem.objects.bulk_create([
+            TransaksiItem(transaksi=t, produk=rng.choice(cls.produk), jumlah=1, harga=Decimal('1000'))
+            for t in transaksi
+        ], batch_size=2000)
+        CartItem.objects.bulk_create([
+            CartItem(petugas=kasir, produk=produk, jumlah=1, tipe_harga='harga_umum')
+            for kasir in cls.kasir
+            for produk in cls.produk[:10]
+        ])
+        bangun_ulang_rollup()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assert_tanpa_full_scan(self, user, method, url, data=None, scan_urut=(), search=()):
+        """
+        `scan_urut`: tabel yang boleh dibaca dengan berjalan di index urutannya, hanya pada query ber-LIMIT
+        tanpa WHERE (halaman pertama daftar tanpa filter). `search`: tabel yang wajib dicari lewat index
+        (SEARCH ... USING INDEX) di setidaknya satu query.
+        """
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data, format='json' if method != 'get' else None)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+
+        vendor = connection.vendor
+        prefix = 'EXPLAIN QUERY PLAN ' if vendor == 'sqlite' else 'EXPLAIN '
+        diperiksa, dicari = 0, set()
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql)
+                plan = [row[-1].strip(' ->') for row in cursor.fetchall()]
+            top_n_tanpa_filter = ' LIMIT ' in sql and ' WHERE ' not in sql
+
+            scan = []
+            for baris in plan:
+                cocok = FULL_SCAN[vendor].search(baris)
+                urut = SCAN_URUT[vendor].search(baris)
+                if cocok and not (top_n_tanpa_filter and urut and urut.group(1).strip('"') in scan_urut):
+                    scan.append(baris)
+                cocok = SEARCH_INDEX[vendor].search(baris)
+                if cocok:
+                    dicari.add(cocok.group(1).strip('"'))
+            if ' LIMIT ' in sql:
+                scan += [baris for baris in plan if SORT_PENUH[vendor].search(baris)]
+            self.assertEqual(scan, [], f"Full scan pada {url}:\n{sql}\n" + '\n'.join(plan))
+            diperiksa += 1
+        self.assertGreater(diperiksa, 0)
+        self.assertEqual(set(search) - dicari, set(), f"Tabel tidak dicari lewat index pada {url}")
+
+    def test_daftar_transaksi_kasir(self):
+        kasir = self.kasir[0]
+        self.assert_tanpa_full_scan(kasir, 'get', reverse('transaksi-list-create'), search={'transaksi_app_transaksi'})
+        self.client.force_authenticate(user=kasir)
+        berikutnya = self.client.get(reverse('transaksi-list-create')).data['next']
+        self.assert_tanpa_full_scan(kasir, 'get', berikutnya, search={'transaksi_app_transaksi'})
+
+    def test_daftar_transaksi_admin_dengan_rentang_tanggal(self):
+        hari_ini = timezone.localdate()
+        # Halaman pertama tanpa filter: 51 baris teratas dari index tanggal
+        self.assert_tanpa_full_scan(self.admin, 'get', reverse('transaksi-list-create'), scan_urut={'transaksi_app_transaksi'})
+        self.assert_tanpa_full_scan(self.admin, 'get', reverse('transaksi-list-create'), {
+            'start': (hari_ini - timedelta(days=7)).isoformat(), 'end': hari_ini.isoformat(),
+        }, search={'transaksi_app_transaksi'})
+
+    def test_transaksi_terbaru_dan_dashboard(self):
+        self.assert_tanpa_full_scan(self.kasir[0], 'get', reverse('latest-user-transactions'), search={'transaksi_app_transaksi'})
+        self.assert_tanpa_full_scan(self.kasir[0], 'get', reverse('dashboard_summary'), search={'laporan_app_dailysalesrollup'})
+
+    def test_keranjang(self):
+        self.assert_tanpa_full_scan(self.kasir[0], 'get', reverse('view-cart'), search={'transaksi_app_cartitem'})
+        self.assert_tanpa_full_scan(self.kasir[0], 'post', reverse('add-to-cart'), {
+            'kode_produk': self.produk[50].kode, 'jumlah': 1, 'tipe_harga': 'umum',
+        })
+        self.assert_tanpa_full_scan(self.kasir[0], 'post', reverse('bulk-cart'), {
+            'items': [{'kode': produk.kode} for produk in self.produk[40:60]],
+        })
+
+    def test_log_stok_per_produk(self):
+        self.assert_tanpa_full_scan(self.admin, 'get', reverse('stock-log-list'), {'produk': self.produk[0].id}, search={'produk_app_stocklog'})
+
+    def test_laporan_rentang_tanggal(self):
+        hari_ini = timezone.localdate()
+        rentang = {'start': (hari_ini - timedelta(days=30)).isoformat(), 'end': hari_ini.isoformat()}
+        self.assert_tanpa_full_scan(self.admin, 'get', reverse('export-transaksi'), {'tipe': 'csv', **rentang}, search={'transaksi_app_transaksi'})
+        self.assert_tanpa_full_scan(self.admin, 'get', reverse('daily-sales'), {'period': 'daily', **rentang}, search={'laporan_app_dailysalesrollup'})
+        self.assert_tanpa_full_scan(self.admin, 'get', reverse('revenue-summary'))
@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     TransaksiListCreateView,
     AddToCartView,
+    BulkCartView,
     ViewCart,
     CheckoutView,
     ClearCartView,
@@ -19,6 +20,7 @@ urlpatterns = [
     path('transaksi/', TransaksiListCreateView.as_view(), name='transaksi-list-create'),  # Untuk daftar dan membuat transaksi
     path('cart/add/', AddToCartView.as_view(), name='add-to-cart'),  # Untuk menambahkan item ke keranjang
     path('cart/', ViewCart.as_view(), name='view-cart'),  # Untuk melihat keranjang
+    path('cart/bulk/', BulkCartView.as_view(), name='bulk-cart'),  # Tambah/ubah/hapus banyak item sekaligus
     path('clear-cart/', ClearCartView.as_view(), name='clear-cart'), 
     path('checkout/', CheckoutView.as_view(), name='checkout'),  
     path('transactions/latest/', LatestUserTransactionsView.as_view(), name='latest-user-transactions'),  \
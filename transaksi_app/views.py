@@ -1,17 +1,27 @@
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from .models import CartItem, Transaksi, TransaksiItem
-from .serializers import CartItemSerializer, TransaksiSerializer
+from .models import Transaksi, TransaksiItem
+from .serializers import AddToCartSerializer, BulkCartItemSerializer, CartItemSerializer, TransaksiSerializer, UpdateCartItemSerializer
+from .cart import AKSI_KERANJANG, etag_keranjang, get_cart_backend, ubah_keranjang_massal
+from .pagination import TransaksiCursorPagination
+from .filters import TransaksiFilter
+from django_filters.rest_framework import DjangoFilterBackend
 from produk_app.models import Produk
+from produk_app.services import reservasi_stok, StokTidakCukup
+from produk_app.cache import cari_produk, produk_dari_payload
+from laporan_app.services import catat_penjualan
+from petugas_app.notifikasi import terbitkan_penjualan
 from django.http import JsonResponse
 from django.views import View
 from .models import Invoice  
 from .serializers import InvoiceSerializer  #
 import logging
 from django.utils import timezone
+from django.utils.http import parse_etags
 from django.db import IntegrityError
 logger = logging.getLogger(__name__)
 from rest_framework import serializers
@@ -19,25 +29,22 @@ from rest_framework import serializers
 class TransaksiListCreateView(generics.ListCreateAPIView):
     serializer_class = TransaksiSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TransaksiCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TransaksiFilter
 
     def get_queryset(self):
         """
         Mengambil daftar transaksi sesuai dengan role user.
         - Jika 'petugas', hanya transaksi yang dibuat oleh user tersebut.
         - Jika 'admin', semua transaksi ditampilkan.
+        User, item, dan produk dimuat sekaligus agar jumlah query tidak bertambah per transaksi.
         """
         user = self.request.user
+        queryset = Transaksi.objects.select_related('user').prefetch_related('items__produk')
         if user.role == 'petugas':
-            return Transaksi.objects.filter(user=user)  
-        return Transaksi.objects.all()  
-
-    def get(self, request, *args, **kwargs):
-        """
-        Mengambil daftar transaksi.
-        """
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+            return queryset.filter(user=user)
+        return queryset
 
     def post(self, request, *args, **kwargs):
         """
@@ -58,27 +65,20 @@ class AddToCartView(APIView):
 
     def post(self, request):
         petugas = request.user
-        kode_produk = request.data.get('kode_produk')
-        jumlah = request.data.get('jumlah', 1)
-        tipe_harga = request.data.get('tipe_harga')
+        serializer = AddToCartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        kode_produk, jumlah, tipe_harga = (serializer.validated_data[field] for field in ('kode_produk', 'jumlah', 'tipe_harga'))
 
         try:
-            produk = Produk.objects.get(kode=kode_produk)
+            # Lookup lewat cache scan; instance dibangun dari payload tanpa query ke database
+            produk = produk_dari_payload(cari_produk('kode', kode_produk))
         except Produk.DoesNotExist:
             logger.error(f"User {petugas} mencoba menambahkan produk dengan kode {kode_produk} yang tidak ditemukan.")
             return Response({"error": "Produk tidak ditemukan."}, status=status.HTTP_404_NOT_FOUND)
 
-        harga = produk.harga_khusus if tipe_harga == 'khusus' else produk.harga_umum
-
-        cart_item, created = CartItem.objects.get_or_create(
-            petugas=petugas,
-            produk=produk,
-            defaults={'jumlah': jumlah, 'tipe_harga': tipe_harga}
-        )
+        cart_item, created = get_cart_backend().tambah(petugas, produk, jumlah, tipe_harga)
 
         if not created:
-            cart_item.jumlah += jumlah
-            cart_item.save()
             logger.info(f"User {petugas} menambahkan produk {produk.nama} ke keranjang. Jumlah baru: {cart_item.jumlah}.")
         else:
             logger.info(f"User {petugas} membuat item baru di keranjang: {produk.nama} dengan jumlah {jumlah}.")
@@ -90,22 +90,73 @@ class ViewCart(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        """
+        Isi keranjang, total, dan item yang stoknya tidak cukup, dihitung dalam satu query dan satu putaran.
+        Respons membawa ETag; front end yang polling dengan If-None-Match mendapat 304 bila keranjang tidak berubah.
+        """
         petugas = request.user
-        cart_items = CartItem.objects.filter(petugas=petugas)
-        serializer = CartItemSerializer(cart_items, many=True)
-        total_harga = sum(item.subtotal() for item in cart_items)
+        cart_items = get_cart_backend().isi(petugas)
 
-        # Cek ketersediaan stok
-        unavailable_items = []
+        etag = etag_keranjang(petugas, cart_items)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        total_harga = 0
+        unavailable_items = []  # Daftar item yang stoknya tidak mencukupi
         for item in cart_items:
+            total_harga += item.subtotal_harga
             if item.jumlah > item.produk.stok:
                 unavailable_items.append(item.produk.nama)
 
         return Response({
-            'items': serializer.data,
+            'items': CartItemSerializer(cart_items, many=True).data,
             'total_harga': total_harga,
-            'unavailable_items': unavailable_items  # Daftar item yang tidak tersedia
-        })
+            'unavailable_items': unavailable_items
+        }, headers=headers)
+
+
+class BulkCartView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAKS_ITEM = 200
+
+    def post(self, request):
+        """
+        Operasi keranjang massal untuk scan banyak barang dalam satu request.
+        Body: {"aksi": "tambah" | "ubah" | "hapus", "items": [{"kode" | "barcode", "jumlah", "tipe_harga"}, ...]}.
+        Item yang gagal dilaporkan di `errors` per indeks tanpa menggagalkan item lain;
+        respons selalu berisi isi keranjang terbaru.
+        """
+        petugas = request.user
+        aksi = request.data.get('aksi', 'tambah')
+        items = request.data.get('items')
+
+        if aksi not in AKSI_KERANJANG:
+            return Response({"error": f"Aksi harus salah satu dari: {', '.join(AKSI_KERANJANG)}."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Items wajib berupa daftar yang tidak kosong."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.MAKS_ITEM:
+            return Response({"error": f"Maksimal {self.MAKS_ITEM} item per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        valid, errors = [], []
+        for index, data in enumerate(items):
+            serializer = BulkCartItemSerializer(data=data, context={'aksi': aksi})
+            if serializer.is_valid():
+                valid.append({**serializer.validated_data, 'index': index})
+            else:
+                errors.append({'index': index, 'error': serializer.errors})
+
+        if valid:
+            errors.extend(ubah_keranjang_massal(petugas, aksi, valid))
+        errors.sort(key=lambda error: error['index'])
+        logger.info(f"User {petugas} menjalankan aksi keranjang massal '{aksi}': {len(items) - len(errors)} berhasil, {len(errors)} gagal.")
+
+        cart_items = get_cart_backend().isi(petugas)
+        return Response({
+            'items': CartItemSerializer(cart_items, many=True).data,
+            'total_harga': sum(item.subtotal_harga for item in cart_items),
+            'errors': errors,
+        }, status=status.HTTP_200_OK)
 
 
 class CheckoutView(APIView):
@@ -113,10 +164,18 @@ class CheckoutView(APIView):
 
     @transaction.atomic
     def post(self, request):
+        """
+        Checkout keranjang sebagai pipeline batch dengan jumlah query tetap:
+        satu pembacaan keranjang, satu pembacaan produk terkunci dan satu pengurangan stok
+        bersyarat (lewat reservasi_stok), satu insert transaksi (dengan total yang sudah
+        dihitung), satu bulk insert item, pembaruan rekap harian, dan satu penghapusan
+        keranjang, berapa pun jumlah item di keranjang.
+        """
         petugas = request.user
-        cart_items = CartItem.objects.filter(petugas=petugas)
+        keranjang = get_cart_backend()
+        cart_items = keranjang.isi(petugas, dengan_produk=False)
 
-        if not cart_items.exists():
+        if not cart_items:
             logger.warning(f"User {petugas} mencoba checkout dengan keranjang kosong.")
             return Response({"error": "Keranjang kosong."}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -125,44 +184,59 @@ class CheckoutView(APIView):
             logger.error(f"User {petugas} melakukan checkout tanpa nama pelanggan.")
             return Response({"error": "Nama pelanggan wajib diisi."}, status=status.HTTP_400_BAD_REQUEST)
 
-        total_harga = sum(item.subtotal() for item in cart_items)
-
         try:
-            # Cek ketersediaan stok
+            # Jumlahkan permintaan per produk (satu produk bisa muncul di beberapa baris keranjang)
+            permintaan = {}
+            for item in cart_items:
+                permintaan[item.produk_id] = permintaan.get(item.produk_id, 0) + item.jumlah
+
+            # Kunci produk dan kurangi stok secara atomik; semua kekurangan dilaporkan sekaligus
+            try:
+                produk_map = reservasi_stok(permintaan)
+            except StokTidakCukup as e:
+                logger.error(f"Stok tidak cukup saat checkout oleh user {petugas}: {e}")
+                return Response({
+                    "error": "Stok tidak cukup untuk beberapa produk.",
+                    "kekurangan": e.kekurangan,
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # Snapshot harga di memori dan hitung total sekaligus
+            transaksi_items = []
+            total_harga = 0
             for item in cart_items:
-                if item.jumlah > item.produk.stok:
-                    logger.error(f"Stok tidak cukup untuk produk {item.produk.nama}. Permintaan: {item.jumlah}, Stok: {item.produk.stok}")
-                    return Response({"error": f"Stok tidak cukup untuk produk {item.produk.nama}."}, status=status.HTTP_400_BAD_REQUEST)
+                produk = produk_map[item.produk_id]
+                harga = produk.harga_khusus if item.tipe_harga == 'harga_khusus' else produk.harga_umum
+                total_harga += harga * item.jumlah
+                transaksi_items.append(TransaksiItem(produk=produk, jumlah=item.jumlah, tipe_harga=item.tipe_harga, harga=harga))
 
-            # Buat transaksi
-            transaksi = Transaksi.objects.create(user=petugas, total_harga=total_harga, pelanggan=pelanggan)
+            # Buat transaksi dengan total yang sudah final
+            transaksi = Transaksi.objects.create(
+                user=petugas,
+                total_harga=total_harga,
+                pelanggan=pelanggan,
+                metode_pembayaran=request.data.get('metode_pembayaran', ''),
+            )
 
-            items = []  # Untuk menyimpan data produk yang dibeli
-            for item in cart_items:
-                # Pastikan produk ada
-                if not item.produk:
-                    logger.error(f"Produk dengan ID {item.produk.id} tidak ditemukan saat checkout.")
-                    return Response({"error": f"Produk dengan ID {item.produk.id} tidak ditemukan."}, status=status.HTTP_400_BAD_REQUEST)
+            # Buat semua item transaksi dalam satu bulk insert
+            for transaksi_item in transaksi_items:
+                transaksi_item.transaksi = transaksi
+            TransaksiItem.objects.bulk_create(transaksi_items)
 
-                # Buat item transaksi
-                TransaksiItem.objects.create(transaksi=transaksi, produk=item.produk, jumlah=item.jumlah, tipe_harga=item.tipe_harga)
+            # Perbarui rekap penjualan harian untuk laporan
+            catat_penjualan(transaksi, transaksi_items)
 
-                # Kurangi stok produk
-                item.produk.stok -= item.jumlah
-                item.produk.save()
+            # Notifikasi transaksi dan stok rendah dikirim setelah commit, di luar jalur checkout
+            terbitkan_penjualan(transaksi, petugas, produk_map, permintaan)
 
-                # Tambahkan item ke dalam list untuk response
-                items.append({
-                    "cart_item": item.id,
-                    "jumlah": item.jumlah,
-                })
+            items = [{"cart_item": item.id, "jumlah": item.jumlah} for item in cart_items]
 
             logger.info(f"User {petugas} berhasil melakukan checkout dengan ID transaksi {transaksi.id}.")
 
             # Hapus item keranjang
-            cart_items.delete()
+            keranjang.selesai_checkout(petugas, cart_items)
 
-            # Serialize transaksi untuk dikembalikan dalam response
+            # Serialize transaksi untuk dikembalikan dalam response (item dan produk di-prefetch)
+            prefetch_related_objects([transaksi], 'items__produk')
             transaksi_serializer = TransaksiSerializer(transaksi)
 
             return Response({
@@ -185,7 +259,13 @@ class LatestUserTransactionsView(generics.ListAPIView):
 
     def get_queryset(self):
         # Filter transaksi berdasarkan user yang sedang login, batasi ke 10 transaksi terbaru
-        return Transaksi.objects.filter(user=self.request.user).order_by('-tanggal')[:10]
+        return (
+            Transaksi.objects
+            .filter(user=self.request.user)
+            .select_related('user')
+            .prefetch_related('items__produk')
+            .order_by('-tanggal')[:10]
+        )
 
 
 class ClearCartView(APIView):
@@ -193,8 +273,8 @@ class ClearCartView(APIView):
 
     def delete(self, request):
         petugas = request.user
-        CartItem.objects.filter(petugas=petugas).delete()
-        
+        get_cart_backend().kosongkan(petugas)
+
         # Logging pengosongan keranjang
         logger.info(f"User {petugas} telah mengosongkan keranjang.")
         return Response({"message": "Keranjang berhasil dikosongkan"}, status=status.HTTP_200_OK)
@@ -204,21 +284,17 @@ class CartItemDetailView(APIView):
 
     def get(self, request, cart_item_id):
         petugas = request.user
-        try:
-            cart_item = CartItem.objects.get(id=cart_item_id, petugas=petugas)
-            serializer = CartItemSerializer(cart_item)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except CartItem.DoesNotExist:
+        cart_item = get_cart_backend().ambil_item(petugas, cart_item_id)
+        if cart_item is None:
             return Response({"error": "Item tidak ditemukan di keranjang."}, status=status.HTTP_404_NOT_FOUND)
+        serializer = CartItemSerializer(cart_item)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
     def delete(self, request, cart_item_id):
         petugas = request.user
-        try:
-            cart_item = CartItem.objects.get(id=cart_item_id, petugas=petugas)
-            cart_item.delete()  # Menghapus item dari keranjang
-            return Response({"message": "Item berhasil dihapus dari keranjang."}, status=status.HTTP_204_NO_CONTENT)
-        except CartItem.DoesNotExist:
+        if not get_cart_backend().hapus_item(petugas, cart_item_id):  # Menghapus item dari keranjang
             return Response({"error": "Item tidak ditemukan di keranjang."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"message": "Item berhasil dihapus dari keranjang."}, status=status.HTTP_204_NO_CONTENT)
         
 
         
@@ -227,35 +303,28 @@ class UpdateCartItemView(APIView):
 
     def put(self, request, cart_item_id):
         petugas = request.user
-        jumlah = request.data.get('jumlah')
+        serializer = UpdateCartItemSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        jumlah = serializer.validated_data['jumlah']
 
-        try:
-            cart_item = CartItem.objects.get(id=cart_item_id, petugas=petugas)
-            if jumlah <= 0:
-                cart_item.delete()
-                return Response({"message": "Item dihapus dari keranjang"}, status=status.HTTP_204_NO_CONTENT)
-            
-            cart_item.jumlah = jumlah
-            cart_item.save()
-            serializer = CartItemSerializer(cart_item)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except CartItem.DoesNotExist:
+        cart_item = get_cart_backend().ubah_jumlah(petugas, cart_item_id, jumlah)
+        if cart_item is None:
             return Response({"error": "Item tidak ditemukan di keranjang."}, status=status.HTTP_404_NOT_FOUND)
+        if jumlah <= 0:
+            return Response({"message": "Item dihapus dari keranjang"}, status=status.HTTP_204_NO_CONTENT)
+
+        serializer = CartItemSerializer(cart_item)
+        return Response(serializer.data, status=status.HTTP_200_OK)
         
 
 class CartItemView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, item_id):
-        """Menghapus item dari keranjang berdasarkan item_id."""
-        try:
-            item = CartItem.objects.get(id=item_id)
-            item.delete()
-            return Response({"detail": "Item berhasil dihapus dari keranjang"}, status=status.HTTP_204_NO_CONTENT)
-        except CartItem.DoesNotExist:
+        """Menghapus item dari keranjang milik user yang login berdasarkan item_id."""
+        if not get_cart_backend().hapus_item(request.user, item_id):
             return Response({"detail": "Item tidak ditemukan"}, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"detail": "Item berhasil dihapus dari keranjang"}, status=status.HTTP_204_NO_CONTENT)
         
 
 class InvoiceListCreateView(generics.ListCreateAPIView):
@@ -269,9 +338,11 @@ class InvoiceListCreateView(generics.ListCreateAPIView):
         - Jika 'admin', semua invoice ditampilkan.
         """
         user = self.request.user
+        # Baris invoice dimuat sekaligus dengan satu query; subtotal sudah tersimpan di setiap baris
+        queryset = Invoice.objects.prefetch_related('items').order_by('-tanggal_invoice', '-id')
         if user.role == 'petugas':
-            return Invoice.objects.filter(transaksi__user=user)  # Hanya invoice dari transaksi petugas tersebut
-        return Invoice.objects.all()  # Admin dapat melihat semua invoice
+            return queryset.filter(transaksi__user=user)  # Hanya invoice dari transaksi petugas tersebut
+        return queryset  # Admin dapat melihat semua invoice
 
     def post(self, request, *args, **kwargs):
         """